@@ -1,12 +1,12 @@
+import argparse
 import pandas as pd
 import re
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Tuple
+from dataclasses import dataclass, asdict, replace
 import json
 import warnings
 import time
 import random
-import requests
 from const import GIGACHAT_TOKEN_CORP
 from selenium import webdriver
 from selenium.webdriver.edge.options import Options as EdgeOptions
@@ -15,8 +15,27 @@ from webdriver_manager.microsoft import EdgeChromiumDriverManager
 from selenium.webdriver.edge.service import Service
 from urllib.parse import urljoin, urlparse
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
+from change_tracker import ChangeTracker, content_fingerprint
+from content_retrieval import estimate_tokens, select_relevant_text
+from crawl_frontier import CrawlFrontier, FrontierItem, RobotsPolicy, link_priority
+from driver_pool import DriverUnavailableError, get_shared_driver_pool, shutdown_shared_driver_pool
+from link_classifier import LinkClassifier
+from link_index import LinkScoring, ProductLinkIndex
+from llm_cache import DEFAULT_TTL as LLM_CACHE_TTL, LLMResponseCache, llm_cache_key
+from page_index import PageIndex
+from page_waits import AdaptivePageWaiter
+from politeness import HostPoliteness
+from product_keywords import service_product_type
+from rate_limit import RETRY_STATUSES, TokenBucket, backoff_delay
+from structured_log import ProgressReporter, add_logging_arguments, get_logger, setup_logging_from_args
+from text_normalize import collapse_whitespace
+from tiered_fetcher import TieredFetcher
+from url_utils import dedupe_links
+
 # Импорты для langchain из langchain_community
 from langchain_community.chat_models import GigaChat
 from langchain_core.messages import HumanMessage, SystemMessage
@@ -24,6 +43,21 @@ from langchain_core.messages import HumanMessage, SystemMessage
 # Отключаем предупреждения
 warnings.filterwarnings("ignore")
 
+logger = get_logger(__name__)
+
+# Названия классов сетевых исключений (httpx, requests, встроенные), после которых запрос к LLM повторяется
+TRANSIENT_ERROR_MARKERS = ('timeout', 'connect', 'network', 'remoteprotocol', 'readerror')
+
+# Предельная длина текста одной страницы: отбор релевантного текста выполняется при сборке промпта
+PAGE_CONTENT_LIMIT = 50000
+
+# Селекторы основных текстовых блоков страницы банка
+CONTENT_SELECTORS = [
+    'main', 'article', 'section', '.content', '.main-content',
+    '.text-block', '.product-description', '.bank-product',
+    '.product-info', '.offer', '.tariff', '.condition'
+]
+
 
 @dataclass
 class BenchmarkResult:
@@ -38,7 +72,15 @@ class BenchmarkResult:
 
 
 class BankBenchmarkAgent:
-    def __init__(self, gigachat_token: str):
+    def __init__(self, gigachat_token: str, max_workers: int = 4, host_delay: float = 2.0,
+                 driver_pool_size: Optional[int] = None, driver_max_age: float = 1800.0,
+                 page_wait_timeout: float = 10.0, incremental: bool = False,
+                 llm_concurrency: int = 4, llm_requests_per_minute: float = 30.0,
+                 llm_tokens_per_minute: Optional[float] = None, llm_max_retries: int = 3,
+                 llm_cache_file: Optional[str] = "llm_cache.sqlite", llm_cache_ttl: float = LLM_CACHE_TTL,
+                 llm_context_tokens: int = 4000, index_max_age: float = 12 * 60 * 60,
+                 link_scoring: Optional[LinkScoring] = None, crawl_depth: int = 0,
+                 max_pages_per_domain: int = 20, respect_robots: bool = True):
         # Обновляем словарь банков с конкретными URL для парсинга
         self.banks = {
             'alfabank': {
@@ -143,12 +185,61 @@ class BankBenchmarkAgent:
 
         self.gigachat_token = gigachat_token
         self.llm = self._init_gigachat()
-        self.driver = self._init_selenium_driver()
+        # Параллельный анализ: не более llm_concurrency запросов в полете,
+        # частота запросов (и, если задано, токенов) ограничивается в минуту; 0 - без ограничения
+        self.llm_concurrency = llm_concurrency
+        self.llm_max_retries = llm_max_retries
+        self.llm_context_tokens = llm_context_tokens  # Бюджет на текст банка в промпте
+        self.llm_request_limiter = (TokenBucket(rate=llm_requests_per_minute / 60.0,
+                                                capacity=max(llm_concurrency, 1))
+                                    if llm_requests_per_minute else None)
+        self.llm_token_limiter = (TokenBucket(rate=llm_tokens_per_minute / 60.0, capacity=llm_tokens_per_minute)
+                                  if llm_tokens_per_minute else None)
+        self.max_workers = max_workers  # Число параллельных воркеров при сборе данных
+        # Обход найденных ссылок на продукты: глубина от стартовых страниц и бюджет страниц на хост
+        # (по умолчанию обходятся только стартовые страницы)
+        self.crawl_depth = crawl_depth
+        self.max_pages_per_domain = max_pages_per_domain
+        self.respect_robots = respect_robots
+        self.host_politeness = HostPoliteness(min_interval=host_delay)
+        # Общий для процесса пул прогретых драйверов: холодный старт Edge оплачивается один раз
+        self.driver_pool = get_shared_driver_pool(
+            self._init_selenium_driver,
+            size=driver_pool_size or max(max_workers, 1),
+            max_age=driver_max_age
+        )
+        # Ожидание готовности страниц вместо фиксированных пауз
+        self.page_waiter = AdaptivePageWaiter(max_wait=page_wait_timeout, content_selectors=CONTENT_SELECTORS)
         self.all_bank_data = {}  # Для хранения данных всех банков
+        # Сырые данные и ссылки банков заполняются после обхода из результатов отдельных страниц,
+        # воркеры обхода их не изменяют
         self.raw_data_storage = {}  # Для хранения сырых данных парсинга
         self.product_links_storage = {}
+        # Индексы ссылок банков для поиска точной ссылки на продукт (строятся по первому запросу)
+        self.product_link_indexes: Dict[str, ProductLinkIndex] = {}
+        self.link_scoring = link_scoring or LinkScoring()
         self.parsing_results_dir = "parsing_results"
+        # Сначала HTTP, браузер - только для страниц, которым нужен JavaScript
+        # Ответы кешируются на диске; ограничение частоты применяется только к сетевым запросам
+        self.tiered_fetcher = TieredFetcher(
+            decisions_file=os.path.join(self.parsing_results_dir, "fetch_tiers.json"),
+            politeness=self.host_politeness
+        )
+        # Локальный индекс собранных страниц: запросы по услугам без повторного обхода сайтов
+        self.page_index = PageIndex(os.path.join(self.parsing_results_dir, "page_index.sqlite"))
+        # Списки ключевых слов для классификации ссылок собираются один раз
+        self.link_classifier = LinkClassifier()
+        self.index_max_age = index_max_age
+        # Кеш ответов LLM (None - отключен); путь задается относительно директории результатов
+        self.llm_cache = (LLMResponseCache(os.path.join(self.parsing_results_dir, llm_cache_file),
+                                           default_ttl=llm_cache_ttl)
+                          if llm_cache_file else None)
         self.target_service = ""  # Целевая услуга для анализа
+        # Инкрементальный режим: отпечатки страниц и повторное использование ответов LLM
+        # для банков, чьи данные не изменились с прошлого запуска
+        self.incremental = incremental
+        self.page_tracker: Optional[ChangeTracker] = None
+        self.page_changes_report = None
 
     def _init_gigachat(self):
         """Инициализация GigaChat через langchain"""
@@ -165,7 +256,7 @@ class BankBenchmarkAgent:
             return llm
 
         except Exception as e:
-            print(f"❌ Ошибка инициализации GigaChat: {e}")
+            logger.error("❌ Ошибка инициализации GigaChat: %s", e)
             return None
 
     def _init_selenium_driver(self):
@@ -200,7 +291,7 @@ class BankBenchmarkAgent:
 
             # Метод 1: Простая инициализация без менеджера
             try:
-                print("🔄 Попытка 1: Простая инициализация...")
+                logger.debug("🔄 Попытка 1: Простая инициализация...")
                 driver = webdriver.Edge(options=edge_options)
                 driver.set_page_load_timeout(30)
                 driver.implicitly_wait(10)
@@ -208,14 +299,14 @@ class BankBenchmarkAgent:
                 # Убираем навигационные свойства WebDriver
                 driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
 
-                print("✅ Драйвер инициализирован через простой метод")
+                logger.info("✅ Драйвер инициализирован через простой метод")
                 return driver
             except Exception as e:
-                print(f"❌ Метод 1 не сработал: {e}")
+                logger.warning("❌ Метод 1 не сработал: %s", e)
 
             # Метод 2: Пробуем с service но без менеджера
             try:
-                print("🔄 Попытка 2: Инициализация с Service...")
+                logger.debug("🔄 Попытка 2: Инициализация с Service...")
                 service = Service()
                 driver = webdriver.Edge(service=service, options=edge_options)
                 driver.set_page_load_timeout(30)
@@ -223,14 +314,14 @@ class BankBenchmarkAgent:
 
                 driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
 
-                print("✅ Драйвер инициализирован через Service")
+                logger.info("✅ Драйвер инициализирован через Service")
                 return driver
             except Exception as e:
-                print(f"❌ Метод 2 не сработал: {e}")
+                logger.warning("❌ Метод 2 не сработал: %s", e)
 
             # Метод 3: Пробуем с менеджером (последняя попытка)
             try:
-                print("🔄 Попытка 3: Используем менеджер драйверов...")
+                logger.debug("🔄 Попытка 3: Используем менеджер драйверов...")
                 service = Service(EdgeChromiumDriverManager().install())
                 driver = webdriver.Edge(service=service, options=edge_options)
                 driver.set_page_load_timeout(30)
@@ -238,22 +329,22 @@ class BankBenchmarkAgent:
 
                 driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
 
-                print("✅ Драйver инициализирован через менеджер")
+                logger.info("✅ Драйвер инициализирован через менеджер")
                 return driver
             except Exception as e:
-                print(f"❌ Метод 3 не сработал: {e}")
+                logger.warning("❌ Метод 3 не сработал: %s", e)
 
             raise Exception("Все методы инициализации не сработали")
 
         except Exception as e:
-            print(f"❌ Критическая ошибка инициализации Selenium Edge: {e}")
+            logger.error("❌ Критическая ошибка инициализации Selenium Edge: %s", e)
             return None
 
     def _create_results_directory(self):
         """Создание директории для сохранения результатов"""
         if not os.path.exists(self.parsing_results_dir):
             os.makedirs(self.parsing_results_dir)
-            print(f"📁 Создана директория для результатов: {self.parsing_results_dir}")
+            logger.info("📁 Создана директория для результатов: %s", self.parsing_results_dir)
 
     def save_parsing_data_to_txt(self, service_name: str = "general"):
         """Сохранение сырых данных парсинга в TXT файлы"""
@@ -277,7 +368,7 @@ class BankBenchmarkAgent:
 
             f.write(f"\nВСЕГО ОБРАБОТАНО БАНКОВ: {len(self.all_bank_data)}/{len(self.banks)}\n")
 
-        print(f"📄 Сохранен общий отчет: {summary_file}")
+        logger.info("📄 Сохранен общий отчет: %s", summary_file)
 
         # Сохраняем детальные данные по каждому банку
         for bank_name, bank_data in self.all_bank_data.items():
@@ -303,7 +394,7 @@ class BankBenchmarkAgent:
                 if len(bank_data.get('product_links', [])) > 20:
                     f.write(f"... и еще {len(bank_data['product_links']) - 20} ссылок\n")
 
-            print(f"📄 Сохранены данные {bank_name}: {bank_file}")
+            logger.debug("📄 Сохранены данные %s: %s", bank_name, bank_file)
 
         # Сохраняем сырые HTML данные (первые 5000 символов)
         raw_html_file = f"{base_filename}_raw_html.txt"
@@ -318,103 +409,274 @@ class BankBenchmarkAgent:
                 f.write(raw_data['page_source'] + "\n\n")
                 f.write("=" * 80 + "\n\n")
 
-        print(f"📄 Сохранены сырые HTML данные: {raw_html_file}")
-        print(f"✅ Все данные парсинга сохранены в папку '{self.parsing_results_dir}'")
+        logger.info("📄 Сохранены сырые HTML данные: %s", raw_html_file)
+        logger.info("✅ Все данные парсинга сохранены в папку '%s'", self.parsing_results_dir)
 
-    def fetch_all_banks_data(self):
-        """Сбор данных со всех банков через Selenium"""
-        print("📥 Собираем данные со всех банков через Selenium...")
+    def fetch_all_banks_data(self, concurrent: Optional[bool] = None, revalidate: bool = False):
+        """
+        Сбор данных со всех банков через Selenium
 
-        for bank_name, bank_info in self.banks.items():
-            print(f"🛠️ Парсим {bank_name}...")
-
-            # Для каждого банка используем специальную функцию парсинга
-            if bank_name == 'sovcombank':
-                bank_data = self._fetch_bank_data_with_urls(bank_name, bank_info)
-            elif bank_name == 'sberbank':
-                bank_data = self._fetch_bank_data_with_urls(bank_name, bank_info)
-            else:
-                # Общий метод для всех банков с использованием specific_urls
-                bank_data = self._fetch_bank_data_with_urls(bank_name, bank_info)
+        Args:
+            concurrent: Параллельный сбор (по умолчанию - если max_workers > 1).
+                Воркеры берут страницы из общей очереди обхода; к одному хосту -
+                не более одного запроса одновременно.
+            revalidate: Не брать страницы из кеша ответов без проверки на сервере
+                (принудительное обновление, --refresh)
+        """
+        if concurrent is None:
+            concurrent = self.max_workers > 1
+        self.tiered_fetcher.revalidate = revalidate
 
-            if bank_data:
-                self.all_bank_data[bank_name] = bank_data
-                print(f"✅ Данные {bank_name} получены")
-            else:
-                print(f"❌ Не удалось получить данные для {bank_name}")
+        if self.incremental:
+            self.page_tracker = ChangeTracker(os.path.join(self.parsing_results_dir, "page_fingerprints.json"))
 
-    def _fetch_bank_data_with_urls(self, bank_name: str, bank_info: Dict) -> Optional[Dict[str, Any]]:
-        """Функция парсинга банка с использованием multiple URLs через Selenium"""
         try:
-            print(f"🌐 Парсим {bank_name} с использованием специальных URL...")
-
-            all_content = ""
-            all_product_links = []
+            indexed_pages = self._fetch_banks(concurrent)
+            if indexed_pages:
+                self.page_index.mark_crawled()
+            else:
+                # Неудачный обход не должен делать индекс "свежим": следующий запуск обойдет сайты снова
+                logger.warning("⚠️  Ни одна страница не проиндексирована, время обхода индекса не обновлено")
+        finally:
+            if self.page_tracker is not None:
+                self._save_page_changes()
+
+    def _fetch_banks(self, concurrent: bool) -> int:
+        """Обход сайтов банков; возвращает число успешно проиндексированных страниц"""
+        frontier = self._build_frontier()
+        workers = max(min(self.max_workers, len(self.banks)), 1) if concurrent else 1
+        logger.info("📥 Собираем данные со всех банков (воркеров: %d, глубина ссылок: %d)...", workers, self.crawl_depth)
+        progress = ProgressReporter("Страницы банков", logger=logger)
+
+        crawled: Dict[str, List[Tuple[FrontierItem, Dict[str, Any], Optional[str]]]] = {
+            bank_name: [] for bank_name in self.banks
+        }
+        crawled_lock = threading.Lock()
+        if workers == 1:
+            self._crawl_worker(frontier, crawled, crawled_lock, progress)
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bank-crawler") as executor:
+                futures = [executor.submit(self._crawl_worker, frontier, crawled, crawled_lock, progress)
+                           for _ in range(workers)]
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+                    except Exception as e:
+                        logger.error("❌ Ошибка воркера обхода: %s", e)
+        progress.finish()
+        logger.info("🧭 Обход завершен: %s", frontier.summary())
 
-            # Парсим каждый специальный URL через Selenium
+        # Сохраняем результаты в исходном порядке банков
+        for bank_name, bank_info in self.banks.items():
+            # Страницы, которые больше не попадают в обход, удаляются из индекса
+            self.page_index.prune(bank_name, frontier.visited(bank_name))
+            # Порядок страниц в индексе - тот же, что в _assemble_bank_data, чтобы
+            # анализ из индекса получал тот же промпт, что и после обхода
+            self.page_index.set_page_order(
+                bank_name, [item.url for item, _, _ in sorted(crawled[bank_name], key=lambda page: page[0].sequence)]
+            )
+            self._store_bank_data(bank_name, self._assemble_bank_data(bank_name, bank_info, crawled[bank_name]))
+        return sum(len(pages) for pages in crawled.values())
+
+    def _build_frontier(self) -> CrawlFrontier:
+        """Очередь обхода со стартовыми страницами всех банков"""
+        robots = RobotsPolicy(politeness=self.host_politeness) if self.respect_robots else None
+        frontier = CrawlFrontier(max_depth=self.crawl_depth, max_pages_per_domain=self.max_pages_per_domain,
+                                 robots=robots)
+        for bank_name, bank_info in self.banks.items():
             for url in bank_info['specific_urls']:
-                print(f"   📍 Парсим: {url}")
-                try:
-                    # Используем Selenium для парсинга
-                    self.driver.get(url)
-                    time.sleep(3)  # Ждем загрузки страницы
+                frontier.add_seed(bank_name, url)
+        return frontier
 
-                    # Имитируем человеческое поведение
-                    self._simulate_human_behavior()
+    def _save_page_changes(self):
+        """Отчет об изменениях страниц с прошлого запуска и сохранение отпечатков"""
+        self._create_results_directory()
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        report_file = os.path.join(self.parsing_results_dir, f"page_changes_{timestamp}.json")
+        self.page_changes_report = self.page_tracker.save_report(report_file)
+        self.page_tracker.save()
+        logger.info("🔁 Изменения страниц (%s): %s", self.page_changes_report.summary(), report_file)
+
+    def index_is_fresh(self) -> bool:
+        """Есть ли в индексе результат обхода не старше index_max_age"""
+        last_crawled = self.page_index.last_crawled()
+        return last_crawled is not None and time.time() - last_crawled < self.index_max_age
+
+    def load_bank_data_from_index(self):
+        """
+        Данные банков из локального индекса страниц вместо обхода сайтов
+
+        Страницы передаются в анализ все и в порядке обхода - как после
+        fetch_all_banks_data; фрагменты под услугу выбирает select_relevant_text.
+        Поэтому промпт (а с ним ключ кеша LLM и отпечаток для инкрементального
+        режима) не зависит от того, взяты данные из индекса или с сайтов.
+        """
+        logger.info("📚 Загружаем данные банков из локального индекса страниц...")
+        self.all_bank_data = {}
+        for bank_name, bank_info in self.banks.items():
+            pages = self.page_index.bank_pages(bank_name)
+            if not pages:
+                logger.warning("❌ В индексе нет страниц %s", bank_name)
+                continue
 
-                    # Получаем содержимое страницы
-                    page_content = self.driver.page_source
-                    page_data = self._process_page_content(page_content, bank_name, url)
+            product_links = [link for page in pages for link in page['product_links']]
+            self._store_product_links(bank_name, product_links)
+            content = "".join(" " + page['content'] for page in pages)
+            self.all_bank_data[bank_name] = {
+                'bank': bank_name,
+                'url': bank_info['url'],
+                'content': content,
+                'title': f'{bank_name.capitalize()} - Multiple Pages',
+                'description': f'Данные {bank_name} из локального индекса страниц',
+                'timestamp': pd.Timestamp.fromtimestamp(max(page['indexed_at'] for page in pages)),
+                'content_length': len(content),
+                'product_links': product_links,
+                'pages': [{'url': page['url'], 'content': page['content']} for page in pages]
+            }
 
+    def _store_bank_data(self, bank_name: str, bank_data: Optional[Dict[str, Any]]):
+        """Сохранение результата парсинга банка"""
+        if bank_data:
+            self.all_bank_data[bank_name] = bank_data
+            logger.info("✅ Данные %s получены", bank_name)
+        else:
+            logger.warning("❌ Не удалось получить данные для %s", bank_name)
+            for url in self.banks[bank_name]['specific_urls']:
+                self._touch_page(bank_name, url)
+
+    def _crawl_worker(self, frontier: CrawlFrontier, crawled: Dict[str, list], crawled_lock: threading.Lock,
+                      progress: Optional[ProgressReporter] = None):
+        """Воркер обхода: берет страницы из общей очереди, пока она не опустеет; браузер - только при необходимости"""
+        # Прогретый драйвер берется из пула только при первой эскалации до браузера
+        borrowed = {}
+
+        def render(url: str) -> str:
+            if 'driver' not in borrowed:
+                try:
+                    borrowed['driver'] = self.driver_pool.checkout()
+                except DriverUnavailableError:
+                    borrowed['driver'] = None
+                    raise
+            if borrowed['driver'] is None:
+                raise DriverUnavailableError("Драйвер недоступен")
+            return self._render_page(borrowed['driver'], url)
+
+        target_type = service_product_type(self.target_service) if self.target_service else None
+        try:
+            while True:
+                item = frontier.next()
+                if item is None:
+                    break
+                try:
+                    page_data, status = self._crawl_page(item, render)
                     if page_data:
-                        all_content += " " + page_data['content']
-                        all_product_links.extend(page_data.get('product_links', []))
-                        time.sleep(2)  # Задержка между запросами
-
-                except Exception as e:
-                    print(f"   ⚠️ Ошибка при парсинге {url}: {e}")
-                    continue
-
-            # Если не удалось получить данные через Selenium, пробуем requests
-            if not all_content:
-                print("   🔄 Пробуем requests как fallback...")
-                for url in bank_info['specific_urls']:
-                    try:
-                        headers = {
-                            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                            'Accept-Language': 'ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7'
-                        }
-                        response = requests.get(url, headers=headers, timeout=15, verify=False)
-                        if response.status_code == 200:
-                            page_data = self._process_page_content(response.text, bank_name, url)
-                            if page_data:
-                                all_content += " " + page_data['content']
-                                all_product_links.extend(page_data.get('product_links', []))
-                                time.sleep(1)
-                    except Exception as e:
-                        print(f"   ⚠️ Ошибка при fallback парсинге {url}: {e}")
-                        continue
-
-            if all_content:
-                return {
-                    'bank': bank_name,
-                    'url': bank_info['url'],
-                    'content': all_content[:10000],  # Ограничиваем длину
-                    'title': f'{bank_name.capitalize()} - Multiple Pages',
-                    'description': f'Данные собраны с нескольких страниц {bank_name}',
-                    'timestamp': pd.Timestamp.now(),
-                    'content_length': len(all_content),
-                    'product_links': all_product_links
-                }
-
-            return None
+                        with crawled_lock:
+                            crawled[item.bank].append((item, page_data, status))
+                        for link in page_data.get('product_links', []):
+                            frontier.add(item.bank, link['url'], item.depth + 1,
+                                         link_priority(link['type'], item.depth + 1, target_type))
+                finally:
+                    frontier.done(item)
+                    if progress is not None:
+                        progress.advance()
+        finally:
+            if borrowed.get('driver') is not None:
+                self.driver_pool.checkin(borrowed['driver'])
+
+    def _render_page(self, driver, url: str) -> str:
+        """Рендеринг страницы в браузере"""
+        driver.get(url)
+        self.page_waiter.wait_until_ready(driver, url)  # Ждем готовности страницы
+
+        # Имитируем человеческое поведение
+        self._simulate_human_behavior(driver)
+
+        return driver.page_source
+
+    def _crawl_page(self, item: FrontierItem, render) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Загрузка и индексация одной страницы самым дешевым достаточным способом
+
+        Returns:
+            (данные страницы или None, статус изменения страницы в инкрементальном режиме)
+        """
+        bank_name, url = item.bank, item.url
+        logger.debug("   📍 Парсим %s: %s (глубина %d)", bank_name, url, item.depth,
+                     extra={'url': url, 'bank': bank_name, 'depth': item.depth})
+        started = time.perf_counter()
+        try:
+            fetch_result = self.tiered_fetcher.fetch(url, render)
+            latency_ms = round((time.perf_counter() - started) * 1000, 1)
+
+            if not fetch_result:
+                logger.debug("   ⚠️ Страница %s не получена", url,
+                             extra={'url': url, 'bank': bank_name, 'status': 'empty', 'latency_ms': latency_ms})
+                self._touch_page(bank_name, url)
+                return None, None
+
+            page_data = self._process_page_content(fetch_result.html, bank_name, url)
+            if not page_data:
+                return None, None
+
+            self.page_index.index_page(bank_name, url, page_data['title'], page_data['content'],
+                                       page_data.get('product_links'))
+            status = None
+            if self.page_tracker is not None:
+                status = self.page_tracker.check(f"{bank_name}|{url}", page_data['content'],
+                                                 {"bank": bank_name, "url": url})
+            logger.debug("   ✓ %s: %d символов", url, len(page_data['content']),
+                         extra={'url': url, 'bank': bank_name, 'status': status or 'ok', 'latency_ms': latency_ms})
+            return page_data, status
 
         except Exception as e:
-            print(f"❌ Ошибка при парсинге {bank_name}: {e}")
+            logger.warning("   ⚠️ Ошибка при парсинге %s: %s", url, e,
+                           extra={'url': url, 'bank': bank_name, 'status': 'error',
+                                  'latency_ms': round((time.perf_counter() - started) * 1000, 1)})
+            self._touch_page(bank_name, url)
+            return None, None
+
+    def _assemble_bank_data(self, bank_name: str, bank_info: Dict,
+                            crawled_pages: List[Tuple[FrontierItem, Dict[str, Any], Optional[str]]]
+                            ) -> Optional[Dict[str, Any]]:
+        """Данные банка из обойденных страниц (в порядке постановки страниц в очередь)"""
+        all_content = ""
+        all_product_links = []
+        pages = []  # Тексты отдельных страниц для отбора релевантных фрагментов
+        page_statuses = {}  # URL -> added/changed/unchanged (в инкрементальном режиме)
+
+        for item, page_data, status in sorted(crawled_pages, key=lambda crawled_page: crawled_page[0].sequence):
+            all_content += " " + page_data['content']
+            all_product_links.extend(page_data.get('product_links', []))
+            pages.append({'url': item.url, 'content': page_data['content']})
+            if status is not None:
+                page_statuses[item.url] = status
+            # Сырые данные - последней страницы банка, как при последовательном обходе
+            self.raw_data_storage[bank_name] = page_data['raw_data']
+
+        if not all_content:
             return None
 
-    def _simulate_human_behavior(self):
+        all_product_links = dedupe_links(all_product_links)
+        self._store_product_links(bank_name, all_product_links)
+        return {
+            'bank': bank_name,
+            'url': bank_info['url'],
+            'content': all_content,
+            'title': f'{bank_name.capitalize()} - Multiple Pages',
+            'description': f'Данные собраны с {len(pages)} страниц {bank_name}',
+            'timestamp': pd.Timestamp.now(),
+            'content_length': len(all_content),
+            'product_links': all_product_links,
+            'pages': pages,
+            'page_statuses': page_statuses
+        }
+
+    def _touch_page(self, bank_name: str, url: str):
+        """Страница не получена - ее прошлый отпечаток сохраняется и она не считается удаленной"""
+        if self.page_tracker is not None:
+            self.page_tracker.touch(f"{bank_name}|{url}")
+
+    def _simulate_human_behavior(self, driver):
         """Имитация человеческого поведения на странице - безопасная версия"""
         try:
             # Случайная прокрутка - самый безопасный метод
@@ -424,34 +686,39 @@ class BankBenchmarkAgent:
 
             for x, y in scroll_actions:
                 try:
-                    self.driver.execute_script(f"window.scrollBy({x}, {y});")
-                    time.sleep(random.uniform(0.3, 0.7))
+                    driver.execute_script(f"window.scrollBy({x}, {y});")
+                    # Ждем подгрузки контента после прокрутки, но не дольше прежней паузы
+                    self.page_waiter.wait_for_dom_settle(driver, timeout=0.7)
                 except:
                     pass
 
             # Клик по случайному элементу (если есть)
             try:
-                clickable_elements = self.driver.find_elements(
+                clickable_elements = driver.find_elements(
                     By.CSS_SELECTOR,
                     "a, button, [onclick], [role='button']"
                 )
                 if clickable_elements:
                     random_element = random.choice(clickable_elements[:5])  # Берем из первых 5
-                    self.driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth'});", random_element)
-                    time.sleep(0.5)
+                    driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth'});", random_element)
             except:
                 pass
 
         except Exception as e:
-            print(f"⚠️  Ошибка при имитации поведения: {e}")
+            logger.debug("⚠️  Ошибка при имитации поведения: %s", e)
             # Игнорируем ошибки имитации, чтобы не прерывать основной процесс
 
     def _process_page_content(self, page_content: str, bank_name: str, url: str) -> Dict[str, Any]:
-        """Обработка содержимого страницы"""
+        """
+        Обработка содержимого страницы
+
+        Вызывается из воркеров обхода, поэтому только возвращает данные страницы
+        (вместе с сырыми данными в 'raw_data'); данные банка собирает _assemble_bank_data.
+        """
         from bs4 import BeautifulSoup
         soup = BeautifulSoup(page_content, 'html.parser')
 
-        self.raw_data_storage[bank_name] = {
+        raw_data = {
             'url': url,
             'page_source': page_content[:5000] + "..." if len(page_content) > 5000 else page_content,
             'title': str(soup.find('title')),
@@ -459,7 +726,6 @@ class BankBenchmarkAgent:
         }
 
         product_links = self._find_product_links(soup, url, bank_name)
-        self.product_links_storage[bank_name] = product_links
 
         # Улучшенная очистка контента
         for element in soup(["script", "style", "nav", "footer", "header", "iframe", "noscript", "form", "button"]):
@@ -470,32 +736,23 @@ class BankBenchmarkAgent:
         title_text = title.get_text().strip() if title else ""
 
         # Получаем основной контент - ищем основные текстовые блоки
-        main_content = ""
+        text_blocks = []
 
         # Пробуем найти основные текстовые блоки
-        content_selectors = [
-            'main', 'article', 'section', '.content', '.main-content',
-            '.text-block', '.product-description', '.bank-product',
-            '.product-info', '.offer', '.tariff', '.condition'
-        ]
-
-        for selector in content_selectors:
+        for selector in CONTENT_SELECTORS:
             elements = soup.select(selector)
             for element in elements:
                 text = element.get_text(separator=' ', strip=True)
                 if len(text) > 100:  # Только значимые блоки
-                    main_content += " " + text
+                    text_blocks.append(text)
+        main_content = " ".join(text_blocks)
 
         # Если не нашли структурированный контент, берем весь текст
         if not main_content:
-            text = soup.get_text(separator=' ', strip=True)
-            # Убираем лишние пробелы и переносы
-            text = re.sub(r'\s+', ' ', text)
-            main_content = text
+            main_content = soup.get_text(separator=' ', strip=True)
 
-        # Объединяем с заголовком и ограничиваем длину
-        full_content = f"{title_text} {main_content}"
-        full_content = re.sub(r'\s+', ' ', full_content).strip()[:8000]
+        # Объединяем с заголовком, убираем лишние пробелы и переносы, ограничиваем длину
+        full_content = collapse_whitespace(f"{title_text} {main_content}")[:PAGE_CONTENT_LIMIT]
 
         return {
             'bank': bank_name,
@@ -505,52 +762,18 @@ class BankBenchmarkAgent:
             'description': "",
             'timestamp': pd.Timestamp.now(),
             'content_length': len(full_content),
-            'product_links': product_links
+            'product_links': product_links,
+            'raw_data': raw_data
         }
 
     def _find_product_links(self, soup, base_url: str, bank_name: str) -> List[Dict]:
-        """Поиск ссылок на банковские продукты с улучшенной обработкой"""
+        """Поиск ссылок на банковские продукты (без повторов по нормализованному URL)"""
         product_links = []
-        product_keywords = {
-            'credit': ['кредит', 'займ', 'ссуд', 'credit', 'loan', 'рассрочк'],
-            'deposit': ['вклад', 'депозит', 'сбережен', 'deposit', 'savings', 'накопит'],
-            'card': ['карт', 'card', 'дебетов', 'кредитн', 'visa', 'mastercard', 'платежн'],
-            'mortgage': ['ипотек', 'mortgage', 'недвиж', 'жиль', 'квартир'],
-            'investment': ['инвест', 'вложен', 'акци', 'облигац', 'investment', 'фонд'],
-            'insurance': ['страхов', 'insurance', 'защит'],
-            'account': ['счет', 'account', 'расчетн', 'текущ']
-        }
 
         # Ищем все ссылки
         for link in soup.find_all('a', href=True):
-            href = link['href'].lower()
-            link_text = link.get_text(strip=True).lower()
-
-            # Пропускаем нерелевантные ссылки
-            if any(x in href for x in ['javascript:', '#', 'mailto:', 'tel:', 'void(0)']):
-                continue
-
-            # Пропускаем социальные сети и служебные ссылки
-            social_keywords = ['facebook', 'twitter', 'instagram', 'vk.com', 'youtube',
-                               'linkedin', 'telegram', 'whatsapp', 'viber']
-            if any(social in href for social in social_keywords):
-                continue
-
-            # Пропускаем ссылки на политики и соглашения
-            policy_keywords = ['policy', 'agreement', 'terms', 'condition', 'правил', 'соглашен']
-            if any(keyword in href or keyword in link_text for keyword in policy_keywords):
-                continue
-
-            # Определяем тип продукта
-            product_type = None
-            for p_type, keywords in product_keywords.items():
-                if any(keyword in href or keyword in link_text for keyword in keywords):
-                    product_type = p_type
-                    break
-
-            # Если тип не определен, но ссылка выглядит как продуктовая
-            if not product_type and self._looks_like_product_link(href, link_text):
-                product_type = 'other'
+            link_label = link.get_text(strip=True)
+            product_type = self.link_classifier.classify(link['href'].lower(), link_label.lower())
 
             if product_type:
                 try:
@@ -558,129 +781,71 @@ class BankBenchmarkAgent:
                     if urlparse(absolute_url).netloc:
                         product_links.append({
                             'url': absolute_url,
-                            'text': link.get_text(strip=True),
+                            'text': link_label,
                             'type': product_type
                         })
                 except:
                     continue
 
-        return product_links
+        return dedupe_links(product_links)
 
     def _looks_like_product_link(self, href: str, link_text: str) -> bool:
         """Проверяет, похожа ли ссылка на продуктовую"""
-        # Исключаем служебные пути
-        exclude_paths = ['/about', '/contact', '/news', '/press', '/career', '/job',
-                         '/support', '/help', '/login', '/register', '/signin', '/signup']
-
-        if any(path in href for path in exclude_paths):
-            return False
+        return self.link_classifier.looks_like_product_link(href, link_text)
 
-        # Исключаем короткий или бессмысленный текст
-        if len(link_text) < 3 or link_text in ['читать далее', 'подробнее', 'узнать больше']:
-            return False
-
-        # Включаем пути, которые выглядят как продукты
-        product_paths = ['/credit', '/deposit', '/card', '/mortgage', '/investment',
-                         '/insurance', '/account', '/product', '/service', '/offer',
-                         '/tariff', '/condition', '/apply', '/order', '/request']
-
-        return any(path in href for path in product_paths)
+    def _store_product_links(self, bank_name: str, product_links: List[Dict]):
+        """Сохраняет ссылки банка; индекс для поиска точных ссылок перестраивается при следующем запросе"""
+        self.product_links_storage[bank_name] = product_links
+        self.product_link_indexes.pop(bank_name, None)
 
     def _find_exact_product_url(self, bank_name: str, service_type: str, product_details: str) -> str:
         """Улучшенный поиск точной ссылки на продукт"""
         if bank_name not in self.product_links_storage:
             return ""
 
-        product_links = self.product_links_storage[bank_name]
-        service_type_lower = service_type.lower()
-        product_details_lower = product_details.lower()
-
-        # Расширенное сопоставление типов услуг
-        type_mapping = {
-            'ипотек': 'mortgage', 'ипотечн': 'mortgage', 'жиль': 'mortgage', 'недвиж': 'mortgage',
-            'кредит': 'credit', 'займ': 'credit', 'ссуд': 'credit', 'loan': 'credit',
-            'вклад': 'deposit', 'депозит': 'deposit', 'сбережен': 'deposit', 'накопит': 'deposit',
-            'карт': 'card', 'card': 'card', 'дебетов': 'card', 'visa': 'card', 'mastercard': 'card',
-            'инвест': 'investment', 'брокер': 'investment', 'акци': 'investment', 'облигац': 'investment',
-            'страхов': 'insurance', 'insurance': 'insurance', 'защит': 'insurance',
-            'счет': 'account', 'account': 'account', 'рко': 'account', 'расчетн': 'account'
-        }
-
-        target_type = None
-        for rus_type, eng_type in type_mapping.items():
-            if rus_type in service_type_lower:
-                target_type = eng_type
-                break
-
-        best_match = ""
-        best_score = 0
-
-        for link_info in product_links:
-            current_score = 0
-            link_text = link_info['text'].lower()
-            link_url = link_info['url'].lower()
-
-            # Совпадение по типу
-            if target_type and link_info['type'] == target_type:
-                current_score += 3
-
-            # Ключевые слова из названия услуги
-            service_keywords = service_type_lower.split()
-            for keyword in service_keywords:
-                if len(keyword) > 3 and (keyword in link_text or keyword in link_url):
-                    current_score += 2
-
-            # Ключевые слова из описания
-            description_keywords = product_details_lower.split()[:8]
-            for keyword in description_keywords:
-                if len(keyword) > 3 and (keyword in link_text or keyword in link_url):
-                    current_score += 1
-
-            # Дополнительные критерии
-            if 'оформить' in link_text or 'подробнее' in link_text or 'условия' in link_text:
-                current_score += 1
-            if 'оформить' in link_url or 'заявк' in link_url:
-                current_score += 2
-
-            if current_score > best_score:
-                best_score = current_score
-                best_match = link_info['url']
+        link_index = self.product_link_indexes.get(bank_name)
+        if link_index is None:
+            link_index = ProductLinkIndex(self.product_links_storage[bank_name], self.link_scoring)
+            self.product_link_indexes[bank_name] = link_index
 
-        return best_match if best_score >= 3 else ""  # Повышаем порог
+        return link_index.best_url(service_type, product_details)
 
     def show_parsed_data(self):
         """Показать полученные данные после парсинга"""
-        print("\n" + "=" * 80)
-        print("📊 ПРОСМОТР ПОЛУЧЕННЫХ ДАННЫХ")
-        print("=" * 80)
+        logger.info("=" * 80)
+        logger.info("📊 ПРОСМОТР ПОЛУЧЕННЫХ ДАННЫХ")
+        logger.info("=" * 80)
         if not self.all_bank_data:
-            print("❌ Данные еще не собраны!")
+            logger.warning("❌ Данные еще не собраны!")
             return
 
         for bank_name, data in self.all_bank_data.items():
-            print(f"\n🏦 {bank_name.upper()}:")
-            print(f"   URL: {data['url']}")
-            print(f"   Заголовок: {data['title']}")
-            print(f"   Длина контента: {data['content_length']} символов")
-            print(f"   Найдено ссылок на продукты: {len(data.get('product_links', []))}")
+            logger.info("🏦 %s: %s, заголовок: %s, контент %d символов, ссылок на продукты %d",
+                        bank_name.upper(), data['url'], data['title'], data['content_length'],
+                        len(data.get('product_links', [])), extra={'url': data['url'], 'bank': bank_name})
 
-            # Показываем первые 5 ссылок для примера
+            # Первые 5 ссылок для примера
             for i, link in enumerate(data.get('product_links', [])[:5], 1):
-                print(f"   {i}. [{link['type']}] {link['text']} -> {link['url']}")
+                logger.debug("   %d. [%s] %s -> %s", i, link['type'], link['text'], link['url'],
+                             extra={'url': link['url'], 'bank': bank_name})
 
-    def analyze_bank_service_with_llm(self, bank_name: str, bank_data: Dict, target_service: str) -> List[
-        BenchmarkResult]:
-        """Анализ конкретного банка с помощью LLM для целевой услуги"""
-        if not self.llm:
-            print(f"❌ GigaChat не инициализирован для банка {bank_name}")
-            return []
+    def _llm_model_params(self) -> Tuple[str, Optional[float]]:
+        """Модель и температура LLM (часть ключа кеша и отпечатка анализа)"""
+        return getattr(self.llm, 'model', None) or "GigaChat", getattr(self.llm, 'temperature', None)
 
-        try:
-            # Очищаем текст от специальных символов
-            clean_content = re.sub(r'[<>{}[\]\\]', '', bank_data['content'])
+    def _build_llm_prompt(self, bank_name: str, bank_data: Dict, target_service: str) -> Tuple[str, str]:
+        """Системное сообщение и промпт запроса к LLM по услуге банка"""
+        # Вместо усечения текста берем самые релевантные услуге фрагменты страниц в пределах бюджета
+        pages = bank_data.get('pages') or [{'url': bank_data['url'], 'content': bank_data['content']}]
+        relevant_content = select_relevant_text(
+            [(page['url'], page['content']) for page in pages], target_service, self.llm_context_tokens
+        )
+
+        # Очищаем текст от специальных символов
+        clean_content = re.sub(r'[<>{}[\]\\]', '', relevant_content)
 
-            # Создаем промпт для конкретной услуги
-            prompt_text = f"""Проанализируй предоставленный текст банка {bank_name} и найди информацию о предложениях по услуге: {target_service}.
+        # Создаем промпт для конкретной услуги
+        prompt_text = f"""Проанализируй предоставленный текст банка {bank_name} и найди информацию о предложениях по услуге: {target_service}.
 
             Текст содержит описания различных предложений банка. Найди упоминания услуги "{target_service}", ее условий, характеристик и тарифов.
 
@@ -692,100 +857,282 @@ class BankBenchmarkAgent:
 
             Если услуга "{target_service}" не найдена, верни пустой список.
 
-            Текст для анализа:{clean_content[:15000]}"""
+            Текст для анализа:{clean_content}"""
+
+        system_message = ("Ты анализируешь текстовые данные банков и извлекаешь структурированную "
+                          "информацию о конкретных услугах.")
+        return system_message, prompt_text
+
+    def _analysis_fingerprint_text(self, bank_name: str, bank_data: Dict, target_service: str) -> str:
+        """
+        Текст для отпечатка анализа: весь запрос к LLM (модель, температура, системное сообщение, промпт)
+
+        Прошлый ответ переиспользуется, только если запрос совпадает полностью - с учетом
+        изменений промпта, отбора фрагментов, бюджета токенов и параметров модели.
+        """
+        model_name, temperature = self._llm_model_params()
+        system_message, prompt_text = self._build_llm_prompt(bank_name, bank_data, target_service)
+        return f"{model_name}|{temperature}\n{system_message}\n{prompt_text}"
+
+    def analyze_bank_service_with_llm(self, bank_name: str, bank_data: Dict, target_service: str) -> List[
+        BenchmarkResult]:
+        """Анализ конкретного банка с помощью LLM для целевой услуги"""
+        if not self.llm:
+            logger.error("❌ GigaChat не инициализирован для банка %s", bank_name)
+            return []
 
+        try:
+            system_message, prompt_text = self._build_llm_prompt(bank_name, bank_data, target_service)
             messages = [
-                SystemMessage(
-                    content="Ты анализируешь текстовые данные банков и извлекаешь структурированную информацию о конкретных услугах."),
+                SystemMessage(content=system_message),
                 HumanMessage(content=prompt_text)
             ]
 
-            print(f"📤 Отправляем запрос к GigaChat для банка {bank_name}...")
-            response = self.llm.invoke(messages, timeout=60)
+            # Тот же промпт к той же модели с теми же параметрами - ответ берется из кеша.
+            # В кеше только текст модели: точные ссылки ищутся заново по текущим ссылкам банка
+            model_name, temperature = self._llm_model_params()
+            cache_key = None
+            if self.llm_cache is not None:
+                cache_key = llm_cache_key(model_name, temperature, system_message, prompt_text)
+                cached = self.llm_cache.get(cache_key)
+                if cached is not None:
+                    results = self._parse_llm_response(bank_name, bank_data, cached.raw_text)
+                    if results is not None:
+                        logger.debug("💾 Ответ GigaChat для банка %s взят из кеша", bank_name)
+                        return results
+
+            logger.debug("📤 Отправляем запрос к GigaChat для банка %s...", bank_name)
+            started = time.perf_counter()
+            response = self._invoke_llm(messages, bank_name)
+            logger.debug("📥 Ответ GigaChat для банка %s", bank_name,
+                         extra={'bank': bank_name, 'latency_ms': round((time.perf_counter() - started) * 1000, 1)})
             result_text = response.content
 
             # Проверяем на блокировку
             if "blacklist" in result_text.lower() or "Giga generation stopped" in result_text:
-                print(f"⚠️  Обнаружена блокировка запроса для банка {bank_name}")
+                logger.warning("⚠️  Обнаружена блокировка запроса для банка %s", bank_name)
                 return []
 
-            # Обработка JSON ответа
-            try:
-                # Очищаем ответ
-                clean_text = result_text.strip()
-                clean_text = re.sub(r'^```json|```$', '', clean_text, flags=re.IGNORECASE)
-                clean_text = clean_text.strip()
-
-                # Парсим JSON
-                data = json.loads(clean_text)
-
-                # Обрабатываем разные форматы ответа
-                if isinstance(data, dict):
-                    services = data.get('services', [])
-                elif isinstance(data, list):
-                    services = data
-                else:
-                    print(f"❌ Неожиданный формат ответа для банка {bank_name}: {type(data)}")
-                    services = []
-
-                results = []
-                for item in services:
-                    if isinstance(item, dict):
-                        # Формируем общие данные об услуге
-                        service_details = item.get('service_details', '')
-                        product_description = item.get('product_description', '')
-
-                        # Объединяем всю информацию в одно поле
-                        full_service_info = f"{service_details}"
-                        if product_description:
-                            full_service_info += f" {product_description}"
-
-                        results.append(BenchmarkResult(
-                            bank=bank_name,
-                            service=item.get('service', ''),
-                            service_details=full_service_info.strip(),
-                            source_url=bank_data['url'],
-                            exact_url=self._find_exact_product_url(bank_name, item.get('service', ''),
-                                                                   full_service_info),
-                            confidence=0.9,
-                            is_best_practice=False,
-                            comparison_with_sber=""
-                        ))
-
-                print(f"✅ Для банка {bank_name} извлечено {len(results)} записей")
-                return results
-
-            except json.JSONDecodeError as e:
-                print(f"❌ Ошибка парсинга JSON для банка {bank_name}: {e}")
-                print(f"Ответ: {result_text[:500]}...")
+            results = self._parse_llm_response(bank_name, bank_data, result_text)
+            if results is None:
                 return []
 
+            logger.debug("✅ Для банка %s извлечено %d записей", bank_name, len(results))
+            if cache_key is not None:
+                self.llm_cache.put(cache_key, model_name, temperature, prompt_text, result_text)
+            return results
+
         except Exception as e:
-            print(f"❌ Ошибка анализа для банка {bank_name}: {e}")
+            logger.error("❌ Ошибка анализа для банка %s: %s", bank_name, e)
             return []
 
-    def analyze_all_banks_service(self, target_service: str) -> List[BenchmarkResult]:
-        """Анализ целевой услуги для всех банков с отдельными запросами к LLM"""
-        all_benchmarks = []
-
-        print(f"🔍 Анализируем услугу '{target_service}' для всех банков...")
-
-        for bank_name, bank_data in self.all_bank_data.items():
-            print(f"\n🏦 Анализируем банк: {bank_name}")
-
-            # Для каждого банка делаем отдельный запрос к LLM
-            bank_benchmarks = self.analyze_bank_service_with_llm(bank_name, bank_data, target_service)
+    def _parse_llm_response(self, bank_name: str, bank_data: Dict, result_text: str
+                            ) -> Optional[List[BenchmarkResult]]:
+        """Предложения из JSON-ответа модели с точными ссылками; None, если ответ не JSON"""
+        try:
+            # Очищаем ответ
+            clean_text = result_text.strip()
+            clean_text = re.sub(r'^```json|```$', '', clean_text, flags=re.IGNORECASE)
+            clean_text = clean_text.strip()
+
+            # Парсим JSON
+            data = json.loads(clean_text)
+        except json.JSONDecodeError as e:
+            logger.warning("❌ Ошибка парсинга JSON для банка %s: %s, ответ: %s...", bank_name, e, result_text[:500])
+            return None
 
-            if bank_benchmarks:
-                all_benchmarks.extend(bank_benchmarks)
-                print(f"✅ Для банка {bank_name} найдено {len(bank_benchmarks)} предложений")
-            else:
-                print(f"⚠️  Для банка {bank_name} не найдено предложений по услуге '{target_service}'")
+        # Обрабатываем разные форматы ответа
+        if isinstance(data, dict):
+            services = data.get('services', [])
+        elif isinstance(data, list):
+            services = data
+        else:
+            logger.warning("❌ Неожиданный формат ответа для банка %s: %s", bank_name, type(data))
+            services = []
+
+        results = []
+        for item in services:
+            if isinstance(item, dict):
+                # Формируем общие данные об услуге
+                service_details = item.get('service_details', '')
+                product_description = item.get('product_description', '')
+
+                # Объединяем всю информацию в одно поле
+                full_service_info = f"{service_details}"
+                if product_description:
+                    full_service_info += f" {product_description}"
+
+                results.append(BenchmarkResult(
+                    bank=bank_name,
+                    service=item.get('service', ''),
+                    service_details=full_service_info.strip(),
+                    source_url=bank_data['url'],
+                    exact_url=self._find_exact_product_url(bank_name, item.get('service', ''),
+                                                           full_service_info),
+                    confidence=0.9,
+                    is_best_practice=False,
+                    comparison_with_sber=""
+                ))
+        return results
+
+    def _invoke_llm(self, messages: List[Any], bank_name: str):
+        """Запрос к GigaChat с ограничением частоты и повторами при временных ошибках"""
+        # Грубая оценка числа токенов промпта для лимита токенов в минуту
+        prompt_tokens = sum(estimate_tokens(message.content) for message in messages)
+
+        for attempt in range(self.llm_max_retries + 1):
+            if self.llm_request_limiter is not None:
+                self.llm_request_limiter.acquire()
+            if self.llm_token_limiter is not None:
+                self.llm_token_limiter.acquire(prompt_tokens)
+            try:
+                return self.llm.invoke(messages, timeout=60)
+            except Exception as e:
+                if attempt >= self.llm_max_retries or not _is_transient_llm_error(e):
+                    raise
+                delay = backoff_delay(attempt, base=2.0)
+                logger.warning("⚠️  Временная ошибка GigaChat для банка %s (%s), повтор %d/%d через %.1f с",
+                               bank_name, e, attempt + 1, self.llm_max_retries, delay)
+                time.sleep(delay)
 
-            # Задержка между запросами к разным банкам
-            time.sleep(2)
+    def analyze_all_banks_service(self, target_service: str) -> List[BenchmarkResult]:
+        """Анализ целевой услуги для всех банков: отдельные запросы к LLM выполняются параллельно"""
+        return self.analyze_services([target_service])[target_service]
+
+    def analyze_services(self, services: List[str]) -> Dict[str, List[BenchmarkResult]]:
+        """
+        Анализ нескольких услуг по всем собранным банкам
+
+        Запросы по всем парам (банк, услуга) проходят через общий пул и общие
+        ограничители частоты, поэтому несколько услуг анализируются за время,
+        определяемое лимитами LLM, а не числом услуг.
+
+        Returns:
+            Услуга -> найденные предложения (в исходном порядке банков)
+        """
+        analysis_tracker = None
+        offer_changes = {service: {"added": [], "changed": [], "removed": []} for service in services}
+        if self.incremental:
+            analysis_tracker = ChangeTracker(os.path.join(self.parsing_results_dir, "analysis_fingerprints.json"))
+
+        results: Dict[Tuple[str, str], List[BenchmarkResult]] = {}
+        pending = []  # Пары (банк, услуга), которым нужен запрос к LLM
+        for target_service in services:
+            logger.info("🔍 Анализируем услугу '%s' для всех банков...", target_service)
+            for bank_name, bank_data in self.all_bank_data.items():
+                analysis_key = f"{bank_name}|{target_service}"
+                cached = None
+                if analysis_tracker is not None:
+                    analysis_tracker.check(analysis_key, self._analysis_fingerprint_text(bank_name, bank_data,
+                                                                                         target_service),
+                                           {"bank": bank_name, "service": target_service})
+                    cached = analysis_tracker.get_payload(analysis_key)
+
+                if cached is not None:
+                    # Запрос к LLM не изменился - ответ прошлого запуска остается в силе;
+                    # точные ссылки ищутся по текущим ссылкам банка
+                    results[(bank_name, target_service)] = [
+                        replace(BenchmarkResult(**item), exact_url=self._find_exact_product_url(
+                            bank_name, item['service'], item['service_details']))
+                        for item in cached
+                    ]
+                    logger.debug("♻️  Запрос по %s не изменился, используем прошлый анализ '%s'", bank_name, target_service)
+                else:
+                    pending.append((bank_name, target_service))
+
+        results.update(self._analyze_pairs_concurrently(pending))
+
+        benchmarks_by_service = {}
+        for target_service in services:
+            all_benchmarks = []
+            # Результаты собираются в исходном порядке банков
+            for bank_name in self.all_bank_data:
+                bank_benchmarks = results.get((bank_name, target_service), [])
+
+                # Пустой результат не сохраняем и не сравниваем: он может быть следствием ошибки запроса
+                if analysis_tracker is not None and (bank_name, target_service) in pending and bank_benchmarks:
+                    analysis_key = f"{bank_name}|{target_service}"
+                    self._diff_offers(analysis_tracker.previous_payload(analysis_key) or [],
+                                      bank_benchmarks, offer_changes[target_service])
+                    analysis_tracker.set_payload(analysis_key, [asdict(b) for b in bank_benchmarks])
+
+                if bank_benchmarks:
+                    all_benchmarks.extend(bank_benchmarks)
+                    logger.info("✅ Для банка %s найдено %d предложений по услуге '%s'", bank_name, len(bank_benchmarks),
+                                target_service)
+                else:
+                    logger.warning("⚠️  Для банка %s не найдено предложений по услуге '%s'", bank_name, target_service)
+            benchmarks_by_service[target_service] = all_benchmarks
+
+        if analysis_tracker is not None:
+            # Анализ других услуг и несобранных банков остается в состоянии
+            analysis_tracker.save(keep_removed=True)
+            for target_service in services:
+                self._save_offer_changes(target_service, offer_changes[target_service])
+
+        return benchmarks_by_service
+
+    def _analyze_pairs_concurrently(self, pairs: List[Tuple[str, str]]) -> Dict[Tuple[str, str], List[BenchmarkResult]]:
+        """Запросы к LLM по парам (банк, услуга) в пуле потоков (не более llm_concurrency одновременно)"""
+        if not pairs:
+            return {}
+
+        workers = min(max(self.llm_concurrency, 1), len(pairs))
+        if workers == 1:
+            return {
+                (bank_name, service): self.analyze_bank_service_with_llm(bank_name, self.all_bank_data[bank_name], service)
+                for bank_name, service in pairs
+            }
 
-        return all_benchmarks
+        logger.info("🤖 Параллельный анализ %d запросов (%d одновременно)...", len(pairs), workers)
+        progress = ProgressReporter("Запросы к GigaChat", total=len(pairs), logger=logger)
+        results = {}
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm-analysis") as executor:
+            futures = {
+                executor.submit(self.analyze_bank_service_with_llm, bank_name,
+                                self.all_bank_data[bank_name], service): (bank_name, service)
+                for bank_name, service in pairs
+            }
+            for future in as_completed(futures):
+                pair = futures[future]
+                try:
+                    results[pair] = future.result()
+                    progress.advance()
+                except Exception as e:
+                    logger.error("❌ Ошибка анализа для банка %s (%s): %s", pair[0], pair[1], e)
+                    results[pair] = []
+                    progress.advance(error=True)
+        progress.finish()
+        return results
+
+    @staticmethod
+    def _diff_offers(previous: List[Dict[str, Any]], current: List[BenchmarkResult],
+                     changes: Dict[str, List[Dict[str, Any]]]):
+        """Сравнение предложений банка с прошлым анализом по названию услуги"""
+        previous_by_service = {item['service'].strip().lower(): item for item in previous}
+        current_by_service = {b.service.strip().lower(): asdict(b) for b in current}
+
+        for service, item in current_by_service.items():
+            old = previous_by_service.get(service)
+            if old is None:
+                changes["added"].append(item)
+            elif content_fingerprint(old['service_details']) != content_fingerprint(item['service_details']):
+                changes["changed"].append({**item, "previous_service_details": old['service_details']})
+        for service, item in previous_by_service.items():
+            if service not in current_by_service:
+                changes["removed"].append(item)
+
+    def _save_offer_changes(self, service_name: str, changes: Dict[str, List[Dict[str, Any]]]):
+        """Сохранение отчета о новых, изменившихся и исчезнувших предложениях"""
+        self._create_results_directory()
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        report_file = os.path.join(self.parsing_results_dir,
+                                   f"offer_changes_{service_name.replace(' ', '_')}_{timestamp}.json")
+        with open(report_file, 'w', encoding='utf-8') as f:
+            json.dump({"service": service_name, "generated_at": datetime.now().isoformat(), **changes},
+                      f, ensure_ascii=False, indent=2)
+        logger.info("🔁 Изменения предложений: новых %d, изменено %d, удалено %d: %s",
+                    len(changes['added']), len(changes['changed']), len(changes['removed']), report_file)
 
     def compare_benchmarks(self, benchmarks: List[BenchmarkResult]) -> pd.DataFrame:
         """Сравнение бенчмарков между банками"""
@@ -828,75 +1175,188 @@ class BankBenchmarkAgent:
                 summary_df = pd.DataFrame(summary_data)
                 summary_df.to_excel(writer, sheet_name='Статистика', index=False)
 
-                # Получаем workbook и worksheet для форматирования
-                workbook = writer.book
-                worksheet_data = writer.sheets['Данные']
-                worksheet_stats = writer.sheets['Статистика']
-
-                # Форматирование для листа с данными
-                header_format = workbook.add_format({
-                    'bold': True,
-                    'text_wrap': True,
-                    'valign': 'top',
-                    'fg_color': '#D7E4BC',
-                    'border': 1
-                })
+                # Форматирование листов
+                self._format_data_sheet(writer.book, writer.sheets['Данные'], df)
+                self._format_stats_sheet(writer.sheets['Статистика'], summary_df)
 
-                # Применяем форматирование к заголовкам
-                for col_num, value in enumerate(df.columns.values):
-                    worksheet_data.write(0, col_num, value, header_format)
-
-                # Автоподбор ширины столбцов
-                for i, col in enumerate(df.columns):
-                    max_len = max(
-                        df[col].astype(str).map(len).max(),
-                        len(col)
-                    ) + 2
-                    worksheet_data.set_column(i, i, min(max_len, 50))
-
-                # Особенно широкий столбец для данных об услуге
-                worksheet_data.set_column(2, 2, 60)  # Столбец "Данные об услуге"
-
-                # Форматирование для листа статистики
-                for i, col in enumerate(summary_df.columns):
-                    max_len = max(
-                        summary_df[col].astype(str).map(len).max(),
-                        len(col)
-                    ) + 2
-                    worksheet_stats.set_column(i, i, min(max_len, 30))
-
-            print(f"✅ Excel отчет сохранен: {filename}")
+            logger.info("✅ Excel отчет сохранен: %s", filename)
             return filename
 
         except ImportError:
             # Если xlsxwriter тоже не доступен, используем CSV
-            print("⚠️  xlsxwriter не установлен, сохраняем в CSV")
+            logger.warning("⚠️  xlsxwriter не установлен, сохраняем в CSV")
             csv_filename = f"benchmark_report_{service_name.replace(' ', '_')}_{timestamp}.csv"
             df.to_csv(csv_filename, index=False, encoding='utf-8-sig')
             return csv_filename
 
         except Exception as e:
-            print(f"❌ Ошибка при создании Excel отчета: {e}")
+            logger.error("❌ Ошибка при создании Excel отчета: %s", e)
             # Fallback to CSV
             csv_filename = f"benchmark_report_{service_name.replace(' ', '_')}_{timestamp}.csv"
             df.to_csv(csv_filename, index=False, encoding='utf-8-sig')
             return csv_filename
 
-    def run_analysis(self, service_name: str) -> str:
-        """Основной метод запуска анализа"""
-        print(f"🚀 Запуск анализа услуги '{service_name}' для всех банков")
+    @staticmethod
+    def _format_data_sheet(workbook, worksheet, df: pd.DataFrame):
+        """Форматирование листа с данными бенчмарка"""
+        header_format = workbook.add_format({
+            'bold': True,
+            'text_wrap': True,
+            'valign': 'top',
+            'fg_color': '#D7E4BC',
+            'border': 1
+        })
+
+        # Применяем форматирование к заголовкам
+        for col_num, value in enumerate(df.columns.values):
+            worksheet.write(0, col_num, value, header_format)
+
+        # Автоподбор ширины столбцов
+        for i, col in enumerate(df.columns):
+            max_len = max(
+                df[col].astype(str).map(len).max(),
+                len(col)
+            ) + 2
+            worksheet.set_column(i, i, min(max_len, 50))
+
+        # Особенно широкий столбец для данных об услуге
+        worksheet.set_column(2, 2, 60)  # Столбец "Данные об услуге"
+
+    @staticmethod
+    def _format_stats_sheet(worksheet, summary_df: pd.DataFrame):
+        """Форматирование листа статистики"""
+        for i, col in enumerate(summary_df.columns):
+            max_len = max(
+                summary_df[col].astype(str).map(len).max(),
+                len(col)
+            ) + 2
+            worksheet.set_column(i, i, min(max_len, 30))
+
+    @staticmethod
+    def _excel_sheet_name(name: str, used: set) -> str:
+        """Допустимое и уникальное имя листа Excel (до 31 символа, без []:*?/\\)"""
+        base = re.sub(r'[\[\]:*?/\\]', ' ', name)[:31].strip() or "Услуга"
+        sheet_name = base
+        counter = 2
+        while sheet_name.lower() in used:
+            suffix = f" ({counter})"
+            sheet_name = base[:31 - len(suffix)] + suffix
+            counter += 1
+        used.add(sheet_name.lower())
+        return sheet_name
+
+    def generate_batch_excel_report(self, frames: Dict[str, pd.DataFrame]) -> str:
+        """Один Excel отчет по нескольким услугам: лист на услугу и общий лист статистики"""
+        frames = {service: df for service, df in frames.items() if not df.empty}
+        if not frames:
+            return ""
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"benchmark_report_batch_{timestamp}.xlsx"
+
+        try:
+            with pd.ExcelWriter(filename, engine='xlsxwriter') as writer:
+                used_names = {'статистика'}
+                for service_name, df in frames.items():
+                    sheet_name = self._excel_sheet_name(service_name, used_names)
+                    df.to_excel(writer, sheet_name=sheet_name, index=False)
+                    self._format_data_sheet(writer.book, writer.sheets[sheet_name], df)
+
+                summary_df = pd.DataFrame({
+                    'Услуга': list(frames),
+                    'Всего записей': [len(df) for df in frames.values()],
+                    'Уникальных банков': [df['Банк'].nunique() for df in frames.values()],
+                    'Дата анализа': datetime.now().strftime('%Y-%m-%d %H:%M')
+                })
+                summary_df.to_excel(writer, sheet_name='Статистика', index=False)
+                self._format_stats_sheet(writer.sheets['Статистика'], summary_df)
+
+            logger.info("✅ Excel отчет сохранен: %s", filename)
+            return filename
+
+        except Exception as e:
+            logger.error("❌ Ошибка при создании Excel отчета: %s", e)
+            # Fallback to CSV: все услуги в одном файле со столбцом "Запрос"
+            csv_filename = f"benchmark_report_batch_{timestamp}.csv"
+            combined = pd.concat([df.assign(Запрос=service_name) for service_name, df in frames.items()],
+                                 ignore_index=True)
+            combined.to_csv(csv_filename, index=False, encoding='utf-8-sig')
+            return csv_filename
+
+    def run_batch_analysis(self, services: List[str], refresh: Optional[bool] = None) -> str:
+        """
+        Анализ нескольких услуг за один обход сайтов
+
+        Args:
+            services: Услуги для анализа
+            refresh: Как в run_analysis - обход сайтов или локальный индекс страниц
+        """
+        services = list(dict.fromkeys(service.strip().lower() for service in services if service.strip()))
+        if not services:
+            logger.error("❌ Не задано ни одной услуги")
+            return ""
+
+        logger.info("🚀 Пакетный анализ услуг: %s", ', '.join(services))
+        # Явный запрос обновления обходит и кеш ответов, а не только индекс страниц
+        forced = refresh is True
+        if refresh is None:
+            refresh = not self.index_is_fresh()
+
+        if refresh:
+            self.fetch_all_banks_data(revalidate=forced)
+            self.save_parsing_data_to_txt("batch")
+        else:
+            # Отбор релевантных фрагментов выполняется отдельно для каждой услуги
+            self.load_bank_data_from_index()
+        self.show_parsed_data()
+
+        benchmarks_by_service = self.analyze_services(services)
+        frames = {service: self.compare_benchmarks(benchmarks)
+                  for service, benchmarks in benchmarks_by_service.items()}
+
+        report_file = self.generate_batch_excel_report(frames)
+        if not report_file:
+            logger.error("❌ Не удалось извлечь данные о продуктах")
+            return ""
+
+        logger.info("📊 Отчет сохранен в файл: %s", report_file)
+        logger.info("📈 Статистика анализа:")
+        for service, df in frames.items():
+            banks = df['Банк'].nunique() if not df.empty else 0
+            logger.info("   %s: записей %d, банков %d", service, len(df), banks)
+        return report_file
+
+    def run_analysis(self, service_name: str, refresh: Optional[bool] = None) -> str:
+        """
+        Основной метод запуска анализа
+
+        Args:
+            service_name: Услуга для анализа
+            refresh: Обойти сайты заново (True) или взять страницы из локального индекса (False);
+                по умолчанию обход выполняется, только если индекс старше index_max_age.
+                При True страницы не берутся из кеша ответов без проверки на сервере
+        """
+        logger.info("🚀 Запуск анализа услуги '%s' для всех банков", service_name)
         self.target_service = service_name
 
-        # Собираем данные всех банков
-        self.fetch_all_banks_data()
-        self.save_parsing_data_to_txt(service_name)
+        # Явный запрос обновления обходит и кеш ответов, а не только индекс страниц
+        forced = refresh is True
+        if refresh is None:
+            refresh = not self.index_is_fresh()
+
+        if refresh:
+            # Собираем данные всех банков
+            self.fetch_all_banks_data(revalidate=forced)
+            self.save_parsing_data_to_txt(service_name)
+        else:
+            self.load_bank_data_from_index()
         self.show_parsed_data()
 
         # Анализируем целевую услугу для каждого банка отдельно
         all_benchmarks = self.analyze_all_banks_service(service_name)
 
         if not all_benchmarks:
-            print("❌ Не удалось извлечь данные о продуктах")
+            logger.error("❌ Не удалось извлечь данные о продуктах")
             return ""
 
         # Создаем DataFrame и Excel отчет
@@ -904,15 +1364,15 @@ class BankBenchmarkAgent:
         excel_file = self.generate_excel_report(df, service_name)
 
         if excel_file:
-            print(f"📊 Отчет сохранен в файл: {excel_file}")
+            logger.info("📊 Отчет сохранен в файл: %s", excel_file)
 
             # Показываем статистику
-            print(f"\n📈 Статистика анализа:")
-            print(f"   Всего записей: {len(df)}")
-            print(f"   Уникальных банков: {df['Банк'].nunique()}")
-            print(f"   Уникальных услуг: {df['Услуга'].nunique()}")
-            print(
-                f"   Услуги в отчете: {', '.join(df['Услуга'].unique()[:5])}{'...' if len(df['Услуга'].unique()) > 5 else ''}")
+            services = df['Услуга'].unique()
+            logger.info("📈 Статистика анализа:")
+            logger.info("   Всего записей: %d", len(df))
+            logger.info("   Уникальных банков: %d", df['Банк'].nunique())
+            logger.info("   Уникальных услуг: %d", len(services))
+            logger.info("   Услуги в отчете: %s%s", ', '.join(services[:5]), '...' if len(services) > 5 else '')
 
             return excel_file
         else:
@@ -931,23 +1391,78 @@ class BankBenchmarkAgent:
 
         return service_name
 
-    def close_driver(self):
-        """Закрытие драйвера при завершении"""
-        if hasattr(self, 'driver') and self.driver:
-            self.driver.quit()
-            print("✅ Edge драйвер закрыт")
-
-    def __del__(self):
-        self.close_driver()
+    def close_driver(self, shutdown_pool: bool = False):
+        """
+        Закрытие драйверов при завершении
+
+        Драйверы принадлежат общему пулу процесса и переиспользуются следующими
+        агентами, поэтому закрываются только при shutdown_pool=True (и при выходе из процесса).
+        """
+        if shutdown_pool:
+            shutdown_shared_driver_pool()
+            logger.info("✅ Edge драйверы закрыты")
+
+
+def _is_transient_llm_error(error: Exception) -> bool:
+    """Временная ли ошибка запроса к LLM: сетевая ошибка, таймаут или HTTP 429/5xx"""
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+    if status is None:
+        # gigachat.exceptions.ResponseError: (url, status_code, content, headers)
+        status = next((arg for arg in error.args if isinstance(arg, int) and 100 <= arg < 600), None)
+    if status is not None:
+        return status in RETRY_STATUSES
+
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    error_name = type(error).__name__.lower()
+    return any(marker in error_name for marker in TRANSIENT_ERROR_MARKERS)
+
+
+def read_services_file(path: str) -> List[str]:
+    """Список услуг из файла: по одной на строку, пустые строки и строки с # пропускаются"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Бенчмарк банковских услуг по сайтам банков")
+    parser.add_argument('--services', nargs='+', metavar='SERVICE',
+                        help='Услуги для пакетного анализа (один обход сайтов, один отчет с листом на услугу)')
+    parser.add_argument('--services-file', help='Файл со списком услуг, по одной на строку')
+    parser.add_argument('--refresh', action='store_true',
+                        help='Обойти сайты заново, даже если локальный индекс страниц свежий '
+                             '(страницы из кеша ответов проверяются на сервере)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Переиспользовать анализ банков, данные которых не изменились')
+    parser.add_argument('--crawl-depth', type=int, default=0,
+                        help='Глубина обхода ссылок на продукты от стартовых страниц: 0 - только стартовые '
+                             'страницы; больше 0 - и найденные ссылки, до --max-pages-per-domain страниц на хост')
+    parser.add_argument('--max-pages-per-domain', type=int, default=20,
+                        help='Максимум страниц на хост при --crawl-depth > 0 (стартовые страницы обходятся всегда)')
+    add_logging_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    setup_logging_from_args(args)
+    services = list(args.services or [])
+    if args.services_file:
+        services.extend(read_services_file(args.services_file))
 
-
-def main():
     GIGACHAT_TOKEN = GIGACHAT_TOKEN_CORP
-    agent = BankBenchmarkAgent(GIGACHAT_TOKEN)
+    agent = BankBenchmarkAgent(GIGACHAT_TOKEN, incremental=args.incremental, crawl_depth=args.crawl_depth,
+                               max_pages_per_domain=args.max_pages_per_domain)
+    refresh = True if args.refresh else None
 
     try:
-        service_name = agent.get_user_input()
-        report_file = agent.run_analysis(service_name)
+        if services:
+            report_file = agent.run_batch_analysis(services, refresh=refresh)
+        else:
+            service_name = agent.get_user_input()
+            report_file = agent.run_analysis(service_name, refresh=refresh)
 
         print("\n" + "=" * 80)
         print("📋 РЕЗУЛЬТАТЫ АНАЛИЗА:")
@@ -955,10 +1470,10 @@ def main():
         print(f"Отчет сохранен в файл: {report_file}")
 
     except Exception as e:
-        print(f"❌ Критическая ошибка: {e}")
+        logger.exception("❌ Критическая ошибка: %s", e)
     finally:
-        agent.close_driver()
+        agent.close_driver(shutdown_pool=True)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
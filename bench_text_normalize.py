@@ -0,0 +1,110 @@
+"""
+Бенчмарк очистки HTML-полей карточек sravni: clean_html из main2 (два re.sub) против text_normalize
+
+Корпус - описания из cards_api_results.json (результат save_api_results);
+если файла нет, используются синтетические описания в том же формате.
+
+Запуск:
+    python bench_text_normalize.py
+    python bench_text_normalize.py --corpus cards_api_results.json --repeat 20
+"""
+import argparse
+import json
+import os
+import random
+import re
+import time
+from typing import Dict, List
+
+from text_normalize import clean_html, clean_html_batch
+
+# HTML-поля карточки, которые очищаются при подготовке данных для LLM
+CARD_HTML_FIELDS = ('description', 'maintenanceComment', 'cashbackDescription', 'withdrawComment')
+
+_SYNTHETIC_SNIPPETS = [
+    '<p>Бесплатное обслуживание&nbsp;при тратах от 10&nbsp;000 ₽ в месяц</p>',
+    '<ul>\n  <li>Кешбэк до 30% у партнеров</li>\n  <li>1% на всё</li>\n</ul>',
+    '<b>Снятие наличных</b> в банкоматах банка&nbsp;&mdash; без комиссии',
+    '<br/>Доставка карты курьером &laquo;в день заказа&raquo;<br/>',
+    'Процент на остаток до 16% годовых при подключении подписки',
+    '<div class="note"><span>*</span> Условия действуют до 31.12</div>\r\n',
+]
+
+
+def load_corpus(path: str) -> List[List[str]]:
+    """HTML-поля карточек: список полей для каждой карточки"""
+    with open(path, 'r', encoding='utf-8') as f:
+        cards_details: Dict[str, Dict] = json.load(f)
+
+    corpus = []
+    for card_data in cards_details.values():
+        item_data = card_data.get('item', card_data)
+        fields = [item_data[field] for field in CARD_HTML_FIELDS if item_data.get(field)]
+        fields += [cond['additionalConditions'] for cond in item_data.get('conditionsTab', {}).values()
+                   if cond.get('additionalConditions')]
+        if fields:
+            corpus.append(fields)
+    return corpus
+
+
+def build_corpus(card_count: int, seed: int = 42) -> List[List[str]]:
+    """Синтетические карточки с 4-10 HTML-полями"""
+    rnd = random.Random(seed)
+    return [
+        [' '.join(rnd.choice(_SYNTHETIC_SNIPPETS) for _ in range(rnd.randint(1, 6)))
+         for _ in range(rnd.randint(4, 10))]
+        for _ in range(card_count)
+    ]
+
+
+# Исходная реализация из main2.py
+
+def original_clean_html(text: str) -> str:
+    if not text:
+        return ""
+    text = re.sub(r'<[^>]+>', ' ', text)
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+
+def run(label: str, func, corpus: List[List[str]], repeat: int, baseline: float = None) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for fields in corpus:
+            func(fields)
+    elapsed = time.perf_counter() - started
+    speedup = f"  x{baseline / elapsed:.2f}" if baseline else ""
+    print(f"  {label:<36} {elapsed * 1000:>10.1f} мс{speedup}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corpus', default='cards_api_results.json', help='JSON с деталями карточек')
+    parser.add_argument('--cards', type=int, default=2000, help='Число синтетических карточек')
+    parser.add_argument('--repeat', type=int, default=10, help='Число повторов')
+    args = parser.parse_args()
+
+    if os.path.exists(args.corpus):
+        corpus = load_corpus(args.corpus)
+        print(f"Корпус {args.corpus}: карточек {len(corpus)}")
+    else:
+        corpus = build_corpus(args.cards)
+        print(f"Файл {args.corpus} не найден, синтетический корпус: карточек {len(corpus)}")
+    print(f"Полей {sum(len(fields) for fields in corpus)}, символов {sum(map(len, sum(corpus, [])))}\n")
+
+    for fields in corpus:
+        assert [clean_html(text, unescape=False) for text in fields] == \
+               [original_clean_html(text) for text in fields], "Результаты очистки не совпадают"
+        assert clean_html_batch(fields) == [clean_html(text) for text in fields]
+
+    baseline = run("clean_html (main2, два re.sub)", lambda fields: [original_clean_html(t) for t in fields],
+                   corpus, args.repeat)
+    run("clean_html без сущностей", lambda fields: [clean_html(t, unescape=False) for t in fields],
+        corpus, args.repeat, baseline)
+    run("clean_html", lambda fields: [clean_html(t) for t in fields], corpus, args.repeat, baseline)
+    run("clean_html_batch (карточка целиком)", clean_html_batch, corpus, args.repeat, baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Бенчмарк обхода app_state: рекурсивные find_component/extract_text_fields против tree_walk
+
+Запуск:
+    python bench_tree_walk.py
+    python bench_tree_walk.py --sizes 100000 1000000 --depth 5000
+"""
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+
+from tree_walk import find_first, iter_text_fields, normalize_whitespace
+
+
+def build_tree(node_count: int, branching: int = 4, seed: int = 42):
+    """Синтетическое дерево компонентов примерно из node_count словарей"""
+    rnd = random.Random(seed)
+    root = {"name": "Root", "properties": {}, "children": []}
+    frontier = [root]
+    created = 1
+    while created < node_count:
+        parent = frontier[rnd.randrange(len(frontier))]
+        for _ in range(branching):
+            child = {
+                "name": rnd.choice(["ModalV2", "Tabs.TabsPanelV2", "Text", "Image", "Button"]),
+                "properties": {"widthTab": rnd.choice(["equal", "auto"])},
+                "title": "Заголовок\xa0блока",
+                "text": "Текст\u202Fкомпонента\r\n",
+                "children": []
+            }
+            parent["children"].append(child)
+            frontier.append(child)
+            created += 1
+            if created >= node_count:
+                break
+    # Искомый компонент - последний в порядке обхода
+    parent["children"].append({"name": "Target", "properties": {}, "text": "найдено"})
+    return root
+
+
+def build_deep_tree(depth: int):
+    """Цепочка вложенных компонентов глубиной depth"""
+    root = node = {"name": "Root", "children": []}
+    for level in range(depth):
+        child = {"name": "Level", "text": str(level), "children": []}
+        node["children"].append(child)
+        node = child
+    node["children"].append({"name": "Target", "text": "найдено"})
+    return root
+
+
+# Исходные рекурсивные реализации из main.py
+
+def recursive_find(data, component_name):
+    if isinstance(data, dict):
+        if data.get('name') == component_name:
+            return data
+        for value in data.values():
+            result = recursive_find(value, component_name)
+            if result:
+                return result
+    elif isinstance(data, list):
+        for item in data:
+            result = recursive_find(item, component_name)
+            if result:
+                return result
+    return None
+
+
+def recursive_extract_text(obj, texts_list):
+    if isinstance(obj, dict):
+        if 'title' in obj:
+            texts_list.append(obj['title'])
+        if 'text' in obj:
+            texts_list.append(obj['text'])
+        for value in obj.values():
+            recursive_extract_text(value, texts_list)
+    elif isinstance(obj, list):
+        for item in obj:
+            recursive_extract_text(item, texts_list)
+
+
+def recursive_component_text(data):
+    texts = []
+    recursive_extract_text(data, texts)
+    return (' '.join(texts)
+            .replace('\xa0', ' ')
+            .replace('\u202F', ' ')
+            .replace('\u2009', ' ')
+            .replace('\r', ' ')
+            .replace('\n', ' ')
+            .strip())
+
+
+def iterative_component_text(data):
+    return normalize_whitespace(' '.join(iter_text_fields(data)))
+
+
+def measure(func, *args):
+    """
+    Время выполнения и пик выделенной памяти
+
+    Время меряется отдельным прогоном без tracemalloc, который сильно
+    замедляет код с частыми выделениями памяти.
+    """
+    started = time.perf_counter()
+    try:
+        result = func(*args)
+        error = None
+    except RecursionError as e:
+        result, error = None, e
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    try:
+        func(*args)
+    except RecursionError:
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak, error
+
+
+def report(label: str, func, *args):
+    result, elapsed, peak, error = measure(func, *args)
+    status = "RecursionError" if error else "ok"
+    print(f"  {label:<32} {elapsed * 1000:>10.1f} мс {peak / 1024 / 1024:>9.2f} МБ  {status}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000],
+                        help='Размеры синтетических деревьев (число узлов)')
+    parser.add_argument('--depth', type=int, default=sys.getrecursionlimit() * 2,
+                        help='Глубина дерева для проверки лимита рекурсии')
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        tree = build_tree(size)
+        print(f"\nДерево из {size:,} узлов:")
+        report("find_component (рекурсия)", recursive_find, tree, "Target")
+        report("find_first (явный стек)", find_first, tree, lambda node: isinstance(node, dict)
+               and node.get('name') == "Target")
+        old = report("extract_text_fields (рекурсия)", recursive_component_text, tree)
+        new = report("iter_text_fields (явный стек)", iterative_component_text, tree)
+        assert old == new, "Результаты извлечения текста не совпадают"
+
+    deep_tree = build_deep_tree(args.depth)
+    print(f"\nЦепочка глубиной {args.depth:,}:")
+    report("extract_text_fields (рекурсия)", recursive_component_text, deep_tree)
+    report("iter_text_fields (явный стек)", iterative_component_text, deep_tree)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+import glob
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from record_store import JsonlStore
+from structured_log import get_logger
+
+logger = get_logger(__name__)
+
+# Колонки структурированных карточек. Списочные колонки принимают и одиночные значения,
+# числовые - строки с числом; остальное приводится к тексту (dict/list - в JSON)
+STRING_COLUMNS = [
+    'id', 'name', 'nameAlias', 'link', 'description', 'status', 'smartphone',
+    'maintenance_frequency', 'maintenance_comment', 'maintenance_conditions',
+    'cashback_max_value_type', 'cashback_comment', 'cashback_description', 'withdrawal_comment',
+]
+NUMBER_COLUMNS = [
+    'ageFrom', 'maintenance_price', 'cashback_value', 'cashback_max_value',
+    'withdrawal_rate_from', 'withdrawal_rate_to',
+]
+LIST_COLUMNS = ['cardClass', 'features', 'benefits', 'demands', 'cashback_all_categories', 'withdrawal_places']
+# Колонки с небольшим числом различных значений хранятся со словарным кодированием
+DICTIONARY_COLUMNS = ['service_type', 'maintenance_currency']
+DICTIONARY_LIST_COLUMNS = ['paymentSystem', 'currency']
+
+# Источник плоских колонок в структуре prepare_structured_data_for_llm
+_NESTED_SOURCES = {
+    'maintenance_price': ('maintenance', 'price'),
+    'maintenance_currency': ('maintenance', 'currency'),
+    'maintenance_frequency': ('maintenance', 'frequency'),
+    'maintenance_comment': ('maintenance', 'comment'),
+    'maintenance_conditions': ('maintenance', 'conditions'),
+    'cashback_value': ('cashback', 'value'),
+    'cashback_max_value': ('cashback', 'maxValue'),
+    'cashback_max_value_type': ('cashback', 'maxValueType'),
+    'cashback_comment': ('cashback', 'comment'),
+    'cashback_description': ('cashback', 'description'),
+    'cashback_all_categories': ('cashback', 'allCategories'),
+    'withdrawal_rate_from': ('withdrawal', 'rateFrom'),
+    'withdrawal_rate_to': ('withdrawal', 'rateTo'),
+    'withdrawal_comment': ('withdrawal', 'comment'),
+    'withdrawal_places': ('withdrawal', 'places'),
+}
+
+
+def _text(value: Any) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).replace(',', '.').replace(' ', ''))
+    except ValueError:
+        return None
+
+
+def _text_list(value: Any) -> List[str]:
+    if value is None or value == "":
+        return []
+    if not isinstance(value, list):
+        value = [value]
+    return [_text(item) for item in value if item is not None]
+
+
+def _source_value(card: Dict[str, Any], column: str) -> Any:
+    source = _NESTED_SOURCES.get(column)
+    if source is None:
+        return card.get(column)
+    return card.get(source[0], {}).get(source[1])
+
+
+def card_rows(structured_cards: Dict[str, Dict], snapshot_at: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """
+    Плоские строки карточек из результата prepare_structured_data_for_llm
+
+    Обслуживание, кешбэк и снятие наличных раскладываются по скалярным колонкам,
+    детали обслуживания, категории кешбэка и дополнительные условия - списки структур.
+    """
+    snapshot_at = (snapshot_at or datetime.now()).replace(microsecond=0)
+    rows = []
+    for card_id, card in structured_cards.items():
+        row: Dict[str, Any] = {'snapshot_at': snapshot_at, 'card_id': str(card_id)}
+        for column in STRING_COLUMNS:
+            row[column] = _text(_source_value(card, column))
+        for column in NUMBER_COLUMNS:
+            row[column] = _number(_source_value(card, column))
+        for column in LIST_COLUMNS + DICTIONARY_LIST_COLUMNS:
+            row[column] = _text_list(_source_value(card, column))
+        for column in DICTIONARY_COLUMNS:
+            row[column] = _text(_source_value(card, column))
+
+        maintenance = card.get('maintenance', {})
+        row['maintenance_details'] = [
+            {'price': _number(detail.get('price')), 'type': _text_list(detail.get('type')),
+             'frequency': _text(detail.get('frequency')), 'conditions': _text(detail.get('conditions'))}
+            for detail in maintenance.get('details', [])
+        ]
+        cashback = card.get('cashback', {})
+        row['cashback_categories'] = [
+            {'categories': _text_list(category.get('categories')), 'value': _number(category.get('value')),
+             'comment': _text(category.get('comment')), 'maxValue': _number(category.get('maxValue')),
+             'maxValueType': _text(category.get('maxValueType'))}
+            for category in cashback.get('categories', [])
+        ]
+        row['conditions'] = [{'id': str(condition_id), 'text': _text(text)}
+                             for condition_id, text in card.get('conditions', {}).items()]
+        rows.append(row)
+    return rows
+
+
+def card_schema():
+    """Схема Arrow: одинаковая для всех снимков, чтобы их можно было читать вместе"""
+    import pyarrow as pa
+
+    dictionary_string = pa.dictionary(pa.int32(), pa.string())
+    fields = [pa.field('snapshot_at', pa.timestamp('s')), pa.field('card_id', pa.string())]
+    fields += [pa.field(column, pa.string()) for column in STRING_COLUMNS]
+    fields += [pa.field(column, pa.float64()) for column in NUMBER_COLUMNS]
+    fields += [pa.field(column, pa.list_(pa.string())) for column in LIST_COLUMNS]
+    fields += [pa.field(column, dictionary_string) for column in DICTIONARY_COLUMNS]
+    fields += [pa.field(column, pa.list_(dictionary_string)) for column in DICTIONARY_LIST_COLUMNS]
+    fields += [
+        pa.field('maintenance_details', pa.list_(pa.struct([
+            ('price', pa.float64()), ('type', pa.list_(pa.string())),
+            ('frequency', pa.string()), ('conditions', pa.string()),
+        ]))),
+        pa.field('cashback_categories', pa.list_(pa.struct([
+            ('categories', pa.list_(pa.string())), ('value', pa.float64()), ('comment', pa.string()),
+            ('maxValue', pa.float64()), ('maxValueType', pa.string()),
+        ]))),
+        pa.field('conditions', pa.list_(pa.struct([('id', pa.string()), ('text', pa.string())]))),
+    ]
+    return pa.schema(fields)
+
+
+def card_table(structured_cards: Dict[str, Dict], snapshot_at: Optional[datetime] = None):
+    """Таблица Arrow со структурированными карточками"""
+    import pyarrow as pa
+
+    schema = card_schema()
+    rows = card_rows(structured_cards, snapshot_at)
+    columns = [pa.array([row[field.name] for row in rows], type=field.type) for field in schema]
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def save_structured_columnar(structured_cards: Dict[str, Dict], filename: Optional[str] = None,
+                             snapshot_at: Optional[datetime] = None) -> str:
+    """
+    Сохраняет структурированные карточки в колоночном формате
+
+    Parquet (по умолчанию) или Arrow IPC (.arrow/.feather) со сжатием zstd.
+    Без pyarrow строки сохраняются в JSON Lines (тот же набор колонок).
+
+    Returns:
+        Имя записанного файла
+    """
+    snapshot_at = snapshot_at or datetime.now()
+    filename = filename or f"cards_structured_{snapshot_at.strftime('%Y%m%d_%H%M%S')}.parquet"
+    try:
+        table = card_table(structured_cards, snapshot_at)
+    except ImportError:
+        filename = os.path.splitext(filename)[0] + ".jsonl"
+        logger.warning("⚠️  pyarrow не установлен, сохраняем строки в JSON Lines")
+        rows = card_rows(structured_cards, snapshot_at)
+        for row in rows:
+            row['snapshot_at'] = row['snapshot_at'].isoformat()
+        JsonlStore(filename).write(rows)
+        logger.info("Колоночные данные карточек сохранены в %s", filename)
+        return filename
+
+    if filename.endswith(('.arrow', '.feather')):
+        import pyarrow.feather as feather
+        feather.write_feather(table, filename, compression='zstd')
+    else:
+        import pyarrow.parquet as pq
+        pq.write_table(table, filename, compression='zstd')
+    logger.info("Колоночные данные карточек сохранены в %s (%d строк)", filename, table.num_rows)
+    return filename
+
+
+def load_card_snapshots(paths: Iterable[str] = ("cards_structured_*.parquet",), columns: Optional[List[str]] = None):
+    """
+    Читает снимки карточек (Parquet/Arrow) в одну таблицу Arrow
+
+    Args:
+        paths: Файлы или glob-шаблоны
+        columns: Читаемые колонки (по умолчанию - все)
+    """
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+
+    files = sorted({match for pattern in paths
+                    for match in ([pattern] if os.path.exists(pattern) else glob.glob(pattern))})
+    tables = [
+        feather.read_table(path, columns=columns) if path.endswith(('.arrow', '.feather'))
+        else pq.read_table(path, columns=columns)
+        for path in files
+    ]
+    if not tables:
+        schema = card_schema()
+        return schema.empty_table() if columns is None else pa.schema(
+            [schema.field(column) for column in columns]).empty_table()
+    return pa.concat_tables(tables)
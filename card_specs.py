@@ -0,0 +1,88 @@
+from functools import partial
+from typing import Dict, List
+
+from record_flattener import (CollectionSpec, FieldSpec, NOT_NONE, RecordFlattener, SCOPE_RECORD, Spec, TRUTHY)
+from text_normalize import clean_html
+
+# Поля верхнего уровня с пустым значением (None, "", [], {}) в результат не попадают
+_top = partial(FieldSpec, drop_empty=True)
+
+# Обслуживание (maintenance)
+MAINTENANCE_SPECS: List[Spec] = [
+    FieldSpec('maintenance.price', 'maintenancePrice', include=NOT_NONE),
+    FieldSpec('maintenance.currency', 'currencyMaintenance', default="RUB",
+              include=NOT_NONE, guard='maintenancePrice'),
+    FieldSpec('maintenance.frequency', 'frequencyNew', default="", include=NOT_NONE, guard='maintenancePrice'),
+    FieldSpec('maintenance.comment', 'maintenanceComment', transform=clean_html, include=TRUTHY),
+    FieldSpec('maintenance.conditions', 'conditionsNew', include=TRUTHY),
+    CollectionSpec('maintenance.details', 'maintenanceReleaseFeeTab', include=NOT_NONE, guard='maintenancePrice',
+                   fields=[
+                       FieldSpec('price', 'maintenancePrice'),
+                       FieldSpec('type', 'maintenanceRelease', default=[]),
+                       FieldSpec('frequency', 'frequencyNew', default=""),
+                       FieldSpec('conditions', 'conditionsNew', include=TRUTHY),
+                   ]),
+]
+
+# Кешбэк (cashback)
+CASHBACK_SPECS: List[Spec] = [
+    FieldSpec('cashback.value', 'cashbackValue', include=NOT_NONE),
+    FieldSpec('cashback.maxValue', 'cashbackMaxValue', include=NOT_NONE),
+    FieldSpec('cashback.maxValueType', 'cashbackMaxValueType', default="", include=NOT_NONE,
+              guard='cashbackMaxValue'),
+    FieldSpec('cashback.comment', 'cashbackComment', include=TRUTHY),
+    FieldSpec('cashback.description', 'cashbackDescription', transform=clean_html, include=TRUTHY),
+    CollectionSpec('cashback.categories', 'cashbackCategoriesTab', fields=[
+        FieldSpec('categories', 'cashbackCategories', default=[]),
+        FieldSpec('value', 'cashbackValue'),
+        FieldSpec('comment', 'cashbackComment', default=""),
+        FieldSpec('maxValue', 'cashbackMaxValue', include=NOT_NONE),
+        FieldSpec('maxValueType', 'cashbackMaxValueType', default="", include=NOT_NONE, guard='cashbackMaxValue'),
+    ]),
+    FieldSpec('cashback.allCategories', 'cashbackCategories', include=TRUTHY),
+]
+
+# Снятие наличных (withdrawal)
+WITHDRAWAL_SPECS: List[Spec] = [
+    FieldSpec('withdrawal.rateFrom', 'withdrawRateFrom', include=NOT_NONE),
+    FieldSpec('withdrawal.rateTo', 'withdrawRateTo', include=NOT_NONE),
+    FieldSpec('withdrawal.comment', 'withdrawComment', transform=clean_html, include=TRUTHY),
+    FieldSpec('withdrawal.places', 'withdrawPlace', include=TRUTHY),
+]
+
+# Дополнительные условия (conditions): id условия -> текст
+CONDITIONS_SPECS: List[Spec] = [
+    CollectionSpec('conditions', 'conditionsTab', keyed=True,
+                   value=FieldSpec(None, 'additionalConditions', transform=clean_html, include=TRUTHY)),
+]
+
+# Карточка банковской карты (дебетовой или кредитной) для LLM
+CARD_SPECS: List[Spec] = [
+    _top('id', 'id'),
+    _top('name', 'name'),
+    _top('service_type', 'service_type', default='Неизвестно', scope=SCOPE_RECORD),
+    _top('nameAlias', 'nameAlias'),
+    _top('link', 'link'),
+    _top('description', 'description', default="", transform=clean_html),
+    _top('status', 'status'),
+    _top('paymentSystem', 'paymentSystem', default=[]),
+    _top('cardClass', 'cardCLass', default=[]),
+    _top('features', 'feature', default=[]),
+    _top('benefits', 'benefits', default=[]),
+    _top('ageFrom', 'ageFrom'),
+    _top('demands', 'demands', default=[]),
+    _top('currency', 'currency'),
+    _top('smartphone', 'smartphone', default=""),
+    *MAINTENANCE_SPECS,
+    *CASHBACK_SPECS,
+    *WITHDRAWAL_SPECS,
+    *CONDITIONS_SPECS,
+]
+
+# Схемы по productName API sravni; новый тип продукта - новая схема здесь
+SPECS_BY_PRODUCT: Dict[str, List[Spec]] = {
+    'debit-cards': CARD_SPECS,
+    'credit-cards': CARD_SPECS,
+}
+
+CARD_FLATTENER = RecordFlattener(CARD_SPECS)
@@ -0,0 +1,199 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+STATUS_ADDED = "added"
+STATUS_CHANGED = "changed"
+STATUS_UNCHANGED = "unchanged"
+STATUS_REMOVED = "removed"
+
+# Сколько текста хранить в состоянии для отчета об изменениях
+SNAPSHOT_LENGTH = 2000
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_for_fingerprint(text: str) -> str:
+    """Текст без различий в пробельных символах и регистре"""
+    return _WHITESPACE_RE.sub(' ', text).strip().lower()
+
+
+def content_fingerprint(text: str) -> str:
+    """Хеш нормализованного текста"""
+    return hashlib.sha256(normalize_for_fingerprint(text).encode('utf-8')).hexdigest()
+
+
+@dataclass
+class ChangeReport:
+    added: List[Dict[str, Any]] = field(default_factory=list)
+    changed: List[Dict[str, Any]] = field(default_factory=list)
+    removed: List[Dict[str, Any]] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+    def summary(self) -> str:
+        return (f"новых: {len(self.added)}, изменено: {len(self.changed)}, "
+                f"удалено: {len(self.removed)}, без изменений: {len(self.unchanged)}")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "generated_at": datetime.now().isoformat(),
+            "summary": {
+                STATUS_ADDED: len(self.added),
+                STATUS_CHANGED: len(self.changed),
+                STATUS_REMOVED: len(self.removed),
+                STATUS_UNCHANGED: len(self.unchanged)
+            },
+            STATUS_ADDED: self.added,
+            STATUS_CHANGED: self.changed,
+            STATUS_REMOVED: self.removed,
+            STATUS_UNCHANGED: self.unchanged
+        }
+
+
+class ChangeTracker:
+    """
+    Отпечатки содержимого между запусками: ключ (URL, компонент, ...) -> хеш текста
+
+    В рамках запуска check() сообщает, новый ли ключ, изменился ли его текст;
+    ключи прошлого запуска, не встреченные в текущем, считаются удаленными.
+    Ключи, которые не удалось проверить (ошибка загрузки), помечаются touch(),
+    чтобы не попасть в удаленные. К ключу можно привязать payload - например,
+    результат обработки, переиспользуемый при неизменном содержимом.
+    """
+
+    def __init__(self, state_file: str):
+        self.state_file = state_file
+        self._lock = threading.Lock()
+        self._previous: Dict[str, Dict[str, Any]] = self._load()
+        self._current: Dict[str, Dict[str, Any]] = {}
+        self._statuses: Dict[str, str] = {}
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f).get("entries", {})
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def check(self, key: str, text: str, info: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Регистрирует содержимое ключа в текущем запуске
+
+        Returns:
+            STATUS_ADDED, STATUS_CHANGED или STATUS_UNCHANGED
+        """
+        fingerprint = content_fingerprint(text)
+        now = datetime.now().isoformat()
+
+        with self._lock:
+            previous = self._previous.get(key)
+            if previous is None:
+                status = STATUS_ADDED
+            elif previous["fingerprint"] != fingerprint:
+                status = STATUS_CHANGED
+            else:
+                status = STATUS_UNCHANGED
+
+            entry = {
+                "fingerprint": fingerprint,
+                "info": info or {},
+                "snapshot": text[:SNAPSHOT_LENGTH],
+                "first_seen": previous["first_seen"] if previous else now,
+                "last_changed": previous["last_changed"] if status == STATUS_UNCHANGED else now,
+                "last_seen": now
+            }
+            if status == STATUS_UNCHANGED and "payload" in previous:
+                entry["payload"] = previous["payload"]
+
+            self._current[key] = entry
+            self._statuses[key] = status
+        return status
+
+    def touch(self, key: str):
+        """Переносит прошлое состояние ключа без проверки (содержимое не удалось получить)"""
+        with self._lock:
+            if key in self._previous and key not in self._current:
+                self._current[key] = self._previous[key]
+
+    def get_payload(self, key: str) -> Optional[Any]:
+        """Payload ключа, если его содержимое не изменилось с прошлого запуска"""
+        with self._lock:
+            if self._statuses.get(key) != STATUS_UNCHANGED:
+                return None
+            return self._current[key].get("payload")
+
+    def previous_payload(self, key: str) -> Optional[Any]:
+        """Payload ключа из прошлого запуска (независимо от изменений)"""
+        with self._lock:
+            return self._previous.get(key, {}).get("payload")
+
+    def set_payload(self, key: str, payload: Any):
+        with self._lock:
+            if key in self._current:
+                self._current[key]["payload"] = payload
+
+    def report(self) -> ChangeReport:
+        """Отчет о различиях между прошлым и текущим запуском"""
+        report = ChangeReport()
+        with self._lock:
+            for key, status in self._statuses.items():
+                entry = self._current[key]
+                if status == STATUS_UNCHANGED:
+                    report.unchanged.append(key)
+                elif status == STATUS_ADDED:
+                    report.added.append({"key": key, "info": entry["info"], "text": entry["snapshot"]})
+                else:
+                    report.changed.append({
+                        "key": key,
+                        "info": entry["info"],
+                        "previous_text": self._previous[key].get("snapshot", ""),
+                        "text": entry["snapshot"],
+                        "previous_seen": self._previous[key].get("last_seen")
+                    })
+
+            for key, entry in self._previous.items():
+                if key not in self._current:
+                    report.removed.append({
+                        "key": key,
+                        "info": entry.get("info", {}),
+                        "text": entry.get("snapshot", ""),
+                        "last_seen": entry.get("last_seen")
+                    })
+        return report
+
+    def save(self, keep_removed: bool = False):
+        """
+        Сохраняет состояние текущего запуска
+
+        Args:
+            keep_removed: Сохранить и ключи, не встреченные в этом запуске
+                (для частичных запусков, охватывающих не все ключи)
+        """
+        with self._lock:
+            entries = dict(self._previous) if keep_removed else {}
+            entries.update(self._current)
+            state = {"updated": datetime.now().isoformat(), "entries": entries}
+
+        directory = os.path.dirname(self.state_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.state_file}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.state_file)
+
+    def save_report(self, filename: str, report: Optional[ChangeReport] = None) -> ChangeReport:
+        """Сохраняет отчет об изменениях в JSON"""
+        report = report or self.report()
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(report.to_dict(), f, ensure_ascii=False, indent=2)
+        return report
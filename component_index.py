@@ -0,0 +1,61 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from tree_walk import materialize_path, walk
+
+
+@dataclass
+class ComponentNode:
+    name: str
+    node: Dict[str, Any]  # Сам объект компонента из app_state
+    path: Tuple[Any, ...]  # Ключи и индексы от корня JSON до компонента
+
+    @property
+    def properties(self) -> Dict[str, Any]:
+        return self.node.get('properties') or {}
+
+    def matches(self, properties: Optional[Dict[str, Any]]) -> bool:
+        """Совпадают ли все заданные свойства компонента"""
+        if not properties:
+            return True
+        own = self.properties
+        return all(own.get(key) == value for key, value in properties.items())
+
+
+class ComponentIndex:
+    """
+    Индекс компонентов app_state: имя -> список узлов с их свойствами и путями
+
+    Строится за один проход по дереву; компоненты одного имени хранятся
+    в порядке обхода в глубину, поэтому find возвращает тот же узел, что и
+    рекурсивный поиск первого совпадения.
+    """
+
+    def __init__(self, data: Any):
+        self._by_name: Dict[str, List[ComponentNode]] = {}
+        self._build(data)
+
+    def _build(self, data: Any):
+        for obj, path_link in walk(data):
+            if isinstance(obj, dict):
+                name = obj.get('name')
+                if isinstance(name, str):
+                    # Путь материализуется только для компонентов
+                    self._by_name.setdefault(name, []).append(
+                        ComponentNode(name, obj, materialize_path(path_link))
+                    )
+
+    def names(self) -> List[str]:
+        """Имена всех найденных компонентов"""
+        return list(self._by_name)
+
+    def find_all(self, name: str, properties: Optional[Dict[str, Any]] = None) -> List[ComponentNode]:
+        """Все компоненты с указанным именем и свойствами в порядке следования"""
+        return [node for node in self._by_name.get(name, ()) if node.matches(properties)]
+
+    def find(self, name: str, properties: Optional[Dict[str, Any]] = None) -> Optional[ComponentNode]:
+        """Первый компонент с указанным именем и свойствами"""
+        for node in self._by_name.get(name, ()):
+            if node.matches(properties):
+                return node
+        return None
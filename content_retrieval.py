@@ -0,0 +1,186 @@
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from product_keywords import PRODUCT_KEYWORDS, service_product_type
+
+_TOKEN_RE = re.compile(r'[a-zа-яё0-9]+')
+_SENTENCE_END_RE = re.compile(r'(?<=[.!?;])\s+')
+
+# Окончания для грубого стемминга русских слов (сначала длинные)
+_RU_ENDINGS = tuple(sorted((
+    'ами', 'ями', 'ого', 'его', 'ому', 'ему', 'ыми', 'ими', 'ых', 'их', 'ий', 'ый', 'ой', 'ая', 'яя',
+    'ое', 'ее', 'ые', 'ие', 'ую', 'юю', 'ов', 'ев', 'ам', 'ям', 'ах', 'ях', 'ом', 'ем', 'ей',
+    'а', 'я', 'о', 'е', 'ы', 'и', 'у', 'ю', 'ь'
+), key=len, reverse=True))
+_MIN_STEM = 4
+
+# Вес совпадения с ключевым словом типа продукта относительно BM25
+KEYWORD_WEIGHT = 0.5
+
+
+def estimate_tokens(text: str) -> int:
+    """Грубая оценка числа токенов LLM для русского текста"""
+    return len(text) // 3 + 1
+
+
+def stem(token: str) -> str:
+    for ending in _RU_ENDINGS:
+        if token.endswith(ending) and len(token) - len(ending) >= _MIN_STEM:
+            return token[:-len(ending)]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    return [stem(token) for token in _TOKEN_RE.findall(text.lower())]
+
+
+@dataclass
+class Chunk:
+    source: str  # URL страницы
+    position: int  # Порядковый номер фрагмента в исходном тексте
+    text: str
+    score: float = 0.0
+
+
+def split_into_chunks(text: str, source: str = "", chunk_size: int = 800) -> List[Chunk]:
+    """
+    Делит текст на фрагменты около chunk_size символов по границам предложений
+
+    Предложение длиннее chunk_size режется по словам.
+    """
+    chunks = []
+    current = []
+    current_length = 0
+
+    def flush():
+        nonlocal current, current_length
+        if current:
+            chunks.append(Chunk(source, len(chunks), ' '.join(current)))
+        current, current_length = [], 0
+
+    for sentence in _SENTENCE_END_RE.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        pieces = [sentence]
+        if len(sentence) > chunk_size:
+            pieces, piece, piece_length = [], [], 0
+            for word in sentence.split():
+                if piece and piece_length + len(word) > chunk_size:
+                    pieces.append(' '.join(piece))
+                    piece, piece_length = [], 0
+                piece.append(word)
+                piece_length += len(word) + 1
+            if piece:
+                pieces.append(' '.join(piece))
+
+        for piece in pieces:
+            if current_length + len(piece) > chunk_size:
+                flush()
+            current.append(piece)
+            current_length += len(piece) + 1
+    flush()
+    return chunks
+
+
+class BM25:
+    """Okapi BM25 по набору фрагментов"""
+
+    def __init__(self, documents: Sequence[List[str]], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.term_counts = [Counter(tokens) for tokens in documents]
+        self.lengths = [len(tokens) for tokens in documents]
+        self.average_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+
+        document_frequency: Dict[str, int] = Counter()
+        for counts in self.term_counts:
+            document_frequency.update(counts.keys())
+        total = len(documents)
+        self.idf = {
+            term: math.log(1 + (total - frequency + 0.5) / (frequency + 0.5))
+            for term, frequency in document_frequency.items()
+        }
+
+    def score(self, query: Iterable[str], index: int) -> float:
+        counts = self.term_counts[index]
+        length_norm = self.k1 * (1 - self.b + self.b * self.lengths[index] / (self.average_length or 1))
+        score = 0.0
+        for term in set(query):
+            frequency = counts.get(term)
+            if frequency:
+                score += self.idf[term] * frequency * (self.k1 + 1) / (frequency + length_norm)
+        return score
+
+
+def rank_chunks(chunks: List[Chunk], query: str) -> List[Chunk]:
+    """
+    Оценивает фрагменты по релевантности услуге query
+
+    BM25 по словам названия услуги плюс совпадения с ключевыми словами
+    соответствующего типа продукта (product_keywords).
+    """
+    if not chunks:
+        return []
+
+    query_tokens = tokenize(query)
+    product_type = service_product_type(query)
+    keywords = PRODUCT_KEYWORDS.get(product_type, []) if product_type else []
+
+    bm25 = BM25([tokenize(chunk.text) for chunk in chunks])
+    for index, chunk in enumerate(chunks):
+        chunk_lower = chunk.text.lower()
+        keyword_hits = sum(1 for keyword in keywords if keyword in chunk_lower)
+        chunk.score = bm25.score(query_tokens, index) + KEYWORD_WEIGHT * keyword_hits
+
+    return sorted(chunks, key=lambda chunk: chunk.score, reverse=True)
+
+
+def select_relevant_text(pages: Sequence[Tuple[str, str]], query: str, token_budget: int,
+                         chunk_size: int = 800, separator: str = "\n...\n") -> str:
+    """
+    Собирает текст для промпта из самых релевантных фрагментов страниц
+
+    Args:
+        pages: Пары (URL, текст страницы)
+        query: Целевая услуга
+        token_budget: Ограничение на размер результата в токенах (оценка estimate_tokens)
+        chunk_size: Размер фрагмента, символов
+
+    Returns:
+        Отобранные фрагменты в исходном порядке следования. Если ни один фрагмент
+        не релевантен, - начало текста в пределах бюджета (как при простом усечении)
+    """
+    chunks: List[Chunk] = []
+    for source, text in pages:
+        for chunk in split_into_chunks(text, source, chunk_size):
+            chunk.position = len(chunks)
+            chunks.append(chunk)
+
+    ranked = rank_chunks(chunks, query)
+    if not ranked or ranked[0].score <= 0:
+        candidates = chunks
+    else:
+        candidates = [chunk for chunk in ranked if chunk.score > 0]
+
+    selected: List[Chunk] = []
+    used = 0
+    separator_tokens = estimate_tokens(separator)
+    for chunk in candidates:
+        cost = estimate_tokens(chunk.text) + separator_tokens
+        if used + cost > token_budget:
+            if not selected:
+                # Бюджет меньше лучшего фрагмента - берем его начало
+                chunk.text = chunk.text[:max(token_budget - separator_tokens, 0) * 3]
+                selected.append(chunk)
+                used = token_budget
+            continue
+        selected.append(chunk)
+        used += cost
+
+    selected.sort(key=lambda chunk: chunk.position)
+    return separator.join(chunk.text for chunk in selected)
+
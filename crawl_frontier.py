@@ -0,0 +1,234 @@
+import heapq
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+from http_cache import ResponseCache
+from http_client import cached_get
+from politeness import HostPoliteness
+from product_keywords import PRODUCT_KEYWORDS
+from structured_log import get_logger
+from url_utils import normalize_url
+
+logger = get_logger(__name__)
+
+# Приоритеты очереди обхода: стартовые страницы первыми, затем ссылки по релевантности типа
+SEED_PRIORITY = 100.0
+PRODUCT_TYPE_PRIORITY = 2.0  # Ссылка с определенным типом продукта
+OTHER_TYPE_PRIORITY = 1.0  # Ссылка, похожая на продуктовую, без типа
+TARGET_TYPE_BONUS = 3.0  # Тип ссылки совпадает с типом целевой услуги
+DEPTH_PENALTY = 1.0
+
+ROBOTS_TTL = 24 * 60 * 60
+
+
+def link_priority(link_type: Optional[str], depth: int, target_type: Optional[str] = None) -> float:
+    """Приоритет найденной ссылки: тип продукта, совпадение с целевой услугой и глубина"""
+    priority = PRODUCT_TYPE_PRIORITY if link_type in PRODUCT_KEYWORDS else OTHER_TYPE_PRIORITY
+    if target_type and link_type == target_type:
+        priority += TARGET_TYPE_BONUS
+    return priority - DEPTH_PENALTY * depth
+
+
+@dataclass
+class FrontierItem:
+    url: str
+    bank: str
+    depth: int  # 0 - стартовая страница, 1 - ссылка с нее и т.д.
+    priority: float
+    sequence: int  # Порядок постановки в очередь
+
+    @property
+    def host(self) -> str:
+        return HostPoliteness.host_of(self.url)
+
+
+class RobotsPolicy:
+    """
+    Проверка URL по robots.txt сайта
+
+    robots.txt загружается один раз на хост (через дисковый кеш ответов);
+    при ошибке загрузки или отсутствии файла обход разрешен, при 401/403 -
+    запрещен, как принято у поисковых роботов.
+    """
+
+    def __init__(self, user_agent: str = "*", ttl: float = ROBOTS_TTL, timeout: float = 10.0,
+                 cache: Optional[ResponseCache] = None, politeness: Optional[HostPoliteness] = None):
+        self.user_agent = user_agent
+        self.ttl = ttl
+        self.timeout = timeout
+        self.cache = cache
+        self.politeness = politeness
+        self._parsers: Dict[str, RobotFileParser] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._registry_lock = threading.Lock()
+
+    def allowed(self, url: str) -> bool:
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        with self._registry_lock:
+            lock = self._locks.setdefault(origin, threading.Lock())
+        # Загрузка robots.txt одного хоста не блокирует проверки для остальных
+        with lock:
+            parser = self._parsers.get(origin)
+            if parser is None:
+                parser = self._load(origin)
+                self._parsers[origin] = parser
+        return parser.can_fetch(self.user_agent, url)
+
+    def _load(self, origin: str) -> RobotFileParser:
+        parser = RobotFileParser(f"{origin}/robots.txt")
+        try:
+            response = cached_get(parser.url, ttl=self.ttl, cache=self.cache,
+                                  throttle=self.politeness.slot if self.politeness else None,
+                                  timeout=self.timeout)
+            status, text = response.status_code, response.text
+        except Exception as e:
+            logger.warning("   ⚠️ robots.txt %s недоступен: %s", origin, e, extra={'url': parser.url})
+            status, text = None, ""
+
+        if status in (401, 403):
+            parser.disallow_all = True
+        elif status == 200:
+            parser.parse(text.splitlines())
+        else:
+            parser.allow_all = True
+        return parser
+
+
+class CrawlFrontier:
+    """
+    Общая очередь обхода сайтов банков для параллельных воркеров
+
+    Страницы выдаются по убыванию приоритета; URL дедуплицируются по
+    нормализованной форме. Ссылки принимаются только в пределах хостов
+    стартовых страниц своего банка, не глубже max_depth и не сверх
+    max_pages_per_domain страниц на хост; найденные ссылки проверяются
+    по robots.txt (стартовые страницы заданы вручную и не проверяются).
+    Одновременно выдается не более одной страницы каждого хоста, поэтому
+    воркеры не простаивают в ожидании ограничителя частоты запросов.
+    """
+
+    def __init__(self, max_depth: int = 1, max_pages_per_domain: int = 20,
+                 robots: Optional[RobotsPolicy] = None):
+        self.max_depth = max_depth
+        self.max_pages_per_domain = max_pages_per_domain
+        self.robots = robots
+
+        self._heap: List[tuple] = []
+        self._seen: Set[str] = set()
+        self._bank_hosts: Dict[str, Set[str]] = {}
+        self._scheduled: Counter = Counter()  # Хост -> страниц поставлено в очередь
+        self._busy_hosts: Set[str] = set()
+        self._visited: Dict[str, List[str]] = {}
+        self._in_flight = 0
+        self._sequence = 0
+        self.rejected: Counter = Counter()  # Причина -> число отклоненных ссылок
+        self._condition = threading.Condition()
+
+    def add_seed(self, bank: str, url: str) -> bool:
+        """Стартовая страница банка: задает допустимый хост и ставится в очередь без проверки бюджета"""
+        host = HostPoliteness.host_of(url)
+        with self._condition:
+            self._bank_hosts.setdefault(bank, set()).add(host)
+            return self._push(bank, url, normalize_url(url), host, 0, SEED_PRIORITY)
+
+    def add(self, bank: str, url: str, depth: int, priority: float) -> bool:
+        """
+        Найденная ссылка
+
+        Returns:
+            True, если ссылка поставлена в очередь
+        """
+        key = normalize_url(url)
+        host = HostPoliteness.host_of(url)
+        with self._condition:
+            reason = self._rejection(bank, key, host, depth)
+        if reason is None and self.robots is not None and not self.robots.allowed(url):
+            reason = 'robots'
+
+        with self._condition:
+            # Пока проверялся robots.txt, ссылку могли принять из другого потока
+            reason = reason or self._rejection(bank, key, host, depth)
+            if reason is not None:
+                self.rejected[reason] += 1
+                return False
+            return self._push(bank, url, key, host, depth, priority)
+
+    def _rejection(self, bank: str, key: str, host: str, depth: int) -> Optional[str]:
+        if depth > self.max_depth:
+            return 'depth'
+        if host not in self._bank_hosts.get(bank, ()):
+            return 'external'
+        if key in self._seen:
+            return 'seen'
+        if self._scheduled[host] >= self.max_pages_per_domain:
+            return 'budget'
+        return None
+
+    def _push(self, bank: str, url: str, key: str, host: str, depth: int, priority: float) -> bool:
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        self._scheduled[host] += 1
+        self._sequence += 1
+        item = FrontierItem(url, bank, depth, priority, self._sequence)
+        heapq.heappush(self._heap, (-priority, item.sequence, item))
+        self._condition.notify()
+        return True
+
+    def next(self) -> Optional[FrontierItem]:
+        """
+        Следующая страница для обхода (ждет, пока освободится хост)
+
+        Returns:
+            None, когда очередь пуста и ни одна страница не обрабатывается
+        """
+        with self._condition:
+            while True:
+                item = self._pop_available()
+                if item is not None:
+                    self._busy_hosts.add(item.host)
+                    self._visited.setdefault(item.bank, []).append(item.url)
+                    self._in_flight += 1
+                    return item
+                if self._in_flight == 0:
+                    # Ждать нечего: новые ссылки появляются только при обработке страниц
+                    self._condition.notify_all()
+                    return None
+                self._condition.wait()
+
+    def _pop_available(self) -> Optional[FrontierItem]:
+        postponed = []
+        item = None
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            if entry[2].host in self._busy_hosts:
+                postponed.append(entry)
+                continue
+            item = entry[2]
+            break
+        for entry in postponed:
+            heapq.heappush(self._heap, entry)
+        return item
+
+    def done(self, item: FrontierItem):
+        """Страница обработана (ссылки с нее должны быть добавлены до вызова)"""
+        with self._condition:
+            self._busy_hosts.discard(item.host)
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def visited(self, bank: str) -> List[str]:
+        """URL банка, выданные на обход, в порядке выдачи"""
+        with self._condition:
+            return list(self._visited.get(bank, []))
+
+    def summary(self) -> str:
+        with self._condition:
+            pages = sum(len(urls) for urls in self._visited.values())
+            rejected = ", ".join(f"{reason}: {count}" for reason, count in sorted(self.rejected.items()))
+        return f"страниц {pages}" + (f", отклонено ссылок ({rejected})" if rejected else "")
@@ -0,0 +1,240 @@
+import atexit
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+
+class DriverUnavailableError(Exception):
+    """Не удалось получить драйвер из пула"""
+
+
+class _PooledDriver:
+    """Драйвер из пула вместе с его статистикой использования"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.created_at = time.monotonic()
+        self.uses = 0
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.created_at
+
+
+class WebDriverPool:
+    """
+    Пул прогретых экземпляров WebDriver
+
+    Драйверы выдаются через checkout/checkin (или контекстный менеджер borrow),
+    перед выдачей проверяются на работоспособность и пересоздаются
+    по достижении max_age секунд или max_uses выдач.
+    """
+
+    def __init__(self, factory: Callable, size: int = 4, max_age: float = 1800.0, max_uses: int = 200,
+                 page_load_timeout: float = 30.0, probe_timeout: float = 5.0):
+        """
+        Args:
+            factory: Функция создания драйвера (возвращает драйвер или None при ошибке)
+            size: Максимальное число одновременно существующих драйверов
+            max_age: Максимальный возраст драйвера в секундах
+            max_uses: Максимальное число выдач одного драйвера
+            page_load_timeout: Рабочий таймаут загрузки страницы
+            probe_timeout: Таймаут загрузки страницы при проверке здоровья
+        """
+        self.factory = factory
+        self.size = size
+        self.max_age = max_age
+        self.max_uses = max_uses
+        self.page_load_timeout = page_load_timeout
+        self.probe_timeout = probe_timeout
+
+        self._idle: List[_PooledDriver] = []
+        self._busy: Dict[int, _PooledDriver] = {}
+        self._creating = 0  # Драйверы, которые создаются прямо сейчас
+        self._condition = threading.Condition()
+        self._closed = False
+
+    @property
+    def total(self) -> int:
+        """Число существующих драйверов (свободных и выданных)"""
+        return len(self._idle) + len(self._busy) + self._creating
+
+    def warm(self, count: Optional[int] = None):
+        """Заранее создает драйверы, чтобы первые запросы не ждали холодного старта"""
+        count = min(count or self.size, self.size)
+        while True:
+            with self._condition:
+                if self._closed or self.total >= count:
+                    return
+                self._creating += 1
+            try:
+                entry = self._create()
+            finally:
+                with self._condition:
+                    self._creating -= 1
+            with self._condition:
+                self._idle.append(entry)
+                self._condition.notify()
+
+    def checkout(self, timeout: Optional[float] = None):
+        """
+        Выдает работоспособный драйвер
+
+        Args:
+            timeout: Сколько ждать освобождения драйвера, если пул заполнен (None - без ограничения)
+
+        Raises:
+            DriverUnavailableError: Пул закрыт, истек таймаут или драйвер не удалось создать
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            with self._condition:
+                entry = None
+                while True:
+                    if self._closed:
+                        raise DriverUnavailableError("Пул драйверов закрыт")
+                    if self._idle:
+                        entry = self._idle.pop()
+                        break
+                    if self.total < self.size:
+                        break
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise DriverUnavailableError("Нет свободных драйверов в пуле")
+                    self._condition.wait(remaining)
+
+                if entry is None:
+                    # Резервируем место под новый драйвер до его создания
+                    self._creating += 1
+
+            if entry is None:
+                try:
+                    entry = self._create()
+                finally:
+                    with self._condition:
+                        self._creating -= 1
+                        self._condition.notify()
+            elif not self._is_healthy(entry):
+                self._discard(entry)
+                continue
+
+            with self._condition:
+                entry.uses += 1
+                self._busy[id(entry.driver)] = entry
+            return entry.driver
+
+    def checkin(self, driver, broken: bool = False):
+        """Возвращает драйвер в пул; сломанные и устаревшие драйверы закрываются"""
+        with self._condition:
+            entry = self._busy.pop(id(driver), None)
+            self._condition.notify()
+        if entry is None:
+            return
+
+        if broken or self._closed or self._is_expired(entry):
+            self._discard(entry)
+            return
+
+        with self._condition:
+            self._idle.append(entry)
+            self._condition.notify()
+
+    @contextmanager
+    def borrow(self, timeout: Optional[float] = None):
+        """Контекстный менеджер для checkout/checkin"""
+        driver = self.checkout(timeout)
+        broken = False
+        try:
+            yield driver
+        except Exception:
+            broken = not self._is_alive(driver)
+            raise
+        finally:
+            self.checkin(driver, broken=broken)
+
+    def shutdown(self):
+        """Закрывает все свободные драйверы; выданные закроются при возврате"""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._condition.notify_all()
+        for entry in idle:
+            self._quit(entry.driver)
+
+    def _create(self) -> _PooledDriver:
+        driver = self.factory()
+        if driver is None:
+            raise DriverUnavailableError("Не удалось создать драйвер")
+        return _PooledDriver(driver)
+
+    def _is_expired(self, entry: _PooledDriver) -> bool:
+        return entry.age > self.max_age or entry.uses >= self.max_uses
+
+    def _is_healthy(self, entry: _PooledDriver) -> bool:
+        """Проверка возраста и живости сессии перед выдачей"""
+        if self._is_expired(entry):
+            return False
+        return self._is_alive(entry.driver)
+
+    def _is_alive(self, driver) -> bool:
+        """
+        Проверка на упавшую сессию
+
+        Сессия считается живой, если браузер отвечает на скрипт при коротком
+        таймауте загрузки страницы; после проверки таймаут восстанавливается.
+        """
+        if getattr(driver, 'session_id', True) is None:
+            return False
+        try:
+            driver.set_page_load_timeout(self.probe_timeout)
+            driver.execute_script("return document.readyState")
+            driver.set_page_load_timeout(self.page_load_timeout)
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, entry: _PooledDriver):
+        self._quit(entry.driver)
+        with self._condition:
+            self._condition.notify()
+
+    @staticmethod
+    def _quit(driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+
+_shared_pool: Optional[WebDriverPool] = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_shared_driver_pool(factory: Callable, size: int = 4, **kwargs) -> WebDriverPool:
+    """
+    Возвращает общий для процесса пул драйверов
+
+    Пул создается при первом вызове; последующие вызовы переиспользуют его
+    и при необходимости увеличивают размер до запрошенного.
+    """
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None or _shared_pool._closed:
+            _shared_pool = WebDriverPool(factory, size=size, **kwargs)
+        elif size > _shared_pool.size:
+            _shared_pool.size = size
+        return _shared_pool
+
+
+def shutdown_shared_driver_pool():
+    """Закрывает общий пул драйверов"""
+    global _shared_pool
+    with _shared_pool_lock:
+        pool, _shared_pool = _shared_pool, None
+    if pool is not None:
+        pool.shutdown()
+
+
+atexit.register(shutdown_shared_driver_pool)
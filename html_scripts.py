@@ -0,0 +1,110 @@
+import re
+from functools import lru_cache
+from typing import List, Optional
+
+PARSER_BACKENDS = ("auto", "regex", "lxml", "selectolax", "bs4")
+
+_SCRIPT_RE = re.compile(r'<script\b([^>]*)>(.*?)</script\s*>', re.IGNORECASE | re.DOTALL)
+_SCRIPT_END_RE = re.compile(r'</script\s*>', re.IGNORECASE)
+# Атрибут тега целиком: имя и необязательное значение в кавычках или без,
+# чтобы "id" внутри имени (data-id) или значения другого атрибута не принимался за id
+_ATTRIBUTE = r'''\s+[^\s"'>/=]+(?:\s*=\s*(?:"[^"]*"|'[^']*'|[^\s"'>]+))?'''
+
+
+@lru_cache(maxsize=32)
+def _script_open_tag_re(script_id: str) -> re.Pattern:
+    value = re.escape(script_id)
+    return re.compile(
+        r'''<script(?:%s)*?\s+id\s*=\s*(?:"%s"|'%s'|%s(?=[\s>/]))(?:%s)*\s*/?>'''
+        % (_ATTRIBUTE, value, value, value, _ATTRIBUTE),
+        re.IGNORECASE
+    )
+
+
+def _resolve_backend(backend: str) -> str:
+    if backend not in PARSER_BACKENDS:
+        raise ValueError(f"Неизвестный парсер '{backend}', доступны: {', '.join(PARSER_BACKENDS)}")
+    # Точечный токенизатор не строит дерево и не требует зависимостей
+    return "regex" if backend == "auto" else backend
+
+
+def extract_scripts(html: str, script_id: Optional[str] = None, contains: Optional[str] = None,
+                    backend: str = "auto") -> List[str]:
+    """
+    Извлекает содержимое тегов <script> без построения полного дерева документа
+
+    Args:
+        html: HTML страницы
+        script_id: Оставить только скрипт с этим id
+        contains: Оставить только скрипты, содержащие эту подстроку
+        backend: "auto" | "regex" (точечный токенизатор) | "lxml" | "selectolax" | "bs4" (SoupStrainer)
+
+    Returns:
+        Список содержимого скриптов в порядке следования на странице (пустые пропускаются)
+    """
+    backend = _resolve_backend(backend)
+
+    if backend == "regex":
+        if script_id is not None:
+            payload = _extract_script_by_id_regex(html, script_id)
+            payloads = [payload] if payload is not None else []
+        else:
+            payloads = [match.group(2) for match in _SCRIPT_RE.finditer(html)]
+    elif backend == "lxml":
+        payloads = _extract_lxml(html, script_id)
+    elif backend == "selectolax":
+        payloads = _extract_selectolax(html, script_id)
+    else:
+        payloads = _extract_bs4(html, script_id)
+
+    return [payload for payload in payloads if payload and (contains is None or contains in payload)]
+
+
+def extract_script_by_id(html: str, script_id: str, backend: str = "auto") -> Optional[str]:
+    """Содержимое скрипта с заданным id или None, если его нет на странице"""
+    payloads = extract_scripts(html, script_id=script_id, backend=backend)
+    return payloads[0] if payloads else None
+
+
+def _extract_script_by_id_regex(html: str, script_id: str) -> Optional[str]:
+    """Поиск открывающего тега по id и ближайшего закрывающего - два прохода re по строке"""
+    open_tag = _script_open_tag_re(script_id).search(html)
+    if open_tag is None:
+        return None
+    end = _SCRIPT_END_RE.search(html, open_tag.end())
+    if end is None:
+        return None
+    return html[open_tag.end():end.start()]
+
+
+def _extract_lxml(html: str, script_id: Optional[str]) -> List[str]:
+    import lxml.html
+
+    root = lxml.html.fromstring(html)
+    if script_id is not None:
+        scripts = root.xpath('//script[@id=$script_id]', script_id=script_id)[:1]
+    else:
+        scripts = root.iter('script')
+    return [script.text or "" for script in scripts]
+
+
+def _extract_selectolax(html: str, script_id: Optional[str]) -> List[str]:
+    from selectolax.parser import HTMLParser
+
+    tree = HTMLParser(html)
+    if script_id is not None:
+        node = tree.css_first(f'script[id="{script_id}"]')
+        nodes = [node] if node is not None else []
+    else:
+        nodes = tree.css('script')
+    return [node.text(deep=True) for node in nodes]
+
+
+def _extract_bs4(html: str, script_id: Optional[str]) -> List[str]:
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    # В дерево попадают только теги script
+    strainer = SoupStrainer('script', id=script_id) if script_id is not None else SoupStrainer('script')
+    soup = BeautifulSoup(html, 'html.parser', parse_only=strainer)
+    scripts = soup.find_all('script', limit=1 if script_id is not None else None)
+    return [script.string or "" for script in scripts]
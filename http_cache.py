@@ -0,0 +1,268 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any, Optional
+
+# Время жизни записей по умолчанию: страницы продуктов банков меняются редко
+DEFAULT_TTL = 12 * 60 * 60
+DEFAULT_MAX_SIZE = 512 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    method TEXT NOT NULL,
+    url TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    content_type TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access);
+CREATE INDEX IF NOT EXISTS entries_content_hash ON entries (content_hash);
+CREATE TABLE IF NOT EXISTS blobs (
+    content_hash TEXT PRIMARY KEY,
+    size INTEGER NOT NULL
+);
+"""
+
+
+@dataclass
+class CacheEntry:
+    key: str
+    url: str
+    status: int
+    body: bytes
+    content_type: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    expires_at: float
+
+    @property
+    def is_fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+
+def cache_key(method: str, url: str, body: Any = None) -> str:
+    """Ключ записи: метод, URL и (для POST) тело запроса в каноническом виде"""
+    key_source = f"{method.upper()} {url}"
+    if body is not None:
+        if not isinstance(body, (str, bytes)):
+            body = json.dumps(body, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        key_source += " " + hashlib.sha256(body).hexdigest()
+    return hashlib.sha256(key_source.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """
+    Дисковый кеш HTTP-ответов
+
+    Тела ответов хранятся сжатыми (zlib) и адресуются по хешу содержимого,
+    поэтому одинаковые ответы на разные запросы занимают место один раз.
+    Индекс записей (TTL, ETag/Last-Modified, время доступа) хранится в SQLite;
+    при превышении max_size вытесняются давно не использованные записи.
+    """
+
+    def __init__(self, cache_dir: str = "http_cache", max_size: int = DEFAULT_MAX_SIZE,
+                 default_ttl: float = DEFAULT_TTL, compression_level: int = 6):
+        """
+        Args:
+            cache_dir: Директория кеша
+            max_size: Максимальный суммарный размер сжатых тел, байт
+            default_ttl: Время жизни записи по умолчанию, сек
+            compression_level: Уровень сжатия zlib
+        """
+        self.cache_dir = cache_dir
+        self.blobs_dir = os.path.join(cache_dir, "blobs")
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+        self.compression_level = compression_level
+
+        os.makedirs(self.blobs_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(cache_dir, "index.sqlite"), check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Возвращает запись (в том числе устаревшую) или None"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT url, content_hash, status, content_type, etag, last_modified, expires_at "
+                "FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            url, content_hash, status, content_type, etag, last_modified, expires_at = row
+
+            body = self._read_blob(content_hash)
+            if body is None:
+                self._delete_entry(key, content_hash)
+                self._db.commit()
+                return None
+
+            self._db.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+
+        return CacheEntry(key, url, status, body, content_type or "", etag, last_modified, expires_at)
+
+    def put(self, key: str, method: str, url: str, body: bytes, status: int = 200,
+            content_type: str = "", etag: Optional[str] = None, last_modified: Optional[str] = None,
+            ttl: Optional[float] = None):
+        """Сохраняет ответ в кеш"""
+        content_hash = hashlib.sha256(body).hexdigest()
+        now = time.time()
+        expires_at = now + (self.default_ttl if ttl is None else ttl)
+
+        with self._lock:
+            previous = self._db.execute("SELECT content_hash FROM entries WHERE key = ?", (key,)).fetchone()
+
+            if self._db.execute("SELECT 1 FROM blobs WHERE content_hash = ?", (content_hash,)).fetchone() is None:
+                size = self._write_blob(content_hash, body)
+                self._db.execute("INSERT INTO blobs (content_hash, size) VALUES (?, ?)", (content_hash, size))
+
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (key, method, url, content_hash, status, content_type, etag, "
+                "last_modified, stored_at, expires_at, last_access) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, method.upper(), url, content_hash, status, content_type, etag, last_modified,
+                 now, expires_at, now)
+            )
+            if previous and previous[0] != content_hash:
+                self._release_blob(previous[0])
+
+            self._evict()
+            self._db.commit()
+
+    def refresh(self, key: str, ttl: Optional[float] = None, etag: Optional[str] = None,
+                last_modified: Optional[str] = None):
+        """Продлевает срок жизни записи после успешной ревалидации (ответ 304)"""
+        now = time.time()
+        expires_at = now + (self.default_ttl if ttl is None else ttl)
+        with self._lock:
+            self._db.execute(
+                "UPDATE entries SET expires_at = ?, last_access = ?, etag = COALESCE(?, etag), "
+                "last_modified = COALESCE(?, last_modified) WHERE key = ?",
+                (expires_at, now, etag, last_modified, key)
+            )
+            self._db.commit()
+
+    def total_size(self) -> int:
+        """Суммарный размер сжатых тел в кеше, байт"""
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+
+    def clear(self):
+        """Полностью очищает кеш"""
+        with self._lock:
+            for (content_hash,) in self._db.execute("SELECT content_hash FROM blobs").fetchall():
+                self._remove_blob_file(content_hash)
+            self._db.execute("DELETE FROM entries")
+            self._db.execute("DELETE FROM blobs")
+            self._db.commit()
+
+    def _evict(self):
+        """Вытеснение давно не использованных записей до 90% от max_size"""
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        if total <= self.max_size:
+            return
+
+        target = self.max_size * 0.9
+        rows = self._db.execute("SELECT key, content_hash FROM entries ORDER BY last_access").fetchall()
+        for key, content_hash in rows:
+            if total <= target:
+                break
+            total -= self._delete_entry(key, content_hash)
+
+    def _delete_entry(self, key: str, content_hash: str) -> int:
+        self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+        return self._release_blob(content_hash)
+
+    def _release_blob(self, content_hash: str) -> int:
+        """Удаляет тело, если на него больше не ссылается ни одна запись; возвращает освобожденный размер"""
+        if self._db.execute("SELECT 1 FROM entries WHERE content_hash = ? LIMIT 1", (content_hash,)).fetchone():
+            return 0
+        row = self._db.execute("SELECT size FROM blobs WHERE content_hash = ?", (content_hash,)).fetchone()
+        self._db.execute("DELETE FROM blobs WHERE content_hash = ?", (content_hash,))
+        self._remove_blob_file(content_hash)
+        return row[0] if row else 0
+
+    def _blob_path(self, content_hash: str) -> str:
+        return os.path.join(self.blobs_dir, content_hash[:2], content_hash + ".z")
+
+    def _write_blob(self, content_hash: str, body: bytes) -> int:
+        path = self._blob_path(content_hash)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = zlib.compress(body, self.compression_level)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return len(data)
+
+    def _read_blob(self, content_hash: str) -> Optional[bytes]:
+        try:
+            with open(self._blob_path(content_hash), 'rb') as f:
+                return zlib.decompress(f.read())
+        except (OSError, zlib.error):
+            return None
+
+    def _remove_blob_file(self, content_hash: str):
+        try:
+            os.remove(self._blob_path(content_hash))
+        except OSError:
+            pass
+
+
+class _NoCache:
+    def __repr__(self):
+        return "NO_CACHE"
+
+
+# Передается в параметр cache вместо кеша, чтобы отключить кеширование:
+# cache=None означает общий кеш процесса
+NO_CACHE = _NoCache()
+
+_default_cache: Optional[ResponseCache] = None
+_default_cache_configured = False
+_default_cache_lock = threading.Lock()
+
+
+def configure_cache(cache_dir: Optional[str] = "http_cache", **kwargs) -> Optional[ResponseCache]:
+    """
+    Настраивает общий кеш ответов процесса
+
+    Args:
+        cache_dir: Директория кеша; None отключает кеширование
+        **kwargs: Параметры ResponseCache (max_size, default_ttl, compression_level)
+    """
+    global _default_cache, _default_cache_configured
+    with _default_cache_lock:
+        _default_cache = ResponseCache(cache_dir, **kwargs) if cache_dir else None
+        _default_cache_configured = True
+        return _default_cache
+
+
+def get_default_cache() -> Optional[ResponseCache]:
+    """Общий кеш ответов процесса (создается с настройками по умолчанию при первом обращении)"""
+    global _default_cache, _default_cache_configured
+    with _default_cache_lock:
+        if not _default_cache_configured:
+            _default_cache = ResponseCache()
+            _default_cache_configured = True
+        return _default_cache
+
+
+def resolve_cache(cache) -> Optional[ResponseCache]:
+    """Кеш для запросов: переданный, общий кеш процесса (None) или никакого (NO_CACHE)"""
+    if cache is NO_CACHE:
+        return None
+    return cache if cache is not None else get_default_cache()
@@ -0,0 +1,167 @@
+import json
+import threading
+from contextlib import nullcontext
+from typing import Any, Callable, ContextManager, Dict, Optional
+
+from curl_cffi import requests as cffi_requests
+
+from http_cache import ResponseCache, cache_key, resolve_cache
+
+# Профиль браузера, под который маскируются запросы по умолчанию
+DEFAULT_IMPERSONATE = "safari15_5"
+
+_local = threading.local()
+
+
+class HTTPStatusError(Exception):
+    """Ответ с кодом ошибки (4xx/5xx)"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class CachedResponse:
+    """Ответ, полученный из сети или из кеша (минимальный интерфейс ответа requests)"""
+
+    def __init__(self, url: str, status_code: int, text: str, headers: Optional[Dict[str, str]] = None,
+                 from_cache: bool = False):
+        self.url = url
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+        self.from_cache = from_cache
+
+    @property
+    def content(self) -> bytes:
+        return self.text.encode('utf-8')
+
+    def json(self) -> Any:
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise HTTPStatusError(f"HTTP {self.status_code} для {self.url}", self.status_code)
+
+
+def get_session(impersonate: str = DEFAULT_IMPERSONATE) -> cffi_requests.Session:
+    """
+    Возвращает сессию curl_cffi для текущего потока
+
+    Сессии переиспользуются между запросами (keep-alive, TLS-сессии),
+    по одной на поток и профиль браузера.
+    """
+    sessions = getattr(_local, 'sessions', None)
+    if sessions is None:
+        sessions = _local.sessions = {}
+
+    session = sessions.get(impersonate)
+    if session is None:
+        session = sessions[impersonate] = cffi_requests.Session(impersonate=impersonate)
+    return session
+
+
+def http_get(url: str, impersonate: str = DEFAULT_IMPERSONATE, **kwargs):
+    """GET запрос через пул сессий"""
+    return get_session(impersonate).get(url, **kwargs)
+
+
+def http_post(url: str, impersonate: str = DEFAULT_IMPERSONATE, **kwargs):
+    """POST запрос через пул сессий"""
+    return get_session(impersonate).post(url, **kwargs)
+
+
+def cached_get(url: str, ttl: Optional[float] = None, cache: Optional[ResponseCache] = None,
+               impersonate: str = DEFAULT_IMPERSONATE,
+               throttle: Optional[Callable[[str], ContextManager]] = None, revalidate: bool = False,
+               **kwargs) -> CachedResponse:
+    """
+    GET запрос через дисковый кеш
+
+    Свежая запись возвращается без обращения к сети, устаревшая - ревалидируется
+    условным запросом (If-None-Match / If-Modified-Since).
+
+    Args:
+        url: Адрес
+        ttl: Время жизни записи, сек (по умолчанию - из настроек кеша)
+        cache: Кеш (по умолчанию - общий кеш процесса, NO_CACHE - без кеширования)
+        impersonate: Профиль браузера curl_cffi
+        throttle: Ограничитель частоты (например, HostPoliteness.slot); применяется только к сетевым запросам
+        revalidate: Ревалидировать и свежую запись (принудительное обновление)
+        **kwargs: Параметры запроса curl_cffi (headers, timeout, verify, ...)
+    """
+    return _cached_request(
+        "GET", url, None, ttl, cache, throttle, revalidate,
+        lambda headers: http_get(url, impersonate=impersonate, **_with_headers(kwargs, headers))
+    )
+
+
+def cached_post(url: str, json_body: Any, ttl: Optional[float] = None, cache: Optional[ResponseCache] = None,
+                impersonate: str = DEFAULT_IMPERSONATE,
+                throttle: Optional[Callable[[str], ContextManager]] = None, revalidate: bool = False,
+                **kwargs) -> CachedResponse:
+    """POST запрос с JSON-телом через дисковый кеш; тело запроса входит в ключ записи"""
+    return _cached_request(
+        "POST", url, json_body, ttl, cache, throttle, revalidate,
+        lambda headers: http_post(url, impersonate=impersonate, json=json_body, **_with_headers(kwargs, headers))
+    )
+
+
+def _with_headers(kwargs: Dict[str, Any], extra_headers: Dict[str, str]) -> Dict[str, Any]:
+    if not extra_headers:
+        return kwargs
+    merged = dict(kwargs)
+    merged['headers'] = {**(kwargs.get('headers') or {}), **extra_headers}
+    return merged
+
+
+def _cached_request(method: str, url: str, body: Any, ttl: Optional[float], cache: Optional[ResponseCache],
+                    throttle: Optional[Callable[[str], ContextManager]], revalidate: bool,
+                    send: Callable[[Dict[str, str]], Any]) -> CachedResponse:
+    cache = resolve_cache(cache)
+    if cache is None:
+        with throttle(url) if throttle else nullcontext():
+            response = send({})
+        return CachedResponse(url, response.status_code, response.text, dict(response.headers))
+
+    key = cache_key(method, url, body)
+    entry = cache.get(key)
+    if entry is not None and entry.is_fresh and not revalidate:
+        return CachedResponse(url, entry.status, entry.body.decode('utf-8'),
+                              {'Content-Type': entry.content_type}, from_cache=True)
+
+    conditional_headers = {}
+    if entry is not None:
+        if entry.etag:
+            conditional_headers['If-None-Match'] = entry.etag
+        if entry.last_modified:
+            conditional_headers['If-Modified-Since'] = entry.last_modified
+
+    try:
+        with throttle(url) if throttle else nullcontext():
+            response = send(conditional_headers)
+    except Exception:
+        # Сеть недоступна - лучше устаревший ответ, чем никакого
+        if entry is not None:
+            return CachedResponse(url, entry.status, entry.body.decode('utf-8'),
+                                  {'Content-Type': entry.content_type}, from_cache=True)
+        raise
+
+    # Заголовки ответа curl_cffi нечувствительны к регистру
+    etag = response.headers.get('ETag')
+    last_modified = response.headers.get('Last-Modified')
+    if response.status_code == 304 and entry is not None:
+        cache.refresh(key, ttl, etag, last_modified)
+        return CachedResponse(url, entry.status, entry.body.decode('utf-8'),
+                              {'Content-Type': entry.content_type}, from_cache=True)
+
+    text = response.text
+    if response.status_code == 200:
+        cache.put(
+            key, method, url, text.encode('utf-8'), status=200,
+            content_type=response.headers.get('Content-Type') or "",
+            etag=etag,
+            last_modified=last_modified,
+            ttl=ttl
+        )
+    return CachedResponse(url, response.status_code, text, dict(response.headers))
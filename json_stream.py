@@ -0,0 +1,119 @@
+import json
+import re
+from functools import lru_cache
+from typing import Any, Iterator, Optional, Sequence
+
+_WHITESPACE_RE = re.compile(r'[ \t\n\r]*')
+_COLON_RE = re.compile(r'[ \t\n\r]*:')
+_decoder = json.JSONDecoder()
+
+
+@lru_cache(maxsize=64)
+def _key_pattern(key: str) -> re.Pattern:
+    return re.compile(r'"%s"\s*:' % re.escape(key))
+
+
+def _skip_whitespace(text: str, pos: int) -> int:
+    return _WHITESPACE_RE.match(text, pos).end()
+
+
+def _find_member(text: str, key: str, object_start: int) -> Optional[int]:
+    """
+    Позиция значения ключа key, лежащего непосредственно в объекте с '{' в позиции object_start
+
+    Члены объекта перебираются по порядку; значения других ключей пропускаются
+    целиком через raw_decode, так что ключи вложенных объектов не учитываются.
+    """
+    pos = _skip_whitespace(text, object_start + 1)
+    try:
+        while text.startswith('"', pos):
+            name, pos = _decoder.raw_decode(text, pos)
+            colon = _COLON_RE.match(text, pos)
+            if colon is None:
+                return None
+            pos = _skip_whitespace(text, colon.end())
+            if name == key:
+                return pos
+            _, pos = _decoder.raw_decode(text, pos)
+            pos = _skip_whitespace(text, pos)
+            if not text.startswith(',', pos):
+                return None
+            pos = _skip_whitespace(text, pos + 1)
+    except json.JSONDecodeError:
+        return None
+    return None
+
+
+def find_json_path_array(text: str, path: Sequence[str], start: int = 0) -> Optional[int]:
+    """
+    Находит в тексте начало массива, лежащего по пути ключей
+
+    Первый ключ ищется по всему тексту (поиск на уровне C через re), каждый
+    следующий - только среди ключей объекта-значения предыдущего ключа
+    (с учетом вложенности). Если путь от найденного вхождения первого ключа
+    не ведет к массиву, пробуется следующее вхождение.
+
+    Args:
+        text: Текст, содержащий JSON (например, содержимое <script>)
+        path: Путь ключей, например ("products", "list", "offers", "items")
+        start: Позиция, с которой начинать поиск
+
+    Returns:
+        Позиция символа '[' или None, если путь не найден
+    """
+    first_key = _key_pattern(path[0])
+    while True:
+        match = first_key.search(text, start)
+        if match is None:
+            return None
+        start = match.end()
+
+        pos = start
+        for key in path[1:]:
+            pos = _skip_whitespace(text, pos)
+            if not text.startswith('{', pos):
+                pos = None
+                break
+            pos = _find_member(text, key, pos)
+            if pos is None:
+                break
+        if pos is None:
+            continue
+
+        pos = _skip_whitespace(text, pos)
+        if pos < len(text) and text[pos] == '[':
+            return pos
+
+
+def iter_json_array(text: str, array_start: int) -> Iterator[Any]:
+    """
+    Поэлементно разбирает JSON-массив, начинающийся в позиции array_start
+
+    Каждый элемент разбирается json.JSONDecoder.raw_decode (C-сканер), поэтому
+    скобки внутри строк не ломают разбор, а элементы отдаются по мере разбора.
+
+    Raises:
+        json.JSONDecodeError: Некорректный JSON внутри массива
+    """
+    pos = _skip_whitespace(text, array_start + 1)
+    if text.startswith(']', pos):
+        return
+
+    while True:
+        item, pos = _decoder.raw_decode(text, pos)
+        yield item
+
+        pos = _skip_whitespace(text, pos)
+        if text.startswith(',', pos):
+            pos = _skip_whitespace(text, pos + 1)
+        elif text.startswith(']', pos):
+            return
+        else:
+            raise json.JSONDecodeError("Ожидалась ',' или ']'", text, pos)
+
+
+def iter_json_path_items(text: str, path: Sequence[str]) -> Iterator[Any]:
+    """Отдает элементы массива по пути ключей (пусто, если путь не найден)"""
+    array_start = find_json_path_array(text, path)
+    if array_start is not None:
+        yield from iter_json_array(text, array_start)
@@ -0,0 +1,78 @@
+from typing import Dict, List, Optional, Tuple
+
+from product_keywords import PRODUCT_KEYWORDS
+
+# Служебные ссылки (проверяются в href)
+SKIP_HREF_MARKERS = ['javascript:', '#', 'mailto:', 'tel:', 'void(0)']
+SOCIAL_KEYWORDS = ['facebook', 'twitter', 'instagram', 'vk.com', 'youtube',
+                   'linkedin', 'telegram', 'whatsapp', 'viber']
+# Политики и соглашения (в href или тексте ссылки)
+POLICY_KEYWORDS = ['policy', 'agreement', 'terms', 'condition', 'правил', 'соглашен']
+# Служебные разделы и продуктовые пути для ссылок без явного типа (в href)
+EXCLUDE_PATHS = ['/about', '/contact', '/news', '/press', '/career', '/job',
+                 '/support', '/help', '/login', '/register', '/signin', '/signup']
+PRODUCT_PATHS = ['/credit', '/deposit', '/card', '/mortgage', '/investment',
+                 '/insurance', '/account', '/product', '/service', '/offer',
+                 '/tariff', '/condition', '/apply', '/order', '/request']
+GENERIC_LINK_TEXTS = {'читать далее', 'подробнее', 'узнать больше'}
+
+
+class LinkClassifier:
+    """
+    Классификатор ссылок на банковские продукты
+
+    Списки ключевых слов собираются один раз при создании. Слова, которые
+    проверяются и в href, и в тексте ссылки, ищутся в одной строке из href и
+    текста, разделенных переводом строки (он не входит ни в одно ключевое
+    слово), поэтому на каждое слово приходится одна проверка вместо двух.
+
+    Порядок проверок прежний: пропуск служебных ссылок и политик, затем первый
+    тип продукта в порядке PRODUCT_KEYWORDS, затем 'other' для ссылок,
+    похожих на продуктовые.
+    """
+
+    def __init__(self, product_keywords: Optional[Dict[str, List[str]]] = None):
+        product_keywords = product_keywords or PRODUCT_KEYWORDS
+        self._skip_markers = tuple(SKIP_HREF_MARKERS + SOCIAL_KEYWORDS)
+        self._policy_keywords = tuple(POLICY_KEYWORDS)
+        self._type_keywords: Tuple[Tuple[str, Tuple[str, ...]], ...] = tuple(
+            (product_type, tuple(keywords)) for product_type, keywords in product_keywords.items()
+        )
+        self._exclude_paths = tuple(EXCLUDE_PATHS)
+        self._product_paths = tuple(PRODUCT_PATHS)
+
+    def classify(self, href: str, link_text: str) -> Optional[str]:
+        """
+        Тип продукта ссылки или None, если ссылка служебная или не продуктовая
+
+        Args:
+            href: href ссылки в нижнем регистре
+            link_text: Текст ссылки в нижнем регистре
+        """
+        for marker in self._skip_markers:
+            if marker in href:
+                return None
+
+        combined = href + "\n" + link_text
+        for keyword in self._policy_keywords:
+            if keyword in combined:
+                return None
+
+        for product_type, keywords in self._type_keywords:
+            for keyword in keywords:
+                if keyword in combined:
+                    return product_type
+
+        return 'other' if self.looks_like_product_link(href, link_text) else None
+
+    def looks_like_product_link(self, href: str, link_text: str) -> bool:
+        """Похожа ли ссылка на продуктовую по пути (без учета типов продуктов)"""
+        for path in self._exclude_paths:
+            if path in href:
+                return False
+        if len(link_text) < 3 or link_text in GENERIC_LINK_TEXTS:
+            return False
+        for path in self._product_paths:
+            if path in href:
+                return True
+        return False
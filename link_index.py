@@ -0,0 +1,118 @@
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from product_keywords import service_product_type
+
+
+@dataclass(frozen=True)
+class LinkScoring:
+    """
+    Веса оценки ссылки на продукт (значения по умолчанию - исходная эвристика агента)
+
+    Слово запроса учитывается, если оно длиннее min_keyword_length и входит
+    в текст или URL ссылки; из описания продукта берутся первые
+    detail_keywords слов. Ссылка принимается при оценке не ниже threshold.
+    """
+    type_match: int = 3
+    service_keyword: int = 2
+    detail_keyword: int = 1
+    text_marker: int = 1
+    url_marker: int = 2
+    min_keyword_length: int = 3
+    detail_keywords: int = 8
+    threshold: int = 3
+    text_markers: Tuple[str, ...] = ('оформить', 'подробнее', 'условия')
+    url_markers: Tuple[str, ...] = ('оформить', 'заявк')
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class ProductLinkIndex:
+    """
+    Индекс ссылок на продукты одного банка для поиска точной ссылки на услугу
+
+    Строится один раз по списку ссылок: триграммы текста и URL -> ссылки,
+    тип продукта -> ссылки, а бонусы за маркеры ("оформить", "заявк", ...)
+    считаются заранее. Для запроса оцениваются только ссылки-кандидаты,
+    у которых есть хотя бы одно совпадение; подстрочные совпадения
+    проверяются так же, как в линейном переборе, поэтому результат
+    (включая выбор первой ссылки при равных оценках) совпадает с ним.
+    """
+
+    def __init__(self, links: List[Dict[str, Any]], scoring: Optional[LinkScoring] = None):
+        self.scoring = scoring or LinkScoring()
+        self.links = links
+        self._texts = [link['text'].lower() for link in links]
+        self._urls = [link['url'].lower() for link in links]
+
+        self._by_type: Dict[str, List[int]] = {}
+        self._by_trigram: Dict[str, Set[int]] = {}
+        self._marker_bonus: Dict[int, int] = {}
+        for index, link in enumerate(links):
+            self._by_type.setdefault(link['type'], []).append(index)
+            for trigram in _trigrams(self._texts[index]) | _trigrams(self._urls[index]):
+                self._by_trigram.setdefault(trigram, set()).add(index)
+
+            bonus = 0
+            if any(marker in self._texts[index] for marker in self.scoring.text_markers):
+                bonus += self.scoring.text_marker
+            if any(marker in self._urls[index] for marker in self.scoring.url_markers):
+                bonus += self.scoring.url_marker
+            if bonus:
+                self._marker_bonus[index] = bonus
+
+    def __len__(self) -> int:
+        return len(self.links)
+
+    def _containing(self, keyword: str) -> Iterable[int]:
+        """Ссылки, в тексте или URL которых есть keyword"""
+        postings = []
+        for trigram in _trigrams(keyword):
+            posting = self._by_trigram.get(trigram)
+            if not posting:
+                return ()
+            postings.append(posting)
+        postings.sort(key=len)
+        candidates = set.intersection(*postings) if postings else range(len(self.links))
+        # Триграммы могли найтись в разных полях - проверяем вхождение целиком
+        return [index for index in candidates
+                if keyword in self._texts[index] or keyword in self._urls[index]]
+
+    def scores(self, service_type: str, product_details: str) -> Dict[int, int]:
+        """Ненулевые оценки ссылок (индекс в links -> оценка)"""
+        scoring = self.scoring
+        service_type_lower = service_type.lower()
+
+        scores: Counter = Counter(self._marker_bonus)
+        target_type = service_product_type(service_type_lower)
+        if target_type and scoring.type_match:
+            for index in self._by_type.get(target_type, ()):
+                scores[index] += scoring.type_match
+
+        # Повторяющиеся слова учитываются столько раз, сколько встречаются в запросе
+        keyword_weights: Counter = Counter()
+        for keyword in service_type_lower.split():
+            if len(keyword) > scoring.min_keyword_length:
+                keyword_weights[keyword] += scoring.service_keyword
+        for keyword in product_details.lower().split()[:scoring.detail_keywords]:
+            if len(keyword) > scoring.min_keyword_length:
+                keyword_weights[keyword] += scoring.detail_keyword
+
+        for keyword, weight in keyword_weights.items():
+            if weight:
+                for index in self._containing(keyword):
+                    scores[index] += weight
+        return scores
+
+    def best_url(self, service_type: str, product_details: str) -> str:
+        """URL ссылки с наибольшей оценкой или "", если оценка ниже порога"""
+        best_index, best_score = None, 0
+        for index, score in self.scores(service_type, product_details).items():
+            if score > best_score or (score == best_score and best_index is not None and index < best_index):
+                best_index, best_score = index, score
+        if best_index is None or best_score < self.scoring.threshold:
+            return ""
+        return self.links[best_index]['url']
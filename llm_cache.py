@@ -0,0 +1,153 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any, List, Optional
+
+# Время жизни ответов по умолчанию: при неизменном тексте банка ответ модели переиспользуется неделю
+DEFAULT_TTL = 7 * 24 * 60 * 60
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    temperature REAL,
+    prompt_hash TEXT NOT NULL,
+    raw_text BLOB NOT NULL,
+    parsed TEXT,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access);
+"""
+
+
+def prompt_hash(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+
+
+def llm_cache_key(model: str, temperature: Optional[float], system_message: str, prompt: str) -> str:
+    """Ключ ответа: модель, температура, системное сообщение и хеш промпта"""
+    key_source = json.dumps({
+        "model": model,
+        "temperature": temperature,
+        "system": system_message,
+        "prompt": prompt_hash(prompt)
+    }, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(key_source.encode('utf-8')).hexdigest()
+
+
+@dataclass
+class LLMCacheEntry:
+    key: str
+    raw_text: str
+    parsed: Optional[List[Any]]  # Разобранный результат (например, список BenchmarkResult в виде словарей)
+    created_at: float
+    expires_at: float
+
+
+class LLMResponseCache:
+    """
+    Персистентный кеш ответов LLM
+
+    Хранит сырой текст ответа (сжатый zlib) и разобранный результат в SQLite.
+    Устаревшие записи не возвращаются; при превышении max_size вытесняются
+    давно не использованные записи.
+    """
+
+    def __init__(self, path: str = "llm_cache.sqlite", max_size: int = DEFAULT_MAX_SIZE,
+                 default_ttl: float = DEFAULT_TTL):
+        """
+        Args:
+            path: Файл базы кеша
+            max_size: Максимальный суммарный размер записей, байт
+            default_ttl: Время жизни записи по умолчанию, сек
+        """
+        self.path = path
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+
+    def get(self, key: str) -> Optional[LLMCacheEntry]:
+        """Действующая запись или None (устаревшая запись удаляется)"""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT raw_text, parsed, created_at, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            raw_text, parsed, created_at, expires_at = row
+
+            if expires_at <= now:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._db.commit()
+                return None
+
+            self._db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._db.commit()
+
+        return LLMCacheEntry(
+            key=key,
+            raw_text=zlib.decompress(raw_text).decode('utf-8'),
+            parsed=json.loads(parsed) if parsed is not None else None,
+            created_at=created_at,
+            expires_at=expires_at
+        )
+
+    def put(self, key: str, model: str, temperature: Optional[float], prompt: str, raw_text: str,
+            parsed: Optional[List[Any]] = None, ttl: Optional[float] = None):
+        """Сохраняет ответ модели и его разобранный результат"""
+        compressed = zlib.compress(raw_text.encode('utf-8'))
+        parsed_json = json.dumps(parsed, ensure_ascii=False) if parsed is not None else None
+        size = len(compressed) + len(parsed_json or "")
+        now = time.time()
+        expires_at = now + (self.default_ttl if ttl is None else ttl)
+
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, model, temperature, prompt_hash, raw_text, parsed, size, "
+                "created_at, expires_at, last_access) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, model, temperature, prompt_hash(prompt), compressed, parsed_json, size, now, expires_at, now)
+            )
+            self._evict()
+            self._db.commit()
+
+    def total_size(self) -> int:
+        """Суммарный размер записей, байт"""
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def clear(self):
+        """Полностью очищает кеш"""
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+
+    def _evict(self):
+        """Удаление устаревших записей и вытеснение давно не использованных до 90% от max_size"""
+        self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_size:
+            return
+
+        target = self.max_size * 0.9
+        rows = self._db.execute("SELECT key, size FROM responses ORDER BY last_access").fetchall()
+        for key, size in rows:
+            if total <= target:
+                break
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
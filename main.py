@@ -1,9 +1,23 @@
-from curl_cffi import requests as cffi_requests
-from bs4 import BeautifulSoup
+from http_client import cached_get
+from html_scripts import extract_script_by_id
+from component_index import ComponentIndex
+from tree_walk import iter_text_fields, normalize_whitespace
+from record_store import JsonlStore, unwrap_records
+from change_tracker import ChangeTracker
+from structured_log import ProgressReporter, add_logging_arguments, get_logger, setup_logging_from_args
+import argparse
 import json
+import time
 from datetime import datetime
 
-def extract_component_data(url, component_name, component_properties=None):
+logger = get_logger(__name__)
+
+COMPONENT_FOUND = "found"
+COMPONENT_MISSING = "missing"
+COMPONENT_ERROR = "error"
+
+
+def extract_component_data(url, component_name, component_properties=None, parser_backend="auto"):
     """
     Извлекает тексты из указанного компонента с дополнительными параметрами поиска
 
@@ -11,121 +25,143 @@ def extract_component_data(url, component_name, component_properties=None):
         url (str): URL страницы для парсинга
         component_name (str): Название компонента для поиска (например, "ModalV2" или "Tabs.TabsPanelV2")
         component_properties (dict, optional): Свойства компонента для точного поиска
+        parser_backend (str): Способ извлечения script#app_state ("auto", "regex", "lxml", "selectolax", "bs4")
 
     Returns:
         str: Строка с объединенными текстами из компонента или сообщение об ошибке
     """
+    spec = {"component": component_name, "component_properties": component_properties}
+    return extract_components_data(url, [spec], parser_backend=parser_backend)[0]
 
-    def find_component(data):
-        """Рекурсивно ищет компонент с указанным именем и свойствами в структуре JSON"""
-        if isinstance(data, dict):
-            # Проверяем совпадение по имени
-            if data.get('name') == component_name:
-                # Если заданы свойства, проверяем и их
-                if component_properties:
-                    properties_match = all(
-                        data.get('properties', {}).get(key) == value
-                        for key, value in component_properties.items()
-                    )
-                    if properties_match:
-                        return data
-                else:
-                    # Если свойства не заданы, возвращаем первый найденный компонент с таким именем
-                    return data
-
-            # Рекурсивно ищем в значениях словаря
-            for value in data.values():
-                result = find_component(value)
-                if result:
-                    return result
-
-        elif isinstance(data, list):
-            # Рекурсивно ищем в элементах списка
-            for item in data:
-                result = find_component(item)
-                if result:
-                    return result
-        return None
 
-    def extract_text_fields(obj, texts_list):
-        """Рекурсивно извлекает поля 'title' и 'text' из объекта"""
-        if isinstance(obj, dict):
-            if 'title' in obj:
-                texts_list.append(obj['title'])
-            if 'text' in obj:
-                texts_list.append(obj['text'])
-            for value in obj.values():
-                extract_text_fields(value, texts_list)
-        elif isinstance(obj, list):
-            for item in obj:
-                extract_text_fields(item, texts_list)
+def extract_components_data(url, component_specs, parser_backend="auto"):
+    """
+    Извлекает тексты сразу нескольких компонентов одной страницы
+
+    Страница загружается и разбирается один раз; компоненты ищутся по индексу,
+    построенному за один проход по app_state.
+
+    Args:
+        url (str): URL страницы для парсинга
+        component_specs (list): Список описаний компонентов вида
+            {"component": "ModalV2", "component_properties": {...} или None}
+        parser_backend (str): Способ извлечения script#app_state
+
+    Returns:
+        list: Тексты компонентов (или сообщения об ошибке) в порядке component_specs
+    """
+    return [text for text, _ in extract_components(url, component_specs, parser_backend)]
+
+
+def extract_components(url, component_specs, parser_backend="auto", revalidate=False):
+    """
+    То же, что extract_components_data, но с признаком результата для каждого компонента
+
+    Args:
+        revalidate (bool): Проверить страницу на сервере, даже если в кеше есть свежая копия
 
+    Returns:
+        list: Пары (текст или сообщение об ошибке, статус), статус - COMPONENT_FOUND,
+            COMPONENT_MISSING (страница разобрана, компонента нет) или COMPONENT_ERROR
+    """
     try:
-        response = cffi_requests.get(url, impersonate="safari15_5")
-        response.raise_for_status()
-        html_content = response.text
-        soup = BeautifulSoup(html_content, 'html.parser')
+        index = build_component_index(url, parser_backend, revalidate)
+    except json.JSONDecodeError as e:
+        return [(f"Ошибка парсинга JSON: {e}", COMPONENT_ERROR)] * len(component_specs)
+    except Exception as e:
+        return [(f"Ошибка: {e}", COMPONENT_ERROR)] * len(component_specs)
 
-        target_block = soup.find('script', id='app_state')
+    if index is None:
+        return [("Целевой блок не найден на странице.", COMPONENT_ERROR)] * len(component_specs)
 
-        if not target_block:
-            return "Целевой блок не найден на странице."
+    results = []
+    for spec in component_specs:
+        component_name = spec["component"]
+        component_properties = spec.get("component_properties")
+        try:
+            # Ищем компонент с указанными параметрами
+            component = index.find(component_name, component_properties)
 
-        # Парсим JSON content из script tag
-        data = json.loads(target_block.string)
+            if not component:
+                properties_info = f" со свойствами {component_properties}" if component_properties else ""
+                results.append((f"Компонент {component_name}{properties_info} не найден в JSON структуре",
+                                COMPONENT_MISSING))
+                continue
 
-        # Ищем компонент с указанными параметрами
-        component_data = find_component(data)
+            results.append((component_text(component.node), COMPONENT_FOUND))
+        except Exception as e:
+            results.append((f"Ошибка: {e}", COMPONENT_ERROR))
 
-        if not component_data:
-            properties_info = f" со свойствами {component_properties}" if component_properties else ""
-            return f"Компонент {component_name}{properties_info} не найден в JSON структуре"
+    return results
 
-        # Извлекаем все текстовые поля
-        found_texts = []
-        extract_text_fields(component_data, found_texts)
 
-        # Объединяем все найденные тексты в одну строку через пробел
-        result_string = ' '.join(found_texts)
+def build_component_index(url, parser_backend="auto", revalidate=False):
+    """
+    Загружает страницу и строит индекс компонентов её app_state
 
-        # Удаляем NBSP, NNBSP, THSP и другие нежелательные символы
-        result_string = (result_string
-                         .replace('\xa0', ' ')  # NBSP
-                         .replace('\u202F', ' ')  # NNBSP
-                         .replace('\u2009', ' ')  # THSP
-                         .replace('\r', ' ')  # Carriage return
-                         .replace('\n', ' ')  # New line
-                         .strip())
+    Args:
+        revalidate (bool): Проверить страницу на сервере, даже если в кеше есть свежая копия
+
+    Returns:
+        ComponentIndex или None, если на странице нет script#app_state
+    """
+    response = cached_get(url, impersonate="safari15_5", revalidate=revalidate)
+    response.raise_for_status()
+    html_content = response.text
 
-        return result_string
+    # Достаем только script#app_state, не строя дерево всей страницы
+    target_block = extract_script_by_id(html_content, 'app_state', backend=parser_backend)
+
+    if not target_block:
+        return None
+
+    # Парсим JSON content из script tag
+    return ComponentIndex(json.loads(target_block))
 
-    except json.JSONDecodeError as e:
-        return f"Ошибка парсинга JSON: {e}"
-    except Exception as e:
-        return f"Ошибка: {e}"
+
+def component_text(component_data):
+    """Объединяет все текстовые поля компонента в одну очищенную строку"""
+    # Собираем поля 'title' и 'text' обходом на явном стеке и объединяем через пробел
+    result_string = ' '.join(iter_text_fields(component_data))
+
+    # Удаляем NBSP, NNBSP, THSP и переводы строк за один проход
+    return normalize_whitespace(result_string)
 
 
 def save_to_json(data_to_save, filename="extracted_data.json", mode="overwrite"):
     """
     Усовершенствованная функция сохранения с поддержкой разных режимов
 
+    Файлы с расширением .jsonl ведутся как хранилище JSON Lines (record_store.JsonlStore):
+    добавление дописывает только новые записи, метаданные лежат в <имя>.meta.json.
+    Для истории ежедневных выгрузок следует использовать .jsonl; обычный .json
+    при добавлении перечитывается и переписывается целиком.
+
     Args:
         data_to_save (list): Список записей для сохранения
-        filename (str): Имя файла для сохранения
+        filename (str): Имя файла для сохранения (.json или .jsonl)
         mode (str): Режим сохранения - "overwrite" (перезапись) или "append" (добавление)
     """
     try:
+        if filename.endswith(".jsonl"):
+            store = JsonlStore(filename)
+            if mode == "append":
+                store.append(data_to_save)
+            else:
+                store.write(data_to_save)
+            logger.info("Успешно сохранено %d записей в %s (всего %d)", len(data_to_save), filename, len(store))
+            return True
+
         if mode == "append":
             # Пытаемся загрузить существующие данные
             try:
                 with open(filename, 'r', encoding='utf-8') as f:
-                    existing_data = json.load(f)
+                    existing_data = unwrap_records(json.load(f))
             except FileNotFoundError:
                 existing_data = []
 
             # Добавляем новые данные
-            existing_data.extend(data_to_save)
-            data_to_save = existing_data
+            data_to_save = existing_data + list(data_to_save)
 
         # Добавляем метаданные
         save_data = {
@@ -141,17 +177,28 @@ def save_to_json(data_to_save, filename="extracted_data.json", mode="overwrite")
         with open(filename, 'w', encoding='utf-8') as f:
             json.dump(save_data, f, ensure_ascii=False, indent=2)
 
-        print(f"Успешно сохранено {len(data_to_save)} записей в {filename}")
+        logger.info("Успешно сохранено %d записей в %s", len(data_to_save), filename)
         return True
 
     except Exception as e:
-        print(f"Ошибка при сохранении: {e}")
+        logger.error("Ошибка при сохранении: %s", e)
         return False
 
 
 # Структурированный подход к сбору данных
-def collect_bank_data():
-    """Централизованная функция сбора данных"""
+def collect_bank_data(incremental=False, state_file="bank_data_state.json", report_file=None):
+    """
+    Централизованная функция сбора данных
+
+    Args:
+        incremental (bool): Сравнивать компоненты с прошлым запуском (по отпечатку текста)
+            и сохранять отчет о новых, изменившихся и удаленных компонентах.
+            Возвращается всегда полный набор компонентов. Страницы при этом
+            ревалидируются на сервере: сравнение с копией из кеша изменений бы не показало
+        state_file (str): Файл с отпечатками прошлого запуска
+        report_file (str, optional): Файл отчета об изменениях
+            (по умолчанию bank_data_changes_<время>.json)
+    """
 
     # Конфигурация всех URL для сбора
     scrape_configs = [
@@ -178,42 +225,88 @@ def collect_bank_data():
         }
     ]
 
+    # Группируем конфигурации по URL: каждая страница загружается и разбирается один раз
+    configs_by_url = {}
+    for config in scrape_configs:
+        configs_by_url.setdefault(config["url"], []).append(config)
+
+    tracker = ChangeTracker(state_file) if incremental else None
     all_data = []
 
-    for config in scrape_configs:
+    progress = ProgressReporter("Страницы компонентов", total=len(configs_by_url), logger=logger)
+    for url, configs in configs_by_url.items():
         try:
-            print(f"Обрабатывается: {config['url']}")
-
-            content = extract_component_data(
-                config["url"],
-                config["component"],
-                component_properties=config["component_properties"]
-            )
-
-            all_data.append({
-                "url": config["url"],
-                "service_type": config["service_type"],
-                "component": config["component"],
-                "content": content,
-                "scrape_date": datetime.now().isoformat()
-            })
+            logger.debug("Обрабатывается: %s", url, extra={'url': url})
+            started = time.perf_counter()
+
+            results = extract_components(url, configs, revalidate=incremental)
+            logger.debug("Компоненты %s: %s", url, ", ".join(status for _, status in results),
+                         extra={'url': url, 'status': [status for _, status in results],
+                                'latency_ms': round((time.perf_counter() - started) * 1000, 1)})
+
+            for config, (content, status) in zip(configs, results):
+                if tracker is not None:
+                    key = component_key(config)
+                    if status == COMPONENT_ERROR:
+                        # Страницу не удалось разобрать - прошлое состояние не считается удаленным
+                        tracker.touch(key)
+                    elif status == COMPONENT_FOUND:
+                        info = {"url": config["url"], "service_type": config["service_type"],
+                                "component": config["component"]}
+                        tracker.check(key, content, info)
+
+                all_data.append({
+                    "url": config["url"],
+                    "service_type": config["service_type"],
+                    "component": config["component"],
+                    "content": content,
+                    "scrape_date": datetime.now().isoformat()
+                })
 
         except Exception as e:
-            print(f"Ошибка при обработке {config['url']}: {e}")
+            logger.warning("Ошибка при обработке %s: %s", url, e, extra={'url': url, 'status': COMPONENT_ERROR})
             # Можно добавить запись об ошибке в данные
-            all_data.append({
-                "url": config["url"],
-                "service_type": config["service_type"],
-                "error": str(e),
-                "scrape_date": datetime.now().isoformat()
-            })
+            for config in configs:
+                if tracker is not None:
+                    tracker.touch(component_key(config))
+                all_data.append({
+                    "url": config["url"],
+                    "service_type": config["service_type"],
+                    "error": str(e),
+                    "scrape_date": datetime.now().isoformat()
+                })
+        progress.advance()
+    progress.finish()
+
+    if tracker is not None:
+        report_file = report_file or f"bank_data_changes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        report = tracker.save_report(report_file)
+        tracker.save()
+        logger.info("Изменения с прошлого запуска (%s), отчет: %s", report.summary(), report_file)
 
     return all_data
 
 
+def component_key(config):
+    """Ключ компонента для отслеживания изменений: URL, имя и свойства компонента"""
+    key = f"{config['url']}#{config['component']}"
+    if config.get("component_properties"):
+        key += json.dumps(config["component_properties"], ensure_ascii=False, sort_keys=True)
+    return key
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Сбор текстов компонентов страниц банков")
+    parser.add_argument('--incremental', action='store_true',
+                        help='Формировать отчет о новых, изменившихся и удаленных с прошлого запуска компонентах '
+                             '(выгрузка остается полной)')
+    add_logging_arguments(parser)
+    args = parser.parse_args()
+    setup_logging_from_args(args)
+
     # Сбор данных
-    collected_data = collect_bank_data()
+    collected_data = collect_bank_data(incremental=args.incremental)
 
-    # Сохранение
-    save_to_json(collected_data, "bank_data.json")
\ No newline at end of file
+    # Сохранение: последняя выгрузка и история всех выгрузок (только дозапись)
+    save_to_json(collected_data, "bank_data.json")
+    save_to_json(collected_data, "bank_data_history.jsonl", mode="append")
\ No newline at end of file
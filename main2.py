@@ -1,110 +1,46 @@
-from curl_cffi import requests as cffi_requests
-from bs4 import BeautifulSoup
+from http_client import cached_get
+from sravni_api import SRAVNI_API_URL, SravniBatchClient
+from sravni_discovery import discover_cards, parse_bank_cards, save_catalog
+from card_specs import CARD_FLATTENER
+from card_export import save_structured_columnar
+from record_flattener import RecordFlattener
+from text_normalize import clean_html  # noqa: F401 - прежняя точка входа main2.clean_html
+from structured_log import ProgressReporter, add_logging_arguments, get_logger, setup_logging_from_args
+import argparse
 import json
-import re
-import time
-from typing import Dict, List, Optional
-import urllib.parse
+from typing import Dict, List, Optional, Tuple
 
+logger = get_logger(__name__)
 
-def get_bank_cards(url: str, service_type: str = "Дебетовая карта") -> List[Dict]:
+
+def get_bank_cards(url: str, service_type: str = "Дебетовая карта", parser_backend: str = "auto") -> List[Dict]:
     """
     Получает список всех карт банка с sravni.ru
 
     Args:
         url: URL страницы с картами банка
         service_type: Тип услуги (например, "Дебетовая карта", "Кредитная карта")
+        parser_backend: Способ извлечения скриптов ("auto", "regex", "lxml", "selectolax", "bs4")
 
     Returns:
         Список карт с id, name и service_type
     """
     try:
-        response = cffi_requests.get(url, impersonate="safari15_5")
+        response = cached_get(url, impersonate="safari15_5")
         response.raise_for_status()
-        html_content = response.text
-        soup = BeautifulSoup(html_content, 'html.parser')
-
-        # Ищем JSON данные в скриптах
-        scripts = soup.find_all('script')
-        cards_data = []
-
-        for script in scripts:
-            if not script.string:
-                continue
-
-            script_text = script.string
-
-            # Ищем конкретную структуру: "products": {"list": {"offers": {"items": [...]}}}
-            if all(keyword in script_text for keyword in ['"products":', '"list":', '"offers":', '"items":']):
-                print(f"Найдена структура продуктов для {service_type}!")
-
-                try:
-                    # Более аккуратный поиск JSON структуры
-                    start_idx = script_text.find('"products":')
-                    if start_idx == -1:
-                        continue
-
-                    # Находим начало items массива
-                    items_start = script_text.find('"items":', start_idx)
-                    if items_start == -1:
-                        continue
-
-                    # Находим начало массива [
-                    array_start = script_text.find('[', items_start)
-                    if array_start == -1:
-                        continue
-
-                    # Находим конец массива ]
-                    bracket_count = 1
-                    current_pos = array_start + 1
-
-                    while current_pos < len(script_text) and bracket_count > 0:
-                        if script_text[current_pos] == '[':
-                            bracket_count += 1
-                        elif script_text[current_pos] == ']':
-                            bracket_count -= 1
-                        current_pos += 1
-
-                    if bracket_count == 0:
-                        items_array_text = script_text[array_start:current_pos]
-
-                        # Парсим массив items
-                        try:
-                            items_data = json.loads(items_array_text)
-                            if isinstance(items_data, list):
-                                for item in items_data:
-                                    if isinstance(item, dict) and 'id' in item:
-                                        card_info = {
-                                            'id': item['id'],
-                                            'service_type': service_type  # Добавляем тип услуги
-                                        }
-                                        # Добавляем доступные поля
-                                        if 'productName' in item:
-                                            card_info['productName'] = item['productName']
-                                        if 'name' in item:
-                                            card_info['name'] = item['name']
-                                        if 'alias' in item:
-                                            card_info['alias'] = item['alias']
-
-                                        cards_data.append(card_info)
-                                        print(f"Найдена карта: {service_type} - ID={item['id']}")
-                        except json.JSONDecodeError as e:
-                            print(f"Ошибка парсинга items массива: {e}")
-
-                except Exception as e:
-                    print(f"Ошибка при обработке структуры: {e}")
-                    continue
-
-        return cards_data
+        return parse_bank_cards(response.text, service_type, parser_backend)
 
     except Exception as e:
-        print(f"Ошибка получения карт с {url}: {e}")
+        logger.warning("Ошибка получения карт с %s: %s", url, e, extra={'url': url})
         return []
 
 
 def fetch_card_details(card_id: str, product_name: str = "debit-cards", service_type: str = "Дебетовая карта") -> Optional[Dict]:
     """
-    Отправляет POST запрос для получения деталей карты
+    Получает детали одной карты из API sravni.ru
+
+    Запрос выполняется через SravniBatchClient (кеш, повторы при 429/5xx);
+    для многих карт используйте process_all_cards_with_api.
 
     Args:
         card_id: ID карты
@@ -114,87 +50,89 @@ def fetch_card_details(card_id: str, product_name: str = "debit-cards", service_
     Returns:
         Словарь с данными карты или None в случае ошибки
     """
-    api_url = "https://public.sravni.ru/v2/vitrins/product/byId"
-
-    headers = {
-        'Content-Type': 'application/json',
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-        'Accept': 'application/json, text/plain, */*',
-        'Origin': 'https://www.sravni.ru',
-        'Referer': 'https://www.sravni.ru/'
-    }
-
-    payload = {
-        "productName": product_name,
-        "id": card_id
-    }
-
-    try:
-        print(f"Отправляем запрос для {service_type} - карта {card_id} (productName: {product_name})...")
-        response = cffi_requests.post(
-            api_url,
-            json=payload,
-            headers=headers,
-            impersonate="chrome110"
-        )
-
-        if response.status_code == 200:
-            data = response.json()
-            print(f"✓ Успешно получены данные для {card_id}")
-            return data
+    logger.debug("Отправляем запрос для %s - карта %s (productName: %s)...", service_type, card_id, product_name,
+                 extra={'card_id': card_id})
+    client = SravniBatchClient(concurrency=1)
+    data = client.fetch_all([(card_id, product_name)]).get(card_id)
+
+    for stat in client.stats:
+        fields = {'url': SRAVNI_API_URL, 'card_id': card_id, 'status': stat.status,
+                  'latency_ms': round(stat.latency_ms, 1), 'attempts': stat.attempts, 'from_cache': stat.from_cache,
+                  'error': stat.error}
+        if data is None:
+            logger.warning("✗ Ошибка API для карты %s (статус: %s, попыток: %d%s)", card_id, stat.status,
+                           stat.attempts, f", {stat.error}" if stat.error else "", extra=fields)
         else:
-            print(f"✗ Ошибка API для карты {card_id}: {response.status_code}")
-            print(f"Текст ответа: {response.text[:200]}...")
-            return None
+            logger.debug("✓ Успешно получены данные для %s", card_id, extra=fields)
+    return data
 
-    except Exception as e:
-        print(f"✗ Ошибка запроса для карты {card_id}: {e}")
-        return None
 
+def product_name_for_service(service_type: str) -> str:
+    """Определяет productName для API по типу услуги"""
+    service_type_lower = service_type.lower()
+    if "кредит" in service_type_lower:
+        return "credit-cards"
+    elif "ипотек" in service_type_lower:
+        return "mortgage"
+    elif "вклад" in service_type_lower or "депозит" in service_type_lower:
+        return "deposit"
+    return "debit-cards"  # по умолчанию
 
-def process_all_cards_with_api(cards_list: List[Dict]) -> Dict[str, Dict]:
+
+def process_all_cards_with_api(cards_list: List[Dict], concurrency: int = 8, rate: float = 5.0) -> Dict[str, Dict]:
     """
     Обрабатывает все карты через API запросы
 
+    Запросы выполняются асинхронно пакетом с ограничением числа одновременных
+    запросов и их частоты, с повторами при 429/5xx.
+
     Args:
         cards_list: список карт с id, name и service_type
+        concurrency: максимум одновременных запросов к API
+        rate: максимум запросов к API в секунду
 
     Returns:
         Словарь где ключ - ID карты, значение - данные из API + service_type
     """
-    cards_details = {}
-
-    print(f"\nНачинаем обработку {len(cards_list)} карт через API...")
+    logger.info("Начинаем обработку %d карт через API (до %d одновременных запросов, %s запросов/сек)...",
+                len(cards_list), concurrency, rate)
 
-    for i, card in enumerate(cards_list, 1):
+    service_types = {}
+    requests = []
+    for card in cards_list:
         card_id = card['id']
-        card_name = card.get('name', 'Без названия')
         service_type = card.get('service_type', 'Неизвестно')
+        service_types.setdefault(card_id, service_type)
+        requests.append((card_id, product_name_for_service(service_type)))
 
-        # Определяем product_name на основе service_type
-        product_name = "debit-cards"  # по умолчанию
-        if "кредит" in service_type.lower():
-            product_name = "credit-cards"
-        elif "ипотек" in service_type.lower():
-            product_name = "mortgage"
-        elif "вклад" in service_type.lower() or "депозит" in service_type.lower():
-            product_name = "deposit"
-
-        print(f"\n[{i}/{len(cards_list)}] Обрабатываем: {service_type} - {card_name} (ID: {card_id}, productName: {product_name})")
-
-        # Отправляем POST запрос с правильным product_name
-        card_details = fetch_card_details(card_id, product_name, service_type)
-
-        if card_details:
-            # Добавляем service_type в данные карты
-            if isinstance(card_details, dict):
-                card_details['service_type'] = service_type
-            cards_details[card_id] = card_details
+    progress = ProgressReporter("Карты API", total=len(dict.fromkeys(requests)), logger=logger)
+    client = SravniBatchClient(concurrency=concurrency, rate=rate, progress=progress)
+    api_results = client.fetch_all(requests)
+    progress.finish()
+
+    cards_details = {}
+    for card_id, card_details in api_results.items():
+        # Добавляем service_type в данные карты
+        if isinstance(card_details, dict):
+            card_details['service_type'] = service_types[card_id]
+        cards_details[card_id] = card_details
+
+    for stat in client.stats:
+        fields = {'url': SRAVNI_API_URL, 'card_id': stat.card_id, 'status': stat.status,
+                  'latency_ms': round(stat.latency_ms, 1), 'attempts': stat.attempts, 'from_cache': stat.from_cache,
+                  'error': stat.error}
+        if stat.card_id not in cards_details:
+            logger.warning("⚠ Не удалось получить данные для %s (статус: %s, попыток: %d%s)",
+                           stat.card_id, stat.status, stat.attempts, f", {stat.error}" if stat.error else "",
+                           extra=fields)
         else:
-            print(f"⚠ Не удалось получить данные для {card_id}")
+            logger.debug("✓ Получены данные для %s", stat.card_id, extra=fields)
 
-        # Пауза между запросами чтобы не перегружать сервер
-        time.sleep(1)
+    latency = client.latency_summary()
+    if latency:
+        logger.info("Задержки API: p50=%.0f мс, p95=%.0f мс, max=%.0f мс (%d запросов)",
+                    latency['p50'], latency['p95'], latency['max'], latency['count'], extra=latency)
+    logger.info("Получены данные для %d из %d карт", len(cards_details), len(service_types))
 
     return cards_details
 
@@ -204,7 +142,7 @@ def save_api_results(cards_details: Dict[str, Dict], filename: str = "cards_api_
     with open(filename, 'w', encoding='utf-8') as f:
         json.dump(cards_details, f, ensure_ascii=False, indent=2)
 
-    print(f"\nРезультаты API сохранены в {filename}")
+    logger.info("Результаты API сохранены в %s", filename)
 
 
 def extract_bank_cards_from_url(url: str, service_type: str = "Дебетовая карта") -> List[Dict]:
@@ -220,195 +158,38 @@ def extract_bank_cards_from_url(url: str, service_type: str = "Дебетова
     # Убираем дубликаты
     unique_cards = []
     seen_ids = set()
-
     for card in cards:
         if card['id'] not in seen_ids:
             seen_ids.add(card['id'])
             unique_cards.append(card)
 
-    # Выводим результаты
-    if unique_cards:
-        print(f"\nНайдено уникальных карт: {len(unique_cards)}")
-        print(f"\nСписок карт ({service_type}):")
-        for i, card in enumerate(unique_cards, 1):
-            print(f"{i}. ID: {card['id']}")
-            if 'productName' in card:
-                print(f"   Название: {card['productName']}")
-            if 'name' in card:
-                print(f"   Имя: {card['name']}")
-            print(f"   Тип услуги: {card['service_type']}")
-            print()
-
-        # Сохраняем базовый список
-        filename = f"bank_cards_{service_type.replace(' ', '_').lower()}.json"
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(unique_cards, f, ensure_ascii=False, indent=2)
-        print(f"Базовый список сохранен в {filename}")
-
-        return unique_cards
-    else:
-        print(f"Не удалось найти данные о картах для {service_type}")
+    if not unique_cards:
+        logger.warning("Не удалось найти данные о картах для %s", service_type, extra={'url': url})
         return []
 
+    logger.info("Найдено уникальных карт (%s): %d", service_type, len(unique_cards), extra={'url': url})
+    for card in unique_cards:
+        logger.debug("Карта %s: %s (%s)", card['id'], card.get('name') or card.get('productName', ''),
+                     card['service_type'], extra={'url': url, 'card_id': card['id']})
 
-def prepare_structured_data_for_llm(cards_details: Dict[str, Dict]) -> Dict[str, Dict]:
-    """
-    Подготавливает структурированные данные для LLM
-    """
-    structured_cards = {}
-
-    for card_id, card_data in cards_details.items():
-        item_data = card_data.get('item', card_data)  # Если нет item, используем сам card_data
-
-        # Получаем service_type (может быть на верхнем уровне)
-        service_type = card_data.get('service_type', 'Неизвестно')
-
-        # Создаем очищенную структуру только с важными полями
-        clean_card = {
-            "id": item_data.get("id"),
-            "name": item_data.get("name"),
-            "service_type": service_type,  # Добавляем тип услуги
-            "nameAlias": item_data.get("nameAlias"),
-            "link": item_data.get("link"),
-            "description": clean_html(item_data.get("description", "")),
-            "status": item_data.get("status"),
-            "paymentSystem": item_data.get("paymentSystem", []),
-            "cardClass": item_data.get("cardCLass", []),
-            "features": item_data.get("feature", []),
-            "benefits": item_data.get("benefits", []),
-            "ageFrom": item_data.get("ageFrom"),
-            "demands": item_data.get("demands", []),
-            "currency": item_data.get("currency"),
-            "smartphone": item_data.get("smartphone", ""),
-            "maintenance": extract_maintenance_info(item_data),
-            # Кешбэк
-            "cashback": extract_cashback_info(item_data),
-            # Снятие наличных
-            "withdrawal": extract_withdrawal_info(item_data),
-            # Дополнительные условия
-            "conditions": extract_conditions_info(item_data)
-        }
-
-        # Убираем пустые поля
-        clean_card = {k: v for k, v in clean_card.items() if v not in [None, "", [], {}]}
-        structured_cards[card_id] = clean_card
-
-    return structured_cards
-
-
-def extract_maintenance_info(item_data: Dict) -> Dict:
-    """Извлекает информацию об обслуживании с учетом новой структуры"""
-    maintenance_info = {}
-
-    # Основные поля (могут быть на верхнем уровне)
-    if item_data.get("maintenancePrice") is not None:
-        maintenance_info["price"] = item_data["maintenancePrice"]
-        maintenance_info["currency"] = item_data.get("currencyMaintenance", "RUB")
-        maintenance_info["frequency"] = item_data.get("frequencyNew", "")
-
-    if item_data.get("maintenanceComment"):
-        maintenance_info["comment"] = clean_html(item_data["maintenanceComment"])
-
-    if item_data.get("conditionsNew"):
-        maintenance_info["conditions"] = item_data["conditionsNew"]
-
-    # Детали из maintenanceReleaseFeeTab
-    maintenance_details = []
-    for maint_id, maint_data in item_data.get("maintenanceReleaseFeeTab", {}).items():
-        detail = {}
-        if maint_data.get("maintenancePrice") is not None:
-            detail["price"] = maint_data["maintenancePrice"]
-            detail["type"] = maint_data.get("maintenanceRelease", [])
-            detail["frequency"] = maint_data.get("frequencyNew", "")
-            if maint_data.get("conditionsNew"):
-                detail["conditions"] = maint_data["conditionsNew"]
-            maintenance_details.append(detail)
-
-    if maintenance_details:
-        maintenance_info["details"] = maintenance_details
-
-    return maintenance_info
-
-
-def extract_cashback_info(item_data: Dict) -> Dict:
-    """Извлекает информацию о кешбэке с учетом новой структуры"""
-    cashback_info = {}
-
-    # Основные поля
-    if item_data.get("cashbackValue") is not None:
-        cashback_info["value"] = item_data["cashbackValue"]
-
-    if item_data.get("cashbackMaxValue") is not None:
-        cashback_info["maxValue"] = item_data["cashbackMaxValue"]
-        cashback_info["maxValueType"] = item_data.get("cashbackMaxValueType", "")
-
-    if item_data.get("cashbackComment"):
-        cashback_info["comment"] = item_data["cashbackComment"]
-
-    if item_data.get("cashbackDescription"):
-        cashback_info["description"] = clean_html(item_data["cashbackDescription"])
-
-    # Категории кешбэка
-    categories = []
-    for cb_id, cb_data in item_data.get("cashbackCategoriesTab", {}).items():
-        category_info = {
-            "categories": cb_data.get("cashbackCategories", []),
-            "value": cb_data.get("cashbackValue"),
-            "comment": cb_data.get("cashbackComment", "")
-        }
-        if cb_data.get("cashbackMaxValue") is not None:
-            category_info["maxValue"] = cb_data["cashbackMaxValue"]
-            category_info["maxValueType"] = cb_data.get("cashbackMaxValueType", "")
-        categories.append(category_info)
-
-    if categories:
-        cashback_info["categories"] = categories
-
-    if item_data.get("cashbackCategories"):
-        cashback_info["allCategories"] = item_data["cashbackCategories"]
-
-    return cashback_info
-
-
-def extract_withdrawal_info(item_data: Dict) -> Dict:
-    """Извлекает информацию о снятии наличных с учетом новой структуры"""
-    withdrawal_info = {}
-
-    # Основные поля
-    if item_data.get("withdrawRateFrom") is not None:
-        withdrawal_info["rateFrom"] = item_data["withdrawRateFrom"]
-
-    if item_data.get("withdrawRateTo") is not None:
-        withdrawal_info["rateTo"] = item_data["withdrawRateTo"]
-
-    if item_data.get("withdrawComment"):
-        withdrawal_info["comment"] = clean_html(item_data["withdrawComment"])
-
-    if item_data.get("withdrawPlace"):
-        withdrawal_info["places"] = item_data["withdrawPlace"]
-
-    return withdrawal_info
-
-
-def extract_conditions_info(item_data: Dict) -> Dict:
-    """Извлекает дополнительные условия с учетом новой структуры"""
-    conditions_info = {}
+    # Сохраняем базовый список
+    filename = f"bank_cards_{service_type.replace(' ', '_').lower()}.json"
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(unique_cards, f, ensure_ascii=False, indent=2)
+    logger.info("Базовый список сохранен в %s", filename)
 
-    for cond_id, cond_data in item_data.get("conditionsTab", {}).items():
-        if cond_data.get("additionalConditions"):
-            conditions_info[cond_id] = clean_html(cond_data["additionalConditions"])
+    return unique_cards
 
-    return conditions_info
 
+def prepare_structured_data_for_llm(cards_details: Dict[str, Dict],
+                                    flattener: RecordFlattener = CARD_FLATTENER) -> Dict[str, Dict]:
+    """
+    Подготавливает структурированные данные для LLM
 
-def clean_html(text: str) -> str:
-    """Очищает HTML теги, но сохраняет структуру текста"""
-    if not text:
-        return ""
-    # Убираем теги, но сохраняем переносы строк
-    text = re.sub(r'<[^>]+>', ' ', text)
-    text = re.sub(r'\s+', ' ', text)
-    return text.strip()
+    Поля карточки (обслуживание, кешбэк, снятие наличных, дополнительные условия)
+    извлекаются по схеме CARD_SPECS из card_specs; пустые поля верхнего уровня отбрасываются.
+    """
+    return flattener.flatten_many(cards_details)
 
 
 def save_structured_for_llm(structured_cards: Dict[str, Dict], filename: str = "cards_structured_llm.json"):
@@ -416,35 +197,25 @@ def save_structured_for_llm(structured_cards: Dict[str, Dict], filename: str = "
     with open(filename, 'w', encoding='utf-8') as f:
         json.dump(structured_cards, f, ensure_ascii=False, indent=2)
 
-    print(f"Структурированные данные для LLM сохранены в {filename}")
-
-
-# Примеры использования с разными URL и типами услуг
-BANK_CONFIGS = [
-    {
-        "url": "https://www.sravni.ru/debetovye-karty/bank/t-bank/",
-        "service_type": "Дебетовая карта",
-        "product_name": "debit-cards"
-    },
-    {
-        "url": "https://www.sravni.ru/karty/bank/t-bank/",
-        "service_type": "Кредитная карта",
-        "product_name": "credit-cards"
-    }
+    logger.info("Структурированные данные для LLM сохранены в %s", filename)
+
+
+# Банки и продукты sravni.ru: (slug банка, productName API).
+# Чтобы обойти все банки со страниц-каталогов sravni.ru по всем продуктам,
+# замените список на None (см. sravni_discovery.discover_cards)
+BANK_PRODUCTS: Optional[List[Tuple[str, str]]] = [
+    ("t-bank", "debit-cards"),
+    ("t-bank", "credit-cards"),
 ]
 
 if __name__ == "__main__":
-    all_cards = []
-
-    # Обрабатываем несколько типов услуг
-    for config in BANK_CONFIGS:
-        print(f"\n{'=' * 50}")
-        print(f"Обрабатываем: {config['service_type']}")
-        print(f"URL: {config['url']}")
-        print(f"{'=' * 50}")
+    parser = argparse.ArgumentParser(description="Сбор карт банков с sravni.ru")
+    add_logging_arguments(parser)
+    setup_logging_from_args(parser.parse_args())
 
-        cards = extract_bank_cards_from_url(config['url'], config['service_type'])
-        all_cards.extend(cards)
+    # Витрины всех пар обходятся параллельно, карты дедуплицируются по id
+    all_cards = discover_cards(BANK_PRODUCTS)
+    save_catalog(all_cards)
 
     if all_cards:
         # Обрабатываем все карты через API
@@ -455,9 +226,11 @@ if __name__ == "__main__":
 
         # Сохраняем для LLM
         save_structured_for_llm(structured_cards)
+        # Колоночный снимок для анализа по времени
+        save_structured_columnar(structured_cards)
 
-        print(f"\n=== ИТОГИ ===")
-        print(f"Всего обработано карт: {len(structured_cards)}")
+        logger.info("=== ИТОГИ ===")
+        logger.info("Всего обработано карт: %d", len(structured_cards))
 
         # Группируем по типам услуг для статистики
         service_stats = {}
@@ -465,9 +238,9 @@ if __name__ == "__main__":
             service_type = card_data.get('service_type', 'Неизвестно')
             service_stats[service_type] = service_stats.get(service_type, 0) + 1
 
-        print("Статистика по типам услуг:")
+        logger.info("Статистика по типам услуг:")
         for service_type, count in service_stats.items():
-            print(f"  {service_type}: {count} карт")
+            logger.info("  %s: %d карт", service_type, count)
 
     else:
-        print("Не удалось найти ни одной карты")
\ No newline at end of file
+        logger.warning("Не удалось найти ни одной карты")
\ No newline at end of file
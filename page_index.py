@@ -0,0 +1,256 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+from change_tracker import content_fingerprint
+from content_retrieval import tokenize
+from product_keywords import PRODUCT_KEYWORDS, service_product_type
+
+# Вес ключевых слов типа продукта в запросе относительно слов названия услуги
+EXPANSION_WEIGHT = 0.5
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY,
+    bank TEXT NOT NULL,
+    url TEXT NOT NULL,
+    title TEXT,
+    content TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    length INTEGER NOT NULL,
+    indexed_at REAL NOT NULL,
+    UNIQUE (bank, url)
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    page_id INTEGER NOT NULL,
+    tf INTEGER NOT NULL,
+    PRIMARY KEY (term, page_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_page ON postings (page_id);
+CREATE TABLE IF NOT EXISTS links (
+    page_id INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    text TEXT,
+    type TEXT
+);
+CREATE INDEX IF NOT EXISTS links_page ON links (page_id);
+CREATE TABLE IF NOT EXISTS page_order (
+    bank TEXT NOT NULL,
+    url TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (bank, url)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+@dataclass
+class PageHit:
+    bank: str
+    url: str
+    title: str
+    score: float
+
+
+class PageIndex:
+    """
+    Персистентный полнотекстовый индекс собранных страниц банков
+
+    Страницы хранятся вместе со ссылками на продукты; обратный индекс
+    (основа слова -> страницы) позволяет искать страницы по услуге без
+    повторного обхода сайтов. Повторная индексация страницы с тем же
+    отпечатком текста пропускается.
+    """
+
+    def __init__(self, path: str = "page_index.sqlite", k1: float = 1.5, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+
+    def index_page(self, bank: str, url: str, title: str, content: str,
+                   product_links: Optional[List[Dict[str, Any]]] = None) -> bool:
+        """
+        Добавляет или обновляет страницу в индексе
+
+        Returns:
+            True, если страница (пере)индексирована; False, если текст не изменился
+        """
+        fingerprint = content_fingerprint(content)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, fingerprint FROM pages WHERE bank = ? AND url = ?", (bank, url)
+            ).fetchone()
+
+            if row is not None and row[1] == fingerprint:
+                # Текст не изменился: обновляем только ссылки и время
+                self._replace_links(row[0], product_links)
+                self._db.execute("UPDATE pages SET indexed_at = ? WHERE id = ?", (now, row[0]))
+                self._db.commit()
+                return False
+
+            term_counts = Counter(tokenize(content))
+            if row is None:
+                page_id = self._db.execute(
+                    "INSERT INTO pages (bank, url, title, content, fingerprint, length, indexed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (bank, url, title, content, fingerprint, sum(term_counts.values()), now)
+                ).lastrowid
+            else:
+                page_id = row[0]
+                self._db.execute(
+                    "UPDATE pages SET title = ?, content = ?, fingerprint = ?, length = ?, indexed_at = ? "
+                    "WHERE id = ?",
+                    (title, content, fingerprint, sum(term_counts.values()), now, page_id)
+                )
+                self._db.execute("DELETE FROM postings WHERE page_id = ?", (page_id,))
+
+            self._db.executemany(
+                "INSERT INTO postings (term, page_id, tf) VALUES (?, ?, ?)",
+                ((term, page_id, count) for term, count in term_counts.items())
+            )
+            self._replace_links(page_id, product_links)
+            self._db.commit()
+        return True
+
+    def _replace_links(self, page_id: int, product_links: Optional[List[Dict[str, Any]]]):
+        self._db.execute("DELETE FROM links WHERE page_id = ?", (page_id,))
+        self._db.executemany(
+            "INSERT INTO links (page_id, url, text, type) VALUES (?, ?, ?, ?)",
+            ((page_id, link['url'], link.get('text', ''), link.get('type')) for link in product_links or [])
+        )
+
+    def prune(self, bank: str, keep_urls: Iterable[str]) -> int:
+        """Удаляет страницы банка, которых нет в keep_urls; возвращает число удаленных"""
+        keep_urls = set(keep_urls)
+        with self._lock:
+            rows = self._db.execute("SELECT id, url FROM pages WHERE bank = ?", (bank,)).fetchall()
+            removed = [page_id for page_id, url in rows if url not in keep_urls]
+            for page_id in removed:
+                self._delete_page(page_id)
+            self._db.commit()
+        return len(removed)
+
+    def set_page_order(self, bank: str, urls: Iterable[str]):
+        """Запоминает порядок страниц банка в обходе (порядок документа для bank_pages)"""
+        with self._lock:
+            self._db.execute("DELETE FROM page_order WHERE bank = ?", (bank,))
+            self._db.executemany(
+                "INSERT OR IGNORE INTO page_order (bank, url, position) VALUES (?, ?, ?)",
+                ((bank, url, position) for position, url in enumerate(urls))
+            )
+            self._db.commit()
+
+    def _delete_page(self, page_id: int):
+        self._db.execute("DELETE FROM postings WHERE page_id = ?", (page_id,))
+        self._db.execute("DELETE FROM links WHERE page_id = ?", (page_id,))
+        self._db.execute("DELETE FROM pages WHERE id = ?", (page_id,))
+
+    def search(self, query: str, bank: Optional[str] = None, limit: int = 10) -> List[PageHit]:
+        """
+        Страницы, релевантные услуге, по убыванию оценки BM25
+
+        Запрос расширяется ключевыми словами типа продукта (product_keywords)
+        с меньшим весом.
+        """
+        weights: Dict[str, float] = {}
+        for term in tokenize(query):
+            weights[term] = 1.0
+        product_type = service_product_type(query)
+        for keyword in PRODUCT_KEYWORDS.get(product_type, []) if product_type else []:
+            for term in tokenize(keyword):
+                weights.setdefault(term, EXPANSION_WEIGHT)
+        if not weights:
+            return []
+
+        with self._lock:
+            bank_filter, bank_args = ("WHERE bank = ?", (bank,)) if bank else ("", ())
+            total, average_length = self._db.execute(
+                f"SELECT COUNT(*), AVG(length) FROM pages {bank_filter}", bank_args
+            ).fetchone()
+            if not total:
+                return []
+
+            placeholders = ",".join("?" * len(weights))
+            postings = self._db.execute(
+                f"SELECT p.term, p.page_id, p.tf, pages.length FROM postings p "
+                f"JOIN pages ON pages.id = p.page_id WHERE p.term IN ({placeholders})"
+                + (" AND pages.bank = ?" if bank else ""),
+                (*weights, *bank_args)
+            ).fetchall()
+
+            document_frequency = Counter(term for term, _, _, _ in postings)
+            scores: Dict[int, float] = {}
+            for term, page_id, tf, length in postings:
+                frequency = document_frequency[term]
+                idf = math.log(1 + (total - frequency + 0.5) / (frequency + 0.5))
+                length_norm = self.k1 * (1 - self.b + self.b * length / (average_length or 1))
+                scores[page_id] = scores.get(page_id, 0.0) + weights[term] * idf * tf * (self.k1 + 1) / (
+                    tf + length_norm)
+
+            best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+            hits = []
+            for page_id, score in best:
+                page_bank, url, title = self._db.execute(
+                    "SELECT bank, url, title FROM pages WHERE id = ?", (page_id,)
+                ).fetchone()
+                hits.append(PageHit(page_bank, url, title or "", score))
+        return hits
+
+    def banks(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._db.execute("SELECT DISTINCT bank FROM pages ORDER BY bank")]
+
+    def bank_pages(self, bank: str) -> List[Dict[str, Any]]:
+        """
+        Страницы банка с текстом и ссылками на продукты
+
+        Порядок - как в последнем обходе (set_page_order), страницы без
+        сохраненной позиции идут следом в порядке индексации.
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT p.id, p.url, p.title, p.content, p.indexed_at FROM pages p "
+                "LEFT JOIN page_order o ON o.bank = p.bank AND o.url = p.url "
+                "WHERE p.bank = ? ORDER BY o.position IS NULL, o.position, p.id", (bank,)
+            ).fetchall()
+            pages = []
+            for page_id, url, title, content, indexed_at in rows:
+                links = [
+                    {'url': link_url, 'text': text or "", 'type': link_type}
+                    for link_url, text, link_type in self._db.execute(
+                        "SELECT url, text, type FROM links WHERE page_id = ? ORDER BY rowid", (page_id,)
+                    )
+                ]
+                pages.append({'url': url, 'title': title or "", 'content': content,
+                              'indexed_at': indexed_at, 'product_links': links})
+        return pages
+
+    def mark_crawled(self, timestamp: Optional[float] = None):
+        """Отмечает время завершения обхода сайтов"""
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('last_crawl', ?)",
+                             (str(timestamp or time.time()),))
+            self._db.commit()
+
+    def last_crawled(self) -> Optional[float]:
+        """Время последнего завершенного обхода или None"""
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE key = 'last_crawl'").fetchone()
+        return float(row[0]) if row else None
@@ -0,0 +1,121 @@
+import threading
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+# Скрипт одного опроса состояния страницы: готовность документа, размер DOM,
+# время окончания последней сетевой загрузки и наличие контентных блоков
+_PAGE_STATE_SCRIPT = """
+var selectors = arguments[0];
+var entries = (window.performance && performance.getEntriesByType)
+    ? performance.getEntriesByType('resource') : [];
+var lastResponseEnd = 0;
+for (var i = 0; i < entries.length; i++) {
+    if (entries[i].responseEnd > lastResponseEnd) { lastResponseEnd = entries[i].responseEnd; }
+}
+var hasContent = false;
+if (selectors) {
+    try { hasContent = document.querySelector(selectors) !== null; } catch (e) {}
+}
+return {
+    readyState: document.readyState,
+    nodes: document.getElementsByTagName('*').length,
+    idleMs: (window.performance ? performance.now() : 0) - lastResponseEnd,
+    hasContent: hasContent
+};
+"""
+
+
+class AdaptivePageWaiter:
+    """
+    Ожидание готовности страницы вместо фиксированных пауз
+
+    Страница считается готовой, когда документ загружен, размер DOM не меняется
+    несколько опросов подряд и либо сеть простаивает network_idle секунд,
+    либо на странице уже есть контентные блоки. Время готовности запоминается
+    по хостам и используется, чтобы не опрашивать заведомо неготовую страницу.
+    """
+
+    def __init__(self, max_wait: float = 10.0, poll_interval: float = 0.2, stable_polls: int = 2,
+                 network_idle: float = 0.5, content_selectors: Optional[List[str]] = None,
+                 smoothing: float = 0.3):
+        """
+        Args:
+            max_wait: Жесткий верхний предел ожидания одной страницы, сек
+            poll_interval: Интервал опроса состояния страницы, сек
+            stable_polls: Сколько опросов подряд размер DOM должен не меняться
+            network_idle: Сколько секунд без сетевых ответов считается простоем сети
+            content_selectors: CSS-селекторы контентных блоков
+            smoothing: Коэффициент экспоненциального сглаживания времени готовности хоста
+        """
+        self.max_wait = max_wait
+        self.poll_interval = poll_interval
+        self.stable_polls = stable_polls
+        self.network_idle = network_idle
+        self.content_selector = ', '.join(content_selectors) if content_selectors else ''
+        self.smoothing = smoothing
+
+        self._host_timing: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def learned_timing(self, url: str) -> Optional[float]:
+        """Сглаженное время готовности страниц хоста, сек (None - хост еще не встречался)"""
+        with self._lock:
+            return self._host_timing.get(urlparse(url).netloc.lower())
+
+    def wait_until_ready(self, driver, url: str) -> float:
+        """
+        Ждет готовности загруженной страницы
+
+        Returns:
+            Фактическое время ожидания, сек
+        """
+        start = time.monotonic()
+        deadline = start + self.max_wait
+
+        # Не опрашиваем страницу раньше, чем она обычно готова на этом хосте
+        learned = self.learned_timing(url)
+        if learned:
+            time.sleep(min(learned * 0.5, self.max_wait))
+
+        ready = self._poll_until(driver, deadline, True, self.poll_interval, self.stable_polls)
+        elapsed = time.monotonic() - start
+        if ready:
+            self._learn(url, elapsed)
+        return elapsed
+
+    def wait_for_dom_settle(self, driver, timeout: float = 0.7) -> float:
+        """Ждет, пока перестанет расти DOM (например, после прокрутки с ленивой подгрузкой)"""
+        start = time.monotonic()
+        self._poll_until(driver, start + timeout, False, self.poll_interval / 2, 1)
+        return time.monotonic() - start
+
+    def _poll_until(self, driver, deadline: float, require_complete: bool,
+                    poll_interval: float, stable_polls: int) -> bool:
+        last_nodes = -1
+        stable = 0
+        while True:
+            try:
+                state = driver.execute_script(_PAGE_STATE_SCRIPT, self.content_selector) or {}
+            except Exception:
+                state = {}
+
+            nodes = state.get('nodes', -1)
+            stable = stable + 1 if nodes == last_nodes and nodes > 0 else 0
+            last_nodes = nodes
+
+            complete = state.get('readyState') == 'complete' or not require_complete
+            network_idle = state.get('idleMs', 0) >= self.network_idle * 1000
+            if complete and stable >= stable_polls and (network_idle or state.get('hasContent')):
+                return True
+
+            if time.monotonic() + poll_interval > deadline:
+                return False
+            time.sleep(poll_interval)
+
+    def _learn(self, url: str, elapsed: float):
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            previous = self._host_timing.get(host)
+            self._host_timing[host] = (elapsed if previous is None
+                                       else previous + self.smoothing * (elapsed - previous))
@@ -0,0 +1,52 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict
+from urllib.parse import urlparse
+
+
+class HostPoliteness:
+    """
+    Ограничитель частоты запросов к одному хосту.
+
+    Запросы к разным хостам выполняются параллельно, а к одному хосту -
+    строго последовательно и не чаще, чем раз в min_interval секунд.
+    """
+
+    def __init__(self, min_interval: float = 2.0):
+        self.min_interval = min_interval
+        self._locks: Dict[str, threading.Lock] = {}
+        self._last_request: Dict[str, float] = {}
+        self._registry_lock = threading.Lock()
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        """Возвращает хост URL без префикса www."""
+        host = urlparse(url).netloc.lower()
+        return host[4:] if host.startswith('www.') else host
+
+    def _lock_for(self, host: str) -> threading.Lock:
+        with self._registry_lock:
+            lock = self._locks.get(host)
+            if lock is None:
+                lock = threading.Lock()
+                self._locks[host] = lock
+            return lock
+
+    @contextmanager
+    def slot(self, url: str):
+        """
+        Занимает хост на время запроса
+
+        Ждет, пока освободится хост и пройдет min_interval с предыдущего запроса.
+        """
+        host = self.host_of(url)
+        lock = self._lock_for(host)
+        with lock:
+            elapsed = time.monotonic() - self._last_request.get(host, 0.0)
+            if elapsed < self.min_interval:
+                time.sleep(self.min_interval - elapsed)
+            try:
+                yield
+            finally:
+                self._last_request[host] = time.monotonic()
@@ -0,0 +1,32 @@
+from typing import Optional
+
+# Признаки типов банковских продуктов в ссылках и тексте (порядок задает приоритет типов)
+PRODUCT_KEYWORDS = {
+    'credit': ['кредит', 'займ', 'ссуд', 'credit', 'loan', 'рассрочк'],
+    'deposit': ['вклад', 'депозит', 'сбережен', 'deposit', 'savings', 'накопит'],
+    'card': ['карт', 'card', 'дебетов', 'кредитн', 'visa', 'mastercard', 'платежн'],
+    'mortgage': ['ипотек', 'mortgage', 'недвиж', 'жиль', 'квартир'],
+    'investment': ['инвест', 'вложен', 'акци', 'облигац', 'investment', 'фонд'],
+    'insurance': ['страхов', 'insurance', 'защит'],
+    'account': ['счет', 'account', 'расчетн', 'текущ']
+}
+
+# Сопоставление названия услуги с типом продукта (первое совпадение в порядке словаря)
+SERVICE_TYPE_MAPPING = {
+    'ипотек': 'mortgage', 'ипотечн': 'mortgage', 'жиль': 'mortgage', 'недвиж': 'mortgage',
+    'кредит': 'credit', 'займ': 'credit', 'ссуд': 'credit', 'loan': 'credit',
+    'вклад': 'deposit', 'депозит': 'deposit', 'сбережен': 'deposit', 'накопит': 'deposit',
+    'карт': 'card', 'card': 'card', 'дебетов': 'card', 'visa': 'card', 'mastercard': 'card',
+    'инвест': 'investment', 'брокер': 'investment', 'акци': 'investment', 'облигац': 'investment',
+    'страхов': 'insurance', 'insurance': 'insurance', 'защит': 'insurance',
+    'счет': 'account', 'account': 'account', 'рко': 'account', 'расчетн': 'account'
+}
+
+
+def service_product_type(service_name: str) -> Optional[str]:
+    """Тип продукта для названия услуги или None, если сопоставить не удалось"""
+    service_name = service_name.lower()
+    for keyword, product_type in SERVICE_TYPE_MAPPING.items():
+        if keyword in service_name:
+            return product_type
+    return None
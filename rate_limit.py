@@ -0,0 +1,62 @@
+import asyncio
+import random
+import threading
+import time
+from typing import Optional
+
+# HTTP-статусы временных ошибок, после которых запрос имеет смысл повторить
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Ограничитель частоты по алгоритму token bucket
+
+    Пополняется со скоростью rate токенов в секунду до capacity токенов.
+    Поддерживает как синхронное (потоки), так и асинхронное ожидание.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Args:
+            rate: Скорость пополнения, токенов в секунду (больше нуля; без ограничения
+                частоты ограничитель не создается)
+            capacity: Емкость (допустимый всплеск), по умолчанию - max(rate, 1)
+        """
+        if rate <= 0:
+            raise ValueError(f"Скорость token bucket должна быть больше нуля, получено {rate}")
+        if capacity is not None and capacity <= 0:
+            raise ValueError(f"Емкость token bucket должна быть больше нуля, получено {capacity}")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: float) -> float:
+        """Списывает токены и возвращает, сколько нужно подождать до их появления"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self, tokens: float = 1.0):
+        """Синхронное ожидание токенов"""
+        delay = self._reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self, tokens: float = 1.0):
+        """Асинхронное ожидание токенов"""
+        delay = self._reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 30.0) -> float:
+    """Экспоненциальная задержка перед повтором с полным джиттером (attempt с нуля)"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
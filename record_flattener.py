@@ -0,0 +1,240 @@
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+# Когда поле попадает в результат (проверяется значение guard, по умолчанию - самого источника)
+ALWAYS = 'always'
+NOT_NONE = 'not_none'
+TRUTHY = 'truthy'
+
+# Откуда берется значение: из полезной нагрузки записи (item) или из записи целиком
+SCOPE_ITEM = 'item'
+SCOPE_RECORD = 'record'
+
+_MISSING = object()
+
+
+@dataclass(frozen=True)
+class FieldSpec:
+    """
+    Поле результата: путь в источнике -> путь в результате
+
+    Пути задаются через точку ("cashback.maxValue"). default подставляется,
+    только если поля в источнике нет (как dict.get(key, default)).
+    drop_empty убирает поле, если после transform значение пустое
+    (None, "", [] или {}).
+    """
+    target: Optional[str]  # None - значение элемента коллекции (CollectionSpec.value)
+    source: str
+    default: Any = None
+    transform: Optional[Callable[[Any], Any]] = None
+    include: str = ALWAYS
+    guard: Optional[str] = None
+    scope: str = SCOPE_ITEM
+    drop_empty: bool = False
+
+
+@dataclass(frozen=True)
+class CollectionSpec:
+    """
+    Коллекция из словаря вложенных записей источника ({id: запись})
+
+    Каждая запись, прошедшая проверку include/guard, превращается в объект по
+    fields или в одно значение по value. Результат - список (или словарь по id,
+    если keyed); пустая коллекция в результат не попадает.
+    """
+    target: str
+    source: str
+    fields: Sequence[Union[FieldSpec, 'CollectionSpec']] = ()
+    value: Optional[FieldSpec] = None
+    include: str = ALWAYS
+    guard: Optional[str] = None
+    keyed: bool = False
+
+
+Spec = Union[FieldSpec, CollectionSpec]
+
+
+def _getter(path: str) -> Callable[[Dict[str, Any]], Any]:
+    """Функция чтения значения по пути через точку; отсутствующее поле - _MISSING"""
+    keys = path.split('.')
+
+    def get(obj):
+        for key in keys:
+            if not isinstance(obj, dict):
+                return _MISSING
+            obj = obj.get(key, _MISSING)
+        return obj
+    return get
+
+
+class _SchemaCompiler:
+    """
+    Генерирует по схеме исходный код одной функции build(item, record)
+
+    Вместо цепочки вызовов на каждое поле получается линейный код с прямыми
+    dict.get - как написанный вручную, без промежуточных объектов.
+    """
+
+    def __init__(self):
+        self.lines: List[str] = []
+        self.namespace: Dict[str, Any] = {'_MISSING': _MISSING}
+        self._counter = 0
+
+    def name(self, prefix: str) -> str:
+        self._counter += 1
+        return f"{prefix}{self._counter}"
+
+    def constant(self, value: Any) -> str:
+        """Имя, под которым value доступно в сгенерированном коде"""
+        name = self.name('_c')
+        self.namespace[name] = value
+        return name
+
+    def emit(self, indent: int, line: str):
+        self.lines.append("    " * indent + line)
+
+    def read(self, obj: str, path: str, default: Any = _MISSING) -> str:
+        """Выражение чтения path из obj; без default отсутствующее поле дает _MISSING"""
+        if '.' in path:
+            expression = f"{self.constant(_getter(path))}({obj})"
+            if default is _MISSING:
+                return expression
+            return f"_default({expression}, {self.constant(default)})"
+        if default is None:
+            return f"{obj}.get({path!r})"
+        return f"{obj}.get({path!r}, {'_MISSING' if default is _MISSING else self.constant(default)})"
+
+    @staticmethod
+    def condition(include: str, value: str) -> str:
+        """Условие include для значения, прочитанного с default=None"""
+        if include == NOT_NONE:
+            return f"{value} is not None"
+        if include == TRUTHY:
+            return value
+        raise ValueError(f"Неизвестный режим include: {include}")
+
+    def target(self, indent: int, out: str, path: str) -> Tuple[str, str]:
+        """Контейнер и ключ для записи по пути; промежуточные объекты создаются при первой записи"""
+        *parents, key = path.split('.')
+        for parent in parents:
+            container = self.name('_p')
+            self.emit(indent, f"{container} = {out}.get({parent!r})")
+            self.emit(indent, f"if {container} is None:")
+            self.emit(indent + 1, f"{container} = {out}[{parent!r}] = {{}}")
+            out = container
+        return out, key
+
+    def field(self, indent: int, spec: FieldSpec, item: str, record: str) -> Tuple[int, str]:
+        """
+        Код вычисления значения поля
+
+        Returns:
+            (отступ, на котором значение определено, имя переменной со значением)
+        """
+        obj = record if spec.scope == SCOPE_RECORD else item
+        value = self.name('_v')
+        if spec.include != ALWAYS and spec.guard is None:
+            # Проверка по самому полю: при прохождении проверки поле заведомо есть
+            self.emit(indent, f"{value} = {self.read(obj, spec.source, None)}")
+            self.emit(indent, f"if {self.condition(spec.include, value)}:")
+            indent += 1
+        else:
+            if spec.include != ALWAYS:
+                guard = self.name('_g')
+                self.emit(indent, f"{guard} = {self.read(obj, spec.guard, None)}")
+                self.emit(indent, f"if {self.condition(spec.include, guard)}:")
+                indent += 1
+            default = spec.default
+            if isinstance(default, (list, dict)):
+                # Изменяемое значение по умолчанию копируется для каждой записи
+                self.emit(indent, f"{value} = {self.read(obj, spec.source, _MISSING)}")
+                self.emit(indent, f"if {value} is _MISSING:")
+                self.emit(indent + 1, f"{value} = {self.constant(default)}.copy()")
+            else:
+                self.emit(indent, f"{value} = {self.read(obj, spec.source, default)}")
+
+        if spec.transform is not None:
+            self.emit(indent, f"{value} = {self.constant(spec.transform)}({value})")
+        if spec.drop_empty:
+            self.emit(indent, f"if not ({value} is None or {value} == '' or {value} == [] or {value} == {{}}):")
+            indent += 1
+        return indent, value
+
+    def collection(self, indent: int, spec: CollectionSpec, item: str, record: str, out: str):
+        entries, result, entry_id, entry = (self.name('_entries'), self.name('_result'),
+                                            self.name('_id'), self.name('_entry'))
+        self.emit(indent, f"{entries} = {self.read(item, spec.source)}")
+        self.emit(indent, f"if isinstance({entries}, dict):")
+        self.emit(indent + 1, f"{result} = {{}}" if spec.keyed else f"{result} = []")
+        self.emit(indent + 1, f"for {entry_id}, {entry} in {entries}.items():")
+        body = indent + 2
+        if spec.include != ALWAYS:
+            guard = self.name('_g')
+            self.emit(body, f"{guard} = {self.read(entry, spec.guard, None) if spec.guard else entry}")
+            self.emit(body, f"if not ({self.condition(spec.include, guard)}):")
+            self.emit(body + 1, "continue")
+
+        if spec.value is not None:
+            value_indent, value = self.field(body, spec.value, entry, record)
+        else:
+            value = self.name('_o')
+            self.emit(body, f"{value} = {{}}")
+            self.fields(body, spec.fields, entry, record, value)
+            value_indent = body
+        self.emit(value_indent, f"{result}[{entry_id}] = {value}" if spec.keyed else f"{result}.append({value})")
+
+        self.emit(indent + 1, f"if {result}:")
+        container, key = self.target(indent + 2, out, spec.target)
+        self.emit(indent + 2, f"{container}[{key!r}] = {result}")
+
+    def fields(self, indent: int, specs: Sequence[Spec], item: str, record: str, out: str):
+        for spec in specs:
+            if isinstance(spec, CollectionSpec):
+                self.collection(indent, spec, item, record, out)
+                continue
+            value_indent, value = self.field(indent, spec, item, record)
+            container, key = self.target(value_indent, out, spec.target)
+            self.emit(value_indent, f"{container}[{key!r}] = {value}")
+
+    def compile(self, specs: Sequence[Spec]) -> Tuple[Callable[[Dict[str, Any], Dict[str, Any]], Dict[str, Any]], str]:
+        self.emit(0, "def build(item, record):")
+        self.emit(1, "out = {}")
+        self.fields(1, specs, "item", "record", "out")
+        self.emit(1, "return out")
+        source = "\n".join(self.lines)
+        self.namespace['_default'] = lambda value, default: default if value is _MISSING else value
+        exec(compile(source, "<record_flattener>", "exec"), self.namespace)
+        return self.namespace['build'], source
+
+
+class RecordFlattener:
+    """
+    Извлечение плоских структур из записей API по декларативной схеме
+
+    Схема (список FieldSpec/CollectionSpec) один раз компилируется в функцию
+    Python (исходный код - в атрибуте source); дальше запись обрабатывается
+    без разбора схемы.
+
+    Args:
+        specs: Поля результата в порядке следования ключей
+        unwrap: Поле записи с полезной нагрузкой (если его нет - используется сама запись)
+    """
+
+    def __init__(self, specs: Sequence[Spec], unwrap: Optional[str] = 'item'):
+        self.specs = list(specs)
+        self.unwrap = unwrap
+        self._build, self.source = _SchemaCompiler().compile(self.specs)
+
+    def flatten(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        item = record.get(self.unwrap, record) if self.unwrap else record
+        return self._build(item, record)
+
+    def flatten_many(self, records: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Пакетная обработка: {id: запись} -> {id: результат}"""
+        build, unwrap = self._build, self.unwrap
+        if not unwrap:
+            return {record_id: build(record, record) for record_id, record in records.items()}
+        return {record_id: build(record.get(unwrap, record), record) for record_id, record in records.items()}
+
+    def flatten_list(self, records: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [self.flatten(record) for record in records]
@@ -0,0 +1,268 @@
+"""
+Хранилище записей в формате JSON Lines с метаданными в отдельном файле
+
+Дозапись выполняется за O(новых записей): строки добавляются в конец файла,
+а небольшой файл <имя>.meta.json хранит число записей и размер подтвержденной
+части данных. Незавершенная дозапись (сбой посреди записи) отбрасывается
+при следующем добавлении или при чтении.
+
+Запуск:
+    python record_store.py compact bank_history.jsonl --key url service_type component
+    python record_store.py import bank_data.json bank_history.jsonl
+    python record_store.py info bank_history.jsonl
+"""
+import argparse
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, Optional, Sequence, Tuple
+
+STORE_VERSION = "1.0"
+META_SUFFIX = ".meta.json"
+
+
+def meta_path(path: str) -> str:
+    return path + META_SUFFIX
+
+
+def _write_json_atomic(path: str, data: Any):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _encode_records(records: Iterable[Dict[str, Any]]) -> Tuple[bytes, int]:
+    lines = [json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n" for record in records]
+    return "".join(lines).encode('utf-8'), len(lines)
+
+
+class JsonlStore:
+    """
+    Файл JSON Lines с метаданными: запись на строку, только дозапись в конец
+
+    Метаданные (число записей, размер подтвержденных данных, даты) обновляются
+    атомарно после каждой дозаписи, поэтому их чтение не требует просмотра данных.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.meta_path = meta_path(path)
+        self._lock = threading.Lock()
+
+    def read_meta(self) -> Dict[str, Any]:
+        """Метаданные хранилища; для файла без метаданных они восстанавливаются одним проходом"""
+        try:
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return self._scan_meta()
+
+    def _scan_meta(self) -> Dict[str, Any]:
+        """Метаданные по содержимому файла данных (до последней завершенной строки)"""
+        if not os.path.exists(self.path):
+            return self._new_meta(total_records=0, size=0)
+
+        total_records = 0
+        size = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Незавершенная последняя строка
+                size += len(line)
+                if line.strip():
+                    total_records += 1
+        return self._new_meta(total_records=total_records, size=size)
+
+    @staticmethod
+    def _new_meta(total_records: int, size: int) -> Dict[str, Any]:
+        now = datetime.now().isoformat()
+        return {
+            "version": STORE_VERSION,
+            "format": "jsonl",
+            "created": now,
+            "updated": now,
+            "total_records": total_records,
+            "size": size,
+            "appends": 0
+        }
+
+    def append(self, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        Дописывает записи в конец файла
+
+        Returns:
+            Число добавленных записей
+        """
+        payload, count = _encode_records(records)
+        if not count:
+            return 0
+
+        with self._lock:
+            meta = self.read_meta()
+            with open(self.path, 'ab') as f:
+                if f.tell() < meta["size"]:
+                    # Файл данных короче, чем записано в метаданных (заменен вручную) - пересчитываем
+                    meta = self._scan_meta()
+                if f.tell() > meta["size"]:
+                    # Хвост после подтвержденного размера - остаток прерванной дозаписи
+                    f.truncate(meta["size"])
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+
+            meta["total_records"] += count
+            meta["size"] += len(payload)
+            meta["appends"] = meta.get("appends", 0) + 1
+            meta["updated"] = datetime.now().isoformat()
+            _write_json_atomic(self.meta_path, meta)
+        return count
+
+    def write(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Заменяет содержимое хранилища переданными записями (запись во временный файл и подмена)"""
+        with self._lock:
+            return self._rewrite(records)
+
+    def _rewrite(self, records: Iterable[Dict[str, Any]]) -> int:
+        tmp_path = f"{self.path}.tmp"
+        count = 0
+        size = 0
+        with open(tmp_path, 'wb') as f:
+            for record in records:
+                line = (json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n").encode('utf-8')
+                f.write(line)
+                count += 1
+                size += len(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+        created = self.read_meta().get("created")
+        os.replace(tmp_path, self.path)
+
+        meta = self._new_meta(total_records=count, size=size)
+        if created:
+            meta["created"] = created
+        _write_json_atomic(self.meta_path, meta)
+        return count
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self.iter_records()
+
+    def iter_records(self, skip_invalid: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Потоково отдает записи; в памяти одновременно находится одна строка
+
+        Args:
+            skip_invalid: Пропускать строки с некорректным JSON вместо исключения
+        """
+        if not os.path.exists(self.path):
+            return
+        limit = self.read_meta()["size"]
+        consumed = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                consumed += len(line)
+                if consumed > limit:
+                    break  # Неподтвержденная дозапись
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    if not skip_invalid:
+                        raise
+
+    def __len__(self) -> int:
+        return self.read_meta()["total_records"]
+
+    def compact(self, key_fields: Optional[Sequence[str]] = None) -> Dict[str, int]:
+        """
+        Переписывает хранилище, отбрасывая поврежденные строки
+
+        Args:
+            key_fields: Если заданы, из записей с одинаковыми значениями этих полей
+                остается последняя; относительный порядок оставшихся записей сохраняется
+
+        Returns:
+            Число записей до и после сжатия
+        """
+        with self._lock:
+            before = self.read_meta()["total_records"]
+
+            if key_fields:
+                # В памяти держатся только ключи и позиции, сами записи читаются вторым проходом
+                latest = {}
+                for position, record in enumerate(self.iter_records(skip_invalid=True)):
+                    latest[tuple(_key_value(record.get(field)) for field in key_fields)] = position
+                keep = set(latest.values())
+                records = (record for position, record in enumerate(self.iter_records(skip_invalid=True)) if position in keep)
+            else:
+                records = self.iter_records(skip_invalid=True)
+
+            after = self._rewrite(records)
+        return {"before": before, "after": after}
+
+
+def _key_value(value: Any) -> Any:
+    """Хешируемое представление значения поля для ключа дедупликации"""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False, sort_keys=True)
+    return value
+
+
+def iter_records(filename: str) -> Iterator[Dict[str, Any]]:
+    """
+    Потоковое чтение записей из .jsonl или из JSON-файла save_to_json
+
+    JSON-файлы формата {"metadata", "data"} и простые списки читаются целиком
+    (формат не допускает потокового разбора), JSON Lines - построчно.
+    """
+    if filename.endswith(".jsonl"):
+        yield from JsonlStore(filename).iter_records()
+        return
+
+    with open(filename, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    yield from unwrap_records(data)
+
+
+def unwrap_records(data: Any) -> list:
+    """Список записей из содержимого JSON-файла: обертки {"metadata", "data"} или простого списка"""
+    if isinstance(data, dict) and "data" in data:
+        return data["data"]
+    if isinstance(data, list):
+        return data
+    raise ValueError("Неожиданный формат файла: ожидался список записей или объект с ключом 'data'")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    compact_parser = commands.add_parser('compact', help='Переписать хранилище, удалив поврежденные строки и дубликаты')
+    compact_parser.add_argument('path')
+    compact_parser.add_argument('--key', nargs='+', help='Поля ключа дедупликации (остается последняя запись)')
+
+    import_parser = commands.add_parser('import', help='Дописать записи из JSON-файла save_to_json в .jsonl')
+    import_parser.add_argument('source')
+    import_parser.add_argument('path')
+
+    info_parser = commands.add_parser('info', help='Показать метаданные хранилища')
+    info_parser.add_argument('path')
+
+    args = parser.parse_args()
+    store = JsonlStore(args.path)
+
+    if args.command == 'compact':
+        result = store.compact(args.key)
+        print(f"Сжатие {args.path}: {result['before']} -> {result['after']} записей")
+    elif args.command == 'import':
+        count = store.append(iter_records(args.source))
+        print(f"Добавлено {count} записей из {args.source} в {args.path}")
+    else:
+        print(json.dumps(store.read_meta(), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
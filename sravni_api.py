@@ -0,0 +1,188 @@
+import asyncio
+import json
+import statistics
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from curl_cffi.requests import AsyncSession
+
+from http_cache import ResponseCache, cache_key, resolve_cache
+from rate_limit import RETRY_STATUSES, TokenBucket, backoff_delay
+from structured_log import ProgressReporter
+
+SRAVNI_API_URL = "https://public.sravni.ru/v2/vitrins/product/byId"
+
+SRAVNI_API_HEADERS = {
+    'Content-Type': 'application/json',
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'application/json, text/plain, */*',
+    'Origin': 'https://www.sravni.ru',
+    'Referer': 'https://www.sravni.ru/'
+}
+
+# Время жизни ответов API в кеше: карточки продуктов меняются редко
+API_CACHE_TTL = 24 * 60 * 60
+
+
+@dataclass
+class RequestStats:
+    card_id: str
+    status: Optional[int]  # HTTP-статус последней попытки (None - сетевая ошибка)
+    latency_ms: float  # Время последней попытки
+    attempts: int
+    from_cache: bool = False
+    error: Optional[str] = None  # Причина неудачи при статусе 200 (например, ответ не JSON)
+
+
+class SravniBatchClient:
+    """
+    Асинхронная пакетная загрузка карточек продуктов sravni.ru
+
+    Одна сессия на весь пакет (переиспользование соединений), ограничение
+    числа одновременных запросов, token bucket на частоту запросов и повторы
+    с экспоненциальной задержкой и джиттером для 429/5xx и сетевых ошибок.
+    После загрузки в stats лежит статистика по каждому запросу.
+    """
+
+    def __init__(self, concurrency: int = 8, rate: float = 5.0, burst: Optional[float] = None,
+                 max_retries: int = 4, timeout: float = 30.0, impersonate: str = "chrome110",
+                 cache: Optional[ResponseCache] = None, cache_ttl: float = API_CACHE_TTL,
+                 progress: Optional[ProgressReporter] = None):
+        """
+        Args:
+            concurrency: Максимум одновременных запросов
+            rate: Максимум запросов в секунду (0 - без ограничения)
+            burst: Допустимый всплеск запросов (по умолчанию - rate)
+            max_retries: Число повторов после первой попытки
+            timeout: Таймаут запроса, сек
+            impersonate: Профиль браузера curl_cffi
+            cache: Кеш ответов (по умолчанию - общий кеш процесса, NO_CACHE - без кеширования)
+            cache_ttl: Время жизни ответов в кеше, сек
+            progress: Прогресс загрузки (продвигается на каждый завершенный запрос)
+        """
+        self.concurrency = concurrency
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.impersonate = impersonate
+        self.cache = resolve_cache(cache)
+        self.cache_ttl = cache_ttl
+        self.progress = progress
+        self.stats: List[RequestStats] = []
+
+    def fetch_all(self, requests: List[Tuple[str, str]]) -> Dict[str, Dict]:
+        """
+        Синхронная обертка над fetch_all_async
+
+        Args:
+            requests: Список пар (card_id, product_name)
+
+        Returns:
+            Словарь {card_id: данные API} только для успешно загруженных карт
+        """
+        return asyncio.run(self.fetch_all_async(requests))
+
+    async def fetch_all_async(self, requests: List[Tuple[str, str]]) -> Dict[str, Dict]:
+        """Асинхронная загрузка всех карт; порядок результата совпадает с порядком запросов"""
+        self.stats = []
+        bucket = TokenBucket(self.rate, self.burst) if self.rate else None
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        # Повторяющиеся ID запрашиваем один раз
+        unique_requests = list(dict.fromkeys(requests))
+
+        async with AsyncSession(impersonate=self.impersonate) as session:
+            results = await asyncio.gather(*(
+                self._fetch_one(session, semaphore, bucket, card_id, product_name)
+                for card_id, product_name in unique_requests
+            ))
+
+        return {
+            card_id: data
+            for (card_id, _), data in zip(unique_requests, results)
+            if data is not None
+        }
+
+    def latency_summary(self) -> Dict[str, float]:
+        """Сводка задержек сетевых запросов, мс (для подбора concurrency/rate)"""
+        latencies = sorted(s.latency_ms for s in self.stats if not s.from_cache)
+        if not latencies:
+            return {}
+        return {
+            'count': len(latencies),
+            'mean': statistics.fmean(latencies),
+            'p50': latencies[len(latencies) // 2],
+            'p95': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+            'max': latencies[-1]
+        }
+
+    async def _fetch_one(self, session: AsyncSession, semaphore: asyncio.Semaphore,
+                         bucket: Optional[TokenBucket], card_id: str, product_name: str) -> Optional[Dict]:
+        payload = {"productName": product_name, "id": card_id}
+        key = cache_key("POST", SRAVNI_API_URL, payload)
+
+        # Кеш - sqlite и файлы на диске: вызовы выполняются в потоке, чтобы не блокировать цикл событий
+        if self.cache is not None:
+            entry = await asyncio.to_thread(self.cache.get, key)
+            if entry is not None and entry.is_fresh:
+                try:
+                    data = json.loads(entry.body)
+                except ValueError:
+                    data = None  # Испорченная запись кеша - запрашиваем заново и перезаписываем
+                else:
+                    self._record(RequestStats(card_id, entry.status, 0.0, 0, from_cache=True))
+                    return data
+
+        status = None
+        latency_ms = 0.0
+        error = None
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            async with semaphore:
+                if bucket is not None:
+                    await bucket.acquire_async()
+                started = time.perf_counter()
+                try:
+                    response = await session.post(SRAVNI_API_URL, json=payload, headers=SRAVNI_API_HEADERS,
+                                                  timeout=self.timeout)
+                    status = response.status_code
+                except Exception:
+                    response = None
+                    status = None
+                latency_ms = (time.perf_counter() - started) * 1000
+
+            if status == 200:
+                # Страница проверки или обрезанный ответ со статусом 200 - не данные: не кешируем и повторяем
+                try:
+                    data = json.loads(response.content)
+                except ValueError as e:
+                    error = f"ответ не JSON: {e}"
+                else:
+                    self._record(RequestStats(card_id, status, latency_ms, attempt + 1))
+                    if self.cache is not None:
+                        await asyncio.to_thread(self.cache.put, key, "POST", SRAVNI_API_URL, response.content,
+                                                content_type="application/json", ttl=self.cache_ttl)
+                    return data
+            else:
+                error = None
+
+            if status is not None and status != 200 and status not in RETRY_STATUSES:
+                break
+
+            if response is not None:
+                retry_after = response.headers.get('Retry-After')
+            if attempt < self.max_retries:
+                delay = backoff_delay(attempt)
+                if retry_after and retry_after.isdigit():
+                    delay = max(delay, float(retry_after))
+                await asyncio.sleep(delay)
+
+        self._record(RequestStats(card_id, status, latency_ms, attempt + 1, error=error))
+        return None
+
+    def _record(self, stats: RequestStats):
+        self.stats.append(stats)
+        if self.progress is not None:
+            self.progress.advance(error=stats.status != 200 or stats.error is not None)
@@ -0,0 +1,336 @@
+"""
+Массовый сбор списка карт банков с витрин sravni.ru
+
+Для каждой пары (банк, продукт) страницы витрины загружаются по порядку
+(?page=2, 3, ...), пока очередная страница не перестанет давать новые карты;
+разные пары обрабатываются параллельно. Карты дедуплицируются по id общим
+множеством, результат - один каталог, готовый для process_all_cards_with_api.
+
+Запуск:
+    python sravni_discovery.py --banks t-bank sberbank --products debit-cards credit-cards
+    python sravni_discovery.py --discover --workers 8 --output sravni_catalog.json
+"""
+import argparse
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from html_scripts import extract_scripts
+from http_client import cached_get
+from json_stream import find_json_path_array, iter_json_array
+from rate_limit import RETRY_STATUSES, TokenBucket, backoff_delay
+from structured_log import ProgressReporter, add_logging_arguments, get_logger, setup_logging_from_args
+
+logger = get_logger(__name__)
+
+SRAVNI_BASE_URL = "https://www.sravni.ru"
+
+# Путь к списку продуктов в состоянии страницы sravni.ru
+PRODUCTS_ITEMS_PATH = ("products", "list", "offers", "items")
+
+# productName API -> (раздел витрины на sravni.ru, тип услуги)
+PRODUCT_LISTINGS: Dict[str, Tuple[str, str]] = {
+    'debit-cards': ('debetovye-karty', "Дебетовая карта"),
+    'credit-cards': ('karty', "Кредитная карта"),
+}
+
+# Страницы со ссылками на банки, по которым собираются их slug
+BANK_DIRECTORY_URLS = [
+    f"{SRAVNI_BASE_URL}/banki/",
+    f"{SRAVNI_BASE_URL}/debetovye-karty/",
+    f"{SRAVNI_BASE_URL}/karty/",
+]
+
+# Время жизни списков в кеше: состав витрин меняется редко
+LISTING_CACHE_TTL = 6 * 60 * 60
+
+_BANK_SLUG_RE = re.compile(r'/bank/([a-z0-9][a-z0-9-]*)/')
+
+
+@dataclass
+class ListingStats:
+    """Итог обхода витрины одной пары (банк, продукт)"""
+    bank_slug: str
+    product_name: str
+    pages: int = 0
+    cards: int = 0  # Карт на страницах витрины (с повторами)
+    new_cards: int = 0  # Карт, впервые попавших в каталог
+    error: Optional[str] = None
+    incomplete: bool = False  # Пагинация прервана ошибкой: карты следующих страниц не собраны
+
+
+def listing_url(bank_slug: str, product_name: str, page: int = 1) -> str:
+    """URL страницы витрины продукта банка (первая страница - без параметра page)"""
+    section, _ = PRODUCT_LISTINGS[product_name]
+    url = f"{SRAVNI_BASE_URL}/{section}/bank/{bank_slug}/"
+    return url if page <= 1 else f"{url}?page={page}"
+
+
+def parse_bank_cards(html_content: str, service_type: str = "Дебетовая карта",
+                     parser_backend: str = "auto") -> List[Dict]:
+    """
+    Извлекает карты из HTML страницы sravni.ru
+
+    Args:
+        html_content: HTML страницы с картами банка
+        service_type: Тип услуги
+        parser_backend: Способ извлечения скриптов
+
+    Returns:
+        Список карт с id, name и service_type
+    """
+    cards_data = []
+
+    # Ищем JSON данные только в скриптах со списком продуктов, без дерева всей страницы
+    for script_text in extract_scripts(html_content, contains='"products"', backend=parser_backend):
+        # Ищем конкретную структуру: "products": {"list": {"offers": {"items": [...]}}}
+        items_start = find_json_path_array(script_text, PRODUCTS_ITEMS_PATH)
+        if items_start is None:
+            continue
+
+        logger.debug("Найдена структура продуктов для %s", service_type)
+
+        # Элементы items разбираются по одному, без копирования всего массива
+        try:
+            for item in iter_json_array(script_text, items_start):
+                if isinstance(item, dict) and 'id' in item:
+                    card_info = {
+                        'id': item['id'],
+                        'service_type': service_type  # Добавляем тип услуги
+                    }
+                    # Добавляем доступные поля
+                    if 'productName' in item:
+                        card_info['productName'] = item['productName']
+                    if 'name' in item:
+                        card_info['name'] = item['name']
+                    if 'alias' in item:
+                        card_info['alias'] = item['alias']
+
+                    cards_data.append(card_info)
+                    logger.debug("Найдена карта: %s - ID=%s", service_type, item['id'], extra={'card_id': item['id']})
+        except json.JSONDecodeError as e:
+            logger.warning("Ошибка парсинга items массива: %s", e)
+
+    return cards_data
+
+
+def parse_bank_slugs(html_content: str) -> List[str]:
+    """slug банков из ссылок вида /bank/<slug>/ в порядке первого появления"""
+    return list(dict.fromkeys(_BANK_SLUG_RE.findall(html_content)))
+
+
+class SravniCatalogDiscovery:
+    """
+    Параллельный обход витрин sravni.ru с общим каталогом карт
+
+    Каждая пара (банк, продукт) - отдельная задача пула потоков; запросы всех
+    потоков проходят через общий token bucket, ответы - через дисковый кеш
+    cached_get. Карта попадает в каталог один раз: id проверяется и
+    добавляется в общее множество под блокировкой.
+    """
+
+    def __init__(self, workers: int = 8, rate: float = 5.0, max_pages: int = 20,
+                 cache_ttl: float = LISTING_CACHE_TTL, parser_backend: str = "auto", max_retries: int = 3):
+        """
+        Args:
+            workers: Число пар (банк, продукт), обрабатываемых одновременно
+            rate: Максимум запросов к sravni.ru в секунду (на все потоки, 0 - без ограничения)
+            max_pages: Максимум страниц витрины одной пары
+            cache_ttl: Время жизни страниц витрин в кеше, сек
+            parser_backend: Способ извлечения скриптов (см. html_scripts)
+            max_retries: Число повторов страницы после сетевой ошибки или 429/5xx
+        """
+        self.workers = workers
+        self.max_pages = max_pages
+        self.cache_ttl = cache_ttl
+        self.parser_backend = parser_backend
+        self.max_retries = max_retries
+        self.bucket = TokenBucket(rate) if rate else None
+        self.catalog: List[Dict] = []
+        self.stats: List[ListingStats] = []
+        self._seen_ids: Set[str] = set()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _throttle(self, url: str):
+        if self.bucket is not None:
+            self.bucket.acquire()
+        yield
+
+    def _get(self, url: str):
+        """GET с повторами временных ошибок (сеть, 429/5xx) с экспоненциальной задержкой"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = cached_get(url, ttl=self.cache_ttl, impersonate="safari15_5", throttle=self._throttle)
+                response.raise_for_status()
+                return response
+            except Exception as e:
+                status = getattr(e, 'status_code', None)
+                if attempt >= self.max_retries or (status is not None and status not in RETRY_STATUSES):
+                    raise
+                delay = backoff_delay(attempt)
+                logger.debug("Временная ошибка для %s (%s), повтор %d/%d через %.1f с", url, e, attempt + 1,
+                             self.max_retries, delay, extra={'url': url, 'status': status})
+                time.sleep(delay)
+
+    def discover_bank_slugs(self, directory_urls: Sequence[str] = BANK_DIRECTORY_URLS) -> List[str]:
+        """slug банков со страниц-каталогов sravni.ru (недоступные страницы пропускаются)"""
+        slugs: Dict[str, None] = {}
+        with ThreadPoolExecutor(max_workers=max(min(self.workers, len(directory_urls)), 1),
+                                thread_name_prefix="sravni-banks") as executor:
+            pages = list(executor.map(self._fetch_directory, directory_urls))
+        for page_slugs in pages:
+            slugs.update(dict.fromkeys(page_slugs))
+        logger.info("🏦 Найдено банков на sravni.ru: %d", len(slugs))
+        return list(slugs)
+
+    def _fetch_directory(self, url: str) -> List[str]:
+        try:
+            return parse_bank_slugs(self._get(url).text)
+        except Exception as e:
+            logger.warning("⚠️  Не удалось получить список банков с %s: %s", url, e, extra={'url': url})
+            return []
+
+    def collect(self, pairs: Iterable[Tuple[str, str]]) -> List[Dict]:
+        """
+        Собирает карты для пар (slug банка, productName)
+
+        Returns:
+            Каталог карт: id, service_type, name, ... и bank_slug; порядок - по завершению пар
+        """
+        pairs = list(dict.fromkeys(pairs))
+        unknown = sorted({product for _, product in pairs if product not in PRODUCT_LISTINGS})
+        if unknown:
+            raise ValueError(f"Неизвестные продукты: {', '.join(unknown)}; "
+                             f"доступны: {', '.join(PRODUCT_LISTINGS)}")
+
+        workers = max(min(self.workers, len(pairs)), 1)
+        logger.info("📥 Обходим витрины sravni.ru: пар (банк, продукт) %d, потоков %d", len(pairs), workers)
+        progress = ProgressReporter("Витрины sravni.ru", total=len(pairs), logger=logger)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sravni-listing") as executor:
+            futures = {executor.submit(self._collect_pair, bank_slug, product_name): (bank_slug, product_name)
+                       for bank_slug, product_name in pairs}
+            for future in as_completed(futures):
+                stats = future.result()
+                with self._lock:
+                    self.stats.append(stats)
+                progress.advance(error=stats.error is not None or stats.incomplete)
+                if stats.error:
+                    logger.warning("⚠️  %s / %s: %s", stats.bank_slug, stats.product_name, stats.error,
+                                   extra={'url': listing_url(stats.bank_slug, stats.product_name)})
+        progress.finish()
+
+        logger.info("📦 Каталог: %d карт, страниц загружено %d, пар с ошибками %d, собранных не полностью %d",
+                    len(self.catalog), sum(s.pages for s in self.stats), sum(1 for s in self.stats if s.error),
+                    sum(1 for s in self.stats if s.incomplete))
+        return self.catalog
+
+    def _collect_pair(self, bank_slug: str, product_name: str) -> ListingStats:
+        """Страницы витрины одной пары по порядку, до страницы без новых для этой пары карт"""
+        _, service_type = PRODUCT_LISTINGS[product_name]
+        stats = ListingStats(bank_slug, product_name)
+        pair_ids: Set[str] = set()
+
+        for page in range(1, self.max_pages + 1):
+            url = listing_url(bank_slug, product_name, page)
+            started = time.perf_counter()
+            try:
+                response = self._get(url)
+                cards = parse_bank_cards(response.text, service_type, self.parser_backend)
+            except Exception as e:
+                # Без первой страницы пары нет; ошибка на следующих обрывает пагинацию
+                if page == 1:
+                    stats.error = str(e)
+                else:
+                    stats.incomplete = True
+                    logger.warning("⚠️  %s / %s: страница %d недоступна, витрина собрана не полностью: %s",
+                                   bank_slug, product_name, page, e, extra={'url': url})
+                break
+            stats.pages += 1
+            stats.cards += len(cards)
+            logger.debug("Страница витрины %s: карт %d", url, len(cards),
+                         extra={'url': url, 'status': response.status_code, 'from_cache': response.from_cache,
+                                'latency_ms': round((time.perf_counter() - started) * 1000, 1)})
+
+            # Страница за пределами витрины отдает пустой список или повтор первой страницы
+            page_cards = [card for card in cards if str(card['id']) not in pair_ids]
+            if not page_cards:
+                break
+            pair_ids.update(str(card['id']) for card in page_cards)
+
+            with self._lock:
+                for card in page_cards:
+                    card_id = str(card['id'])
+                    if card_id in self._seen_ids:
+                        continue
+                    self._seen_ids.add(card_id)
+                    card['bank_slug'] = bank_slug
+                    self.catalog.append(card)
+                    stats.new_cards += 1
+        return stats
+
+
+def bank_product_pairs(bank_slugs: Iterable[str],
+                       product_names: Sequence[str] = tuple(PRODUCT_LISTINGS)) -> List[Tuple[str, str]]:
+    """Все сочетания банков и продуктов"""
+    return [(bank_slug, product_name) for bank_slug in bank_slugs for product_name in product_names]
+
+
+def discover_cards(pairs: Optional[Iterable[Tuple[str, str]]] = None, workers: int = 8, rate: float = 5.0,
+                   max_pages: int = 20, product_names: Sequence[str] = tuple(PRODUCT_LISTINGS)) -> List[Dict]:
+    """
+    Каталог карт по парам (slug банка, productName)
+
+    Если пары не заданы, банки берутся со страниц-каталогов sravni.ru
+    и обходятся по всем product_names.
+    """
+    discovery = SravniCatalogDiscovery(workers=workers, rate=rate, max_pages=max_pages)
+    if pairs is None:
+        pairs = bank_product_pairs(discovery.discover_bank_slugs(), product_names)
+    return discovery.collect(pairs)
+
+
+def save_catalog(catalog: List[Dict], filename: str = "sravni_catalog.json"):
+    """Сохраняет каталог карт одним JSON файлом"""
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(catalog, f, ensure_ascii=False, indent=2)
+
+    logger.info("Каталог карт сохранен в %s (%d карт)", filename, len(catalog))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--banks', nargs='*', default=[], help='slug банков на sravni.ru (t-bank, sberbank, ...)')
+    parser.add_argument('--discover', action='store_true', help='Найти банки по страницам-каталогам sravni.ru')
+    parser.add_argument('--products', nargs='+', default=list(PRODUCT_LISTINGS), choices=list(PRODUCT_LISTINGS),
+                        help='Продукты (productName API)')
+    parser.add_argument('--workers', type=int, default=8, help='Пар (банк, продукт) одновременно')
+    parser.add_argument('--rate', type=float, default=5.0, help='Запросов к sravni.ru в секунду (0 - без ограничения)')
+    parser.add_argument('--max-pages', type=int, default=20, help='Максимум страниц витрины на пару')
+    parser.add_argument('--output', default='sravni_catalog.json', help='Файл каталога')
+    add_logging_arguments(parser)
+    args = parser.parse_args()
+    setup_logging_from_args(args)
+
+    if not args.banks and not args.discover:
+        parser.error("укажите --banks или --discover")
+
+    discovery = SravniCatalogDiscovery(workers=args.workers, rate=args.rate, max_pages=args.max_pages)
+    bank_slugs = list(args.banks)
+    if args.discover:
+        bank_slugs += discovery.discover_bank_slugs()
+    catalog = discovery.collect(bank_product_pairs(dict.fromkeys(bank_slugs), args.products))
+    save_catalog(catalog, args.output)
+
+    with open(os.path.splitext(args.output)[0] + "_stats.json", 'w', encoding='utf-8') as f:
+        json.dump([asdict(stats) for stats in discovery.stats], f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
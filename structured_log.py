@@ -0,0 +1,172 @@
+"""
+Журналирование сборщиков: уровни, JSON-записи, ограниченный по частоте прогресс
+
+Сообщения по отдельным картам и страницам пишутся на уровне DEBUG и при
+обычном запуске не форматируются и не выводятся; итоги - INFO, ошибки -
+WARNING/ERROR. Поля записи (url, card_id, status, latency_ms, ...) передаются
+через extra и попадают в JSON как отдельные ключи.
+
+Модули только создают логгеры; вывод включает точка входа (блок __main__)
+вызовом setup_logging или setup_logging_from_args.
+
+Пример:
+    logger = get_logger(__name__)
+    logger.debug("Карта %s получена", card_id, extra={'card_id': card_id, 'status': 200, 'latency_ms': 120.5})
+"""
+import argparse
+import json
+import logging
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+ROOT_LOGGER = "bankparser"
+
+LOG_FORMATS = ("text", "json")
+
+# Атрибуты LogRecord; все остальные атрибуты записи пришли из extra
+_RECORD_ATTRIBUTES = frozenset(logging.LogRecord('', 0, '', 0, '', (), None).__dict__) | {'message', 'asctime'}
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Логгер модуля внутри общего логгера сборщиков
+
+    Обработчики и уровень не настраиваются: это делает точка входа через
+    setup_logging/setup_logging_from_args. Без настройки записи передаются
+    обработчикам приложения, импортировавшего модуль.
+    """
+    if name == "__main__":
+        name = "main"
+    return logging.getLogger(ROOT_LOGGER).getChild(name)
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна запись - одна строка JSON: ts, level, logger, message и поля из extra"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Консольный вывод как у print: только сообщение (и трассировка исключения)"""
+
+    def __init__(self):
+        super().__init__("%(message)s")
+
+
+def setup_logging(level: str = "INFO", quiet: bool = False, log_format: str = "text",
+                  log_file: Optional[str] = None) -> logging.Logger:
+    """
+    Настраивает журналирование сборщиков (повторный вызов заменяет прежние обработчики)
+
+    Args:
+        level: Уровень консоли и файла (DEBUG - в том числе сообщения по каждой карте/странице)
+        quiet: Тихий режим: в консоль только предупреждения и ошибки
+        log_format: Формат консоли: "text" или "json"
+        log_file: Файл для записей в JSON Lines (уровень level независимо от quiet)
+    """
+    if log_format not in LOG_FORMATS:
+        raise ValueError(f"Неизвестный формат журнала '{log_format}', доступны: {', '.join(LOG_FORMATS)}")
+    level_no = logging.getLevelName(level.upper()) if isinstance(level, str) else level
+    if not isinstance(level_no, int):
+        raise ValueError(f"Неизвестный уровень журнала '{level}'")
+
+    logger = logging.getLogger(ROOT_LOGGER)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+    logger.propagate = False
+
+    console = logging.StreamHandler(sys.stdout)
+    console.setLevel(max(level_no, logging.WARNING) if quiet else level_no)
+    console.setFormatter(JsonFormatter() if log_format == "json" else TextFormatter())
+    logger.addHandler(console)
+    handler_levels = [console.level]
+
+    if log_file:
+        file_handler = logging.FileHandler(log_file, encoding='utf-8')
+        file_handler.setLevel(level_no)
+        file_handler.setFormatter(JsonFormatter())
+        logger.addHandler(file_handler)
+        handler_levels.append(level_no)
+
+    # Уровень логгера - минимальный из обработчиков: отброшенные записи даже не создаются
+    logger.setLevel(min(handler_levels))
+    return logger
+
+
+def add_logging_arguments(parser: argparse.ArgumentParser):
+    """Параметры журналирования командной строки (--log-level, --quiet, --log-format, --log-file)"""
+    group = parser.add_argument_group("журналирование")
+    group.add_argument('--log-level', default='INFO', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                       help='Уровень журнала (DEBUG - сообщения по каждой карте/странице)')
+    group.add_argument('--quiet', '-q', action='store_true', help='В консоль только предупреждения и ошибки')
+    group.add_argument('--log-format', default='text', choices=list(LOG_FORMATS), help='Формат вывода в консоль')
+    group.add_argument('--log-file', help='Файл журнала в формате JSON Lines')
+
+
+def setup_logging_from_args(args: argparse.Namespace) -> logging.Logger:
+    return setup_logging(args.log_level, args.quiet, args.log_format, args.log_file)
+
+
+class ProgressReporter:
+    """
+    Прогресс длинной операции не чаще раза в interval секунд
+
+    advance() безопасен для вызова из нескольких потоков; finish() выводит
+    итоговую строку. Записи прогресса - уровня INFO с полями progress_done,
+    progress_total и rate_per_sec.
+    """
+
+    def __init__(self, label: str, total: Optional[int] = None, logger: Optional[logging.Logger] = None,
+                 interval: float = 5.0):
+        self.label = label
+        self.total = total
+        self.logger = logger or get_logger("progress")
+        self.interval = interval
+        self.done = 0
+        self.errors = 0
+        self._started = time.monotonic()
+        self._last_report = self._started
+        self._lock = threading.Lock()
+
+    def advance(self, count: int = 1, error: bool = False):
+        with self._lock:
+            self.done += count
+            if error:
+                self.errors += count
+            now = time.monotonic()
+            if now - self._last_report < self.interval:
+                return
+            self._last_report = now
+        self._report(now)
+
+    def finish(self):
+        self._report(time.monotonic(), final=True)
+
+    def _report(self, now: float, final: bool = False):
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        elapsed = max(now - self._started, 1e-9)
+        rate = self.done / elapsed
+        done = f"{self.done}/{self.total}" if self.total is not None else str(self.done)
+        errors = f", ошибок {self.errors}" if self.errors else ""
+        status = "завершено" if final else "в работе"
+        self.logger.info(
+            "⏱  %s: %s (%s, %.1f/сек, %.1f сек%s)", self.label, done, status, rate, elapsed, errors,
+            extra={'progress_done': self.done, 'progress_total': self.total, 'rate_per_sec': round(rate, 2)}
+        )
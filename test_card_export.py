@@ -0,0 +1,102 @@
+import sys
+from datetime import datetime
+
+import pytest
+
+from card_export import card_rows, load_card_snapshots, save_structured_columnar
+from record_store import JsonlStore
+
+SNAPSHOT_AT = datetime(2024, 5, 1, 12, 30, 15, 123456)
+
+CARDS = {
+    'black': {
+        'id': 'black', 'name': 'Tinkoff Black', 'service_type': 'Дебетовая карта', 'ageFrom': '14',
+        'paymentSystem': 'Мир', 'currency': ['RUB', 'USD'], 'features': ['Кешбэк', None],
+        'maintenance': {'price': '99,5', 'currency': 'RUB', 'frequency': 'month',
+                        'details': [{'price': 0, 'type': 'выпуск', 'frequency': 'once'}]},
+        'cashback': {'value': 1, 'maxValue': 30000, 'maxValueType': 'rub', 'allCategories': ['АЗС'],
+                     'categories': [{'categories': ['Кафе'], 'value': 5, 'comment': ''}]},
+        'withdrawal': {'rateFrom': 0, 'rateTo': 'нет данных', 'places': 'Банкоматы банка'},
+        'conditions': {'c1': 'Процент на остаток', 'c2': {'nested': True}},
+    },
+    'platinum': {'id': 'platinum', 'name': 'Платинум', 'status': True},
+}
+
+
+def test_card_rows_flatten_and_coerce_values():
+    rows = {row['card_id']: row for row in card_rows(CARDS, SNAPSHOT_AT)}
+
+    black = rows['black']
+    assert black['snapshot_at'] == datetime(2024, 5, 1, 12, 30, 15)
+    assert black['ageFrom'] == 14.0
+    assert black['maintenance_price'] == 99.5
+    assert black['withdrawal_rate_to'] is None
+    assert black['paymentSystem'] == ['Мир']
+    assert black['features'] == ['Кешбэк']
+    assert black['withdrawal_places'] == ['Банкоматы банка']
+    assert black['maintenance_details'] == [{'price': 0.0, 'type': ['выпуск'], 'frequency': 'once', 'conditions': None}]
+    assert black['cashback_categories'][0]['categories'] == ['Кафе']
+    assert black['conditions'] == [{'id': 'c1', 'text': 'Процент на остаток'},
+                                   {'id': 'c2', 'text': '{"nested": true}'}]
+
+    platinum = rows['platinum']
+    assert platinum['status'] == 'True'
+    assert platinum['maintenance_price'] is None
+    assert platinum['currency'] == [] and platinum['maintenance_details'] == []
+
+
+def test_jsonl_fallback_without_pyarrow(tmp_path, monkeypatch):
+    # None в sys.modules заставляет import pyarrow завершиться ImportError
+    for module in [name for name in sys.modules if name == 'pyarrow' or name.startswith('pyarrow.')]:
+        monkeypatch.delitem(sys.modules, module)
+    monkeypatch.setitem(sys.modules, 'pyarrow', None)
+
+    filename = save_structured_columnar(CARDS, str(tmp_path / "cards.parquet"), snapshot_at=SNAPSHOT_AT)
+
+    assert filename == str(tmp_path / "cards.jsonl")
+    assert not (tmp_path / "cards.parquet").exists()
+    records = list(JsonlStore(filename))
+    assert [record['card_id'] for record in records] == ['black', 'platinum']
+    assert records[0]['snapshot_at'] == "2024-05-01T12:30:15"
+    expected = card_rows(CARDS, SNAPSHOT_AT)
+    for record, row in zip(records, expected):
+        row['snapshot_at'] = row['snapshot_at'].isoformat()
+        assert record == row
+
+
+def test_default_filename_fallback(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setitem(sys.modules, 'pyarrow', None)
+
+    filename = save_structured_columnar(CARDS, snapshot_at=SNAPSHOT_AT)
+    assert filename == "cards_structured_20240501_123015.jsonl"
+    assert len(JsonlStore(filename)) == 2
+
+
+@pytest.mark.parametrize("extension", [".parquet", ".arrow"])
+def test_columnar_snapshots_round_trip(tmp_path, extension):
+    pytest.importorskip("pyarrow")
+    pytest.importorskip("pyarrow.parquet")
+
+    first = save_structured_columnar(CARDS, str(tmp_path / f"cards_1{extension}"), snapshot_at=SNAPSHOT_AT)
+    save_structured_columnar({'black': CARDS['black']}, str(tmp_path / f"cards_2{extension}"),
+                             snapshot_at=datetime(2024, 5, 2))
+    assert first.endswith(extension)
+
+    table = load_card_snapshots([str(tmp_path / f"cards_*{extension}")])
+    assert table.num_rows == 3
+    assert table.column('card_id').to_pylist() == ['black', 'platinum', 'black']
+    assert table.column('maintenance_price').to_pylist() == [99.5, None, 99.5]
+
+    only = load_card_snapshots([first], columns=['card_id', 'service_type'])
+    assert only.column_names == ['card_id', 'service_type']
+    assert only.column('service_type').to_pylist() == ['Дебетовая карта', None]
+
+
+def test_load_card_snapshots_without_matches(tmp_path):
+    pytest.importorskip("pyarrow")
+    pytest.importorskip("pyarrow.parquet")
+
+    table = load_card_snapshots([str(tmp_path / "missing_*.parquet")], columns=['card_id'])
+    assert table.num_rows == 0
+    assert table.column_names == ['card_id']
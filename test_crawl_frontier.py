@@ -0,0 +1,219 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("curl_cffi")
+
+import crawl_frontier
+from crawl_frontier import (CrawlFrontier, RobotsPolicy, SEED_PRIORITY, TARGET_TYPE_BONUS, link_priority)
+from http_cache import NO_CACHE
+
+
+class FakeRobots:
+    """robots.txt, запрещающий URL с заданными подстроками; запоминает проверенные URL"""
+
+    def __init__(self, disallowed=()):
+        self.disallowed = disallowed
+        self.checked = []
+
+    def allowed(self, url):
+        self.checked.append(url)
+        return not any(part in url for part in self.disallowed)
+
+
+class FakeResponse:
+    def __init__(self, status_code, text=""):
+        self.status_code = status_code
+        self.text = text
+
+
+def _drain(frontier):
+    order = []
+    while True:
+        item = frontier.next()
+        if item is None:
+            return order
+        order.append(item)
+        frontier.done(item)
+
+
+def test_link_priority_prefers_product_and_target_types():
+    assert link_priority('card', 1) > link_priority(None, 1)
+    assert link_priority('card', 1, 'card') == link_priority('card', 1) + TARGET_TYPE_BONUS
+    assert link_priority('card', 1) > link_priority('card', 2)
+
+
+def test_pages_are_served_by_priority_then_insertion_order():
+    frontier = CrawlFrontier(max_depth=2)
+    frontier.add_seed('alfa', "https://alfabank.ru/cards/")
+    frontier.add_seed('tbank', "https://www.tbank.ru/cards/")
+
+    seed = frontier.next()
+    assert (seed.url, seed.depth, seed.priority) == ("https://alfabank.ru/cards/", 0, SEED_PRIORITY)
+    assert frontier.add('alfa', "https://alfabank.ru/low/", 1, 1.0)
+    assert frontier.add('alfa', "https://alfabank.ru/high/", 1, 5.0)
+    assert frontier.add('alfa', "https://alfabank.ru/high-too/", 1, 5.0)
+    frontier.done(seed)
+
+    order = [item.url for item in _drain(frontier)]
+    assert order == ["https://www.tbank.ru/cards/", "https://alfabank.ru/high/",
+                     "https://alfabank.ru/high-too/", "https://alfabank.ru/low/"]
+    assert frontier.visited('alfa') == ["https://alfabank.ru/cards/", "https://alfabank.ru/high/",
+                                        "https://alfabank.ru/high-too/", "https://alfabank.ru/low/"]
+
+
+def test_links_are_deduplicated_by_normalized_url():
+    frontier = CrawlFrontier(max_depth=1)
+    frontier.add_seed('alfa', "https://alfabank.ru/cards/")
+
+    assert not frontier.add('alfa', "https://ALFABANK.ru/cards?utm_source=x#top", 1, 1.0)
+    assert frontier.add('alfa', "https://alfabank.ru/deposits/?b=2&a=1", 1, 1.0)
+    assert not frontier.add('alfa', "https://alfabank.ru/deposits?a=1&b=2", 1, 1.0)
+    assert frontier.rejected['seen'] == 2
+    assert len(_drain(frontier)) == 2
+
+
+def test_external_hosts_and_depth_are_rejected():
+    frontier = CrawlFrontier(max_depth=1)
+    frontier.add_seed('alfa', "https://www.alfabank.ru/cards/")
+
+    assert frontier.add('alfa', "https://alfabank.ru/credit/", 1, 1.0)  # www. - тот же хост
+    assert not frontier.add('alfa', "https://tbank.ru/cards/", 1, 1.0)
+    assert not frontier.add('tbank', "https://alfabank.ru/other/", 1, 1.0)
+    assert not frontier.add('alfa', "https://alfabank.ru/deep/", 2, 1.0)
+    assert frontier.rejected == {'external': 2, 'depth': 1}
+
+
+def test_depth_zero_crawls_seeds_only():
+    frontier = CrawlFrontier(max_depth=0)
+    frontier.add_seed('alfa', "https://alfabank.ru/a/")
+    frontier.add_seed('alfa', "https://alfabank.ru/b/")
+
+    assert not frontier.add('alfa', "https://alfabank.ru/c/", 1, 1.0)
+    assert [item.url for item in _drain(frontier)] == ["https://alfabank.ru/a/", "https://alfabank.ru/b/"]
+
+
+def test_per_host_budget_counts_seeds_but_never_drops_them():
+    frontier = CrawlFrontier(max_depth=1, max_pages_per_domain=3)
+    for path in ("a", "b", "c", "d"):
+        assert frontier.add_seed('alfa', f"https://alfabank.ru/{path}/")
+    frontier.add_seed('tbank', "https://tbank.ru/")
+
+    assert not frontier.add('alfa', "https://alfabank.ru/link/", 1, 1.0)
+    assert frontier.add('tbank', "https://tbank.ru/1/", 1, 1.0)
+    assert frontier.add('tbank', "https://tbank.ru/2/", 1, 1.0)
+    assert not frontier.add('tbank', "https://tbank.ru/3/", 1, 1.0)
+    assert frontier.rejected['budget'] == 2
+    assert len(_drain(frontier)) == 7
+
+
+def test_robots_checks_links_but_not_seeds():
+    robots = FakeRobots(disallowed=("/private",))
+    frontier = CrawlFrontier(max_depth=1, max_pages_per_domain=3, robots=robots)
+    frontier.add_seed('alfa', "https://alfabank.ru/private/seed/")
+
+    assert not frontier.add('alfa', "https://alfabank.ru/private/page/", 1, 1.0)
+    assert frontier.add('alfa', "https://alfabank.ru/public/", 1, 1.0)
+    # Отклоненная по robots.txt ссылка не расходует бюджет хоста
+    assert frontier.add('alfa', "https://alfabank.ru/public-2/", 1, 1.0)
+    # Ссылки, отклоненные раньше проверки robots.txt, до нее не доходят
+    assert not frontier.add('alfa', "https://tbank.ru/", 1, 1.0)
+
+    assert robots.checked == ["https://alfabank.ru/private/page/", "https://alfabank.ru/public/",
+                              "https://alfabank.ru/public-2/"]
+    assert frontier.rejected == {'robots': 1, 'external': 1}
+    assert "отклонено ссылок (external: 1, robots: 1)" in frontier.summary()
+
+
+def test_one_page_per_host_at_a_time():
+    frontier = CrawlFrontier(max_depth=1)
+    frontier.add_seed('alfa', "https://alfabank.ru/a/")
+    frontier.add_seed('alfa', "https://alfabank.ru/b/")
+    frontier.add_seed('tbank', "https://tbank.ru/")
+
+    first = frontier.next()
+    second = frontier.next()
+    assert (first.host, second.host) == ("alfabank.ru", "tbank.ru")
+
+    # Третья страница ждет освобождения хоста alfabank.ru
+    result = []
+    waiter = threading.Thread(target=lambda: result.append(frontier.next()))
+    waiter.start()
+    time.sleep(0.05)
+    assert not result
+    frontier.done(first)
+    waiter.join(timeout=1)
+    assert result[0].url == "https://alfabank.ru/b/"
+
+    frontier.done(second)
+    frontier.done(result[0])
+    assert frontier.next() is None
+
+
+def test_concurrent_workers_drain_frontier_without_host_overlap():
+    frontier = CrawlFrontier(max_depth=2, max_pages_per_domain=50)
+    hosts = ["alfabank.ru", "tbank.ru", "vtb.ru"]
+    for host in hosts:
+        frontier.add_seed(host, f"https://{host}/")
+
+    active = set()
+    overlaps = []
+    processed = []
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            item = frontier.next()
+            if item is None:
+                return
+            with lock:
+                if item.host in active:
+                    overlaps.append(item.url)
+                active.add(item.host)
+                processed.append(item.url)
+            time.sleep(0.001)
+            if item.depth < 2:
+                for i in range(3):
+                    frontier.add(item.bank, f"{item.url}{i}/", item.depth + 1, link_priority(None, item.depth + 1))
+            with lock:
+                active.discard(item.host)
+            frontier.done(item)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert not overlaps
+    assert len(processed) == len(set(processed)) == 3 * (1 + 3 + 9)
+
+
+def test_robots_policy_statuses(monkeypatch):
+    responses = {
+        "https://ok.ru/robots.txt": FakeResponse(200, "User-agent: *\nDisallow: /private\n"),
+        "https://forbidden.ru/robots.txt": FakeResponse(403),
+        "https://missing.ru/robots.txt": FakeResponse(404),
+    }
+    fetched = []
+
+    def fake_cached_get(url, **kwargs):
+        fetched.append(url)
+        assert kwargs['cache'] is NO_CACHE
+        if url not in responses:
+            raise ConnectionError("нет сети")
+        return responses[url]
+
+    monkeypatch.setattr(crawl_frontier, 'cached_get', fake_cached_get)
+    robots = RobotsPolicy(cache=NO_CACHE)
+
+    assert robots.allowed("https://ok.ru/cards/")
+    assert not robots.allowed("https://ok.ru/private/page")
+    assert not robots.allowed("https://forbidden.ru/cards/")
+    assert robots.allowed("https://missing.ru/cards/")
+    assert robots.allowed("https://offline.ru/cards/")
+    # robots.txt загружается один раз на хост
+    assert robots.allowed("https://ok.ru/deposits/")
+    assert fetched == ["https://ok.ru/robots.txt", "https://forbidden.ru/robots.txt",
+                       "https://missing.ru/robots.txt", "https://offline.ru/robots.txt"]
@@ -0,0 +1,45 @@
+import pytest
+
+from html_scripts import extract_script_by_id, extract_scripts
+
+
+@pytest.mark.parametrize("html", [
+    '<script data-id="app_state">no</script><script id="app_state">yes</script>',
+    '<script data-id=app_state>no</script><script id=app_state>yes</script>',
+    '<script data-x="a id=app_state">no</script><script type="application/json" id="app_state">yes</script>',
+    "<script title='id=\"app_state\"'>no</script><script id='app_state'>yes</script>",
+    '<script id="app_state_old">no</script><script id="app_state">yes</script>',
+    '<script id="other">no</script>\n<SCRIPT\n  nonce=abc\n  ID = "app_state"\n  async>yes</script >',
+    '<script id=app_state defer>yes</script>',
+    '<script async id=app_state>yes</script>',
+])
+def test_regex_backend_matches_only_the_id_attribute(html):
+    assert extract_script_by_id(html, "app_state") == "yes"
+    assert extract_scripts(html, script_id="app_state", backend="regex") == ["yes"]
+
+
+@pytest.mark.parametrize("html", [
+    '<script data-id="app_state">no</script>',
+    '<script data-x="id=app_state">no</script>',
+    '<script id="app_state2">no</script>',
+    '<div id="app_state">no</div>',
+    '<script id="app_state">без закрывающего тега',
+])
+def test_regex_backend_returns_none_without_matching_script(html):
+    assert extract_script_by_id(html, "app_state") is None
+
+
+@pytest.mark.parametrize("backend", ["bs4", "lxml", "selectolax"])
+def test_backends_agree_on_data_id(backend):
+    pytest.importorskip({"bs4": "bs4", "lxml": "lxml.html", "selectolax": "selectolax.parser"}[backend])
+    html = ('<script data-id="app_state">no</script>'
+            "<script id='app_state'>yes</script>"
+            '<script id=other>{"products": 1}</script>')
+    assert extract_script_by_id(html, "app_state", backend=backend) == "yes"
+    assert extract_scripts(html, contains='"products"', backend=backend) == \
+        extract_scripts(html, contains='"products"', backend="regex")
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        extract_scripts("<script></script>", backend="html5lib")
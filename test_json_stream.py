@@ -0,0 +1,105 @@
+import json
+
+import pytest
+
+from json_stream import _find_member, find_json_path_array, iter_json_array, iter_json_path_items
+
+PATH = ("products", "list", "offers", "items")
+
+
+def _items(text, path=PATH):
+    return list(iter_json_path_items(text, path))
+
+
+def test_finds_array_by_path():
+    text = 'window.__STATE__ = {"products": {"list": {"offers": {"items": [{"id": 1}, {"id": 2}]}}}};'
+    start = find_json_path_array(text, PATH)
+    assert text[start] == '['
+    assert [item['id'] for item in iter_json_array(text, start)] == [1, 2]
+
+
+def test_sibling_key_with_same_name_outside_path():
+    state = {
+        "items": ["корень"],
+        "offers": {"items": ["не из products"]},
+        "products": {
+            "items": ["products.items"],
+            "list": {"items": ["list.items"], "offers": {"items": [{"id": "ok"}], "total": 1}},
+        },
+    }
+    assert _items(json.dumps(state, ensure_ascii=False)) == [{"id": "ok"}]
+
+
+def test_nested_decoy_key_is_skipped():
+    # "list" и "offers" глубже, чем нужно, раньше настоящих ключей
+    state = {"products": {
+        "meta": {"list": {"offers": {"items": ["приманка"]}}},
+        "filters": [{"offers": {"items": ["приманка"]}}],
+        "list": {"offers": {"meta": {"items": ["приманка"]}, "items": [{"id": "ok"}]}},
+    }}
+    assert _items(json.dumps(state, ensure_ascii=False)) == [{"id": "ok"}]
+
+
+def test_first_key_occurrence_without_path_tries_next():
+    text = ('{"products": [], "other": {"products": {"list": "нет"}}, '
+            '"state": {"products": {"list": {"offers": {"items": [{"id": "ok"}]}}}}}')
+    assert _items(text) == [{"id": "ok"}]
+
+
+def test_brackets_and_quotes_inside_strings():
+    state = {"products": {
+        "title": 'кавычки " и скобки ] } [ {',
+        "list": {
+            "note": '"offers": {"items": ["подделка"]}',
+            "offers": {"items": [{"id": "ok", "name": 'Карта "Black" ]', "text": "}]"}]},
+        },
+    }}
+    assert _items(json.dumps(state, ensure_ascii=False)) == [
+        {"id": "ok", "name": 'Карта "Black" ]', "text": "}]"}
+    ]
+
+
+def test_escaped_strings():
+    state = {"products": {
+        "a\"list": {"offers": {"items": ["не тот ключ"]}},
+        "path": "C:\\offers\\items\\",
+        "list": {"offers": {"items": [{"id": "ok", "name": "Тинькофф\n\t"}]}},
+    }}
+    # ensure_ascii=True: кириллица в виде \uXXXX
+    assert _items(json.dumps(state)) == [{"id": "ok", "name": "Тинькофф\n\t"}]
+
+
+def test_escaped_key_name_matches_decoded_key():
+    text = '{"products": {"\\u006cist": {"offers": {"items": [1]}}}}'
+    assert _items(text) == [1]
+
+
+@pytest.mark.parametrize("text", [
+    '',
+    'нет JSON',
+    '{"products": {"list": {"offers": {}}}}',
+    '{"products": {"list": {"offers": {"items": {"id": 1}}}}}',
+    '{"products": {"list": {"offers": {"items": "[1, 2]"}}}}',
+    '{"products": {"list": [{"offers": {"items": [1]}}]}}',
+    '{"products": {"list": {"offers": {"items"',
+    '{"products": {"list": {"offers": {"other": [1, ',
+    '{"products": {"list": {"offers" {"items": [1]}}}}',
+])
+def test_missing_path_returns_none(text):
+    assert find_json_path_array(text, PATH) is None
+    assert _items(text) == []
+
+
+def test_find_member_skips_nested_objects():
+    text = '{"a": {"key": 1}, "b": [{"key": 2}], "key": 3}'
+    pos = _find_member(text, "key", 0)
+    assert text[pos] == '3'
+    assert _find_member(text, "missing", 0) is None
+    assert _find_member('{}', "key", 0) is None
+    assert _find_member('{"a": 1 "key": 2}', "key", 0) is None
+
+
+def test_iter_json_array_empty_and_invalid():
+    assert list(iter_json_array('[ ]', 0)) == []
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_array('[1 2]', 0))
@@ -0,0 +1,99 @@
+import random
+
+from link_index import LinkScoring, ProductLinkIndex
+from product_keywords import service_product_type
+
+
+def linear_best_url(product_links, service_type, product_details):
+    """Прежний линейный перебор _find_exact_product_url (порог 3) - эталон для индекса"""
+    service_type_lower = service_type.lower()
+    product_details_lower = product_details.lower()
+    target_type = service_product_type(service_type_lower)
+
+    best_match = ""
+    best_score = 0
+    for link_info in product_links:
+        current_score = 0
+        link_text = link_info['text'].lower()
+        link_url = link_info['url'].lower()
+
+        if target_type and link_info['type'] == target_type:
+            current_score += 3
+        for keyword in service_type_lower.split():
+            if len(keyword) > 3 and (keyword in link_text or keyword in link_url):
+                current_score += 2
+        for keyword in product_details_lower.split()[:8]:
+            if len(keyword) > 3 and (keyword in link_text or keyword in link_url):
+                current_score += 1
+        if 'оформить' in link_text or 'подробнее' in link_text or 'условия' in link_text:
+            current_score += 1
+        if 'оформить' in link_url or 'заявк' in link_url:
+            current_score += 2
+
+        if current_score > best_score:
+            best_score = current_score
+            best_match = link_info['url']
+
+    return best_match if best_score >= 3 else ""
+
+
+LINKS = [
+    {'url': "https://bank.ru/cards/debit/black/", 'text': "Дебетовая карта Black", 'type': 'card'},
+    {'url': "https://bank.ru/cards/credit/platinum/", 'text': "Кредитная карта Platinum", 'type': 'card'},
+    {'url': "https://bank.ru/deposits/", 'text': "Вклады", 'type': 'deposit'},
+    {'url': "https://bank.ru/deposits/smart/zayavka/", 'text': "Оформить вклад Смарт", 'type': 'deposit'},
+    {'url': "https://bank.ru/mortgage/", 'text': "Ипотека", 'type': 'mortgage'},
+    {'url': "https://bank.ru/about/", 'text': "Подробнее о банке", 'type': 'other'},
+]
+
+WORDS = ["дебетовая", "кредитная", "карта", "вклад", "смарт", "black", "platinum", "ипотека", "семейная",
+         "оформить", "условия", "кешбэк", "бесплатное", "обслуживание", "bank", "cards", "deposits", "заявка"]
+
+
+def _random_links(rng, count):
+    types = ['card', 'deposit', 'credit', 'mortgage', 'other']
+    return [{'url': "https://bank.ru/" + "/".join(rng.sample(WORDS, rng.randint(1, 3))) + f"/{i}/",
+             'text': " ".join(rng.sample(WORDS, rng.randint(0, 4))),
+             'type': rng.choice(types)}
+            for i in range(count)]
+
+
+def test_known_queries():
+    index = ProductLinkIndex(LINKS)
+    assert index.best_url("Дебетовая карта", "Black с кешбэком") == "https://bank.ru/cards/debit/black/"
+    assert index.best_url("Вклад", "Смарт до 18%") == "https://bank.ru/deposits/smart/zayavka/"
+    assert index.best_url("Ипотека", "") == "https://bank.ru/mortgage/"
+    assert index.best_url("Страхование", "полис") == ""
+    assert len(index) == len(LINKS)
+
+
+def test_empty_index():
+    index = ProductLinkIndex([])
+    assert index.best_url("Дебетовая карта", "Black") == ""
+
+
+def test_ties_keep_first_link():
+    links = [{'url': f"https://bank.ru/cards/{i}/", 'text': "Дебетовая карта", 'type': 'card'} for i in range(3)]
+    assert ProductLinkIndex(links).best_url("Дебетовая карта", "") == "https://bank.ru/cards/0/"
+
+
+def test_matches_linear_scan_on_random_queries():
+    rng = random.Random(20240519)
+    for _ in range(50):
+        links = _random_links(rng, rng.randint(1, 40))
+        index = ProductLinkIndex(links)
+        for _ in range(20):
+            service_type = " ".join(rng.sample(WORDS, rng.randint(1, 3)))
+            product_details = " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 12)))
+            assert index.best_url(service_type, product_details) == \
+                linear_best_url(links, service_type, product_details), (service_type, product_details)
+
+
+def test_custom_scoring():
+    # Без веса совпадения типа и с низким порогом решает только текст ссылки
+    scoring = LinkScoring(type_match=0, threshold=1)
+    index = ProductLinkIndex(LINKS, scoring)
+    assert index.best_url("Кредитная карта", "") == "https://bank.ru/cards/credit/platinum/"
+
+    strict = ProductLinkIndex(LINKS, LinkScoring(threshold=100))
+    assert strict.best_url("Дебетовая карта", "Black") == ""
@@ -0,0 +1,104 @@
+import copy
+import json
+import os
+
+import pytest
+
+from card_specs import CARD_FLATTENER
+from record_flattener import (CollectionSpec, FieldSpec, NOT_NONE, RecordFlattener, SCOPE_RECORD, TRUTHY)
+
+# Карточки API sravni.ru (реальные по структуре и случайные) и результат для них
+# логики прежних функций prepare_structured_data_for_llm/extract_*_info из main2,
+# запущенной с текущим text_normalize.clean_html: в отличие от прежнего clean_html
+# он декодирует HTML-сущности (&nbsp;, &amp;, ...), поэтому ожидаемые тексты - декодированные
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "card_flattener.json")
+
+
+@pytest.fixture(scope="module")
+def card_fixture():
+    with open(FIXTURE_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_card_flattener_matches_previous_extractors(card_fixture):
+    result = CARD_FLATTENER.flatten_many(card_fixture['input'])
+
+    assert list(result) == list(card_fixture['expected'])
+    for card_id, expected in card_fixture['expected'].items():
+        assert result[card_id] == expected, card_id
+        # Порядок ключей виден в JSON для LLM - он тоже должен совпадать
+        assert json.dumps(result[card_id], ensure_ascii=False) == json.dumps(expected, ensure_ascii=False), card_id
+
+
+def test_card_flattener_decodes_html_entities(card_fixture):
+    result = CARD_FLATTENER.flatten(card_fixture['input']['entities'])
+
+    # &nbsp; после декодирования схлопывается в обычный пробел
+    assert result['description'] == "Кешбэк 5% & бонусы «Спасибо»"
+    assert result['maintenance']['comment'] == "Бесплатно — при остатке > 50 000 ₽"
+    assert result['withdrawal']['comment'] == "до 100 000 ₽ & без комиссии"
+    assert result['conditions'] == {'c1': 'Условия "Black" & <Premium>'}
+    # Поля без clean_html передаются как есть
+    assert result['name'] == "AT&amp;T Карта"
+
+
+def test_card_flattener_single_record_and_list(card_fixture):
+    card_id = 'black'
+    record = card_fixture['input'][card_id]
+    expected = card_fixture['expected'][card_id]
+
+    assert CARD_FLATTENER.flatten(record) == expected
+    assert CARD_FLATTENER.flatten_list([record, record]) == [expected, expected]
+
+
+def test_card_flattener_does_not_modify_input(card_fixture):
+    inputs = copy.deepcopy(card_fixture['input'])
+    CARD_FLATTENER.flatten_many(inputs)
+    assert inputs == card_fixture['input']
+
+
+def test_guard_include_and_default():
+    flattener = RecordFlattener([
+        FieldSpec('price', 'price', include=NOT_NONE),
+        FieldSpec('currency', 'currency', default="RUB", include=NOT_NONE, guard='price'),
+        FieldSpec('note', 'note', transform=str.strip, include=TRUTHY),
+        FieldSpec('kind', 'kind', default='Неизвестно', scope=SCOPE_RECORD),
+    ])
+
+    assert flattener.flatten({'item': {'price': 0, 'note': ' да '}, 'kind': 'card'}) == \
+        {'price': 0, 'currency': "RUB", 'note': "да", 'kind': 'card'}
+    assert flattener.flatten({'item': {'price': None, 'currency': "USD", 'note': ""}}) == {'kind': 'Неизвестно'}
+
+
+def test_collections_list_and_keyed():
+    flattener = RecordFlattener([
+        CollectionSpec('tariffs', 'tariffTab', include=NOT_NONE, guard='price', fields=[
+            FieldSpec('price', 'price'),
+            FieldSpec('period', 'period', default="month"),
+        ]),
+        CollectionSpec('notes', 'notesTab', keyed=True, value=FieldSpec(None, 'text', include=TRUTHY)),
+    ], unwrap=None)
+
+    record = {
+        'tariffTab': {'a': {'price': 10}, 'b': {'period': "year"}, 'c': {'price': 0, 'period': "day"}},
+        'notesTab': {'n1': {'text': "первое"}, 'n2': {'text': ""}, 'n3': {}},
+    }
+    assert flattener.flatten(record) == {
+        'tariffs': [{'price': 10, 'period': "month"}, {'price': 0, 'period': "day"}],
+        'notes': {'n1': "первое"},
+    }
+    # Пустые коллекции в результат не попадают
+    assert flattener.flatten({'tariffTab': {'a': {}}, 'notesTab': {}}) == {}
+
+
+def test_drop_empty_and_nested_targets():
+    flattener = RecordFlattener([
+        FieldSpec('name', 'name', drop_empty=True),
+        FieldSpec('tags', 'tags', default=[], drop_empty=True),
+        FieldSpec('limits.day', 'dayLimit', include=NOT_NONE),
+        FieldSpec('limits.month', 'monthLimit', include=NOT_NONE),
+    ])
+
+    assert flattener.flatten({'name': "", 'tags': [], 'dayLimit': 100}) == {'limits': {'day': 100}}
+    assert flattener.flatten({'name': "Карта", 'tags': ["a"]}) == {'name': "Карта", 'tags': ["a"]}
+    assert "def build(item, record):" in flattener.source
@@ -0,0 +1,203 @@
+import json
+import os
+import sys
+
+import pytest
+
+import record_store
+from record_store import JsonlStore, iter_records, meta_path
+
+
+def _write_raw(path, text):
+    with open(path, 'ab') as f:
+        f.write(text.encode('utf-8'))
+
+
+def _records(count, start=0):
+    return [{'id': i, 'url': f"https://bank.ru/{i % 3}", 'text': f"запись {i}"} for i in range(start, start + count)]
+
+
+def test_append_and_read_back(tmp_path):
+    store = JsonlStore(str(tmp_path / "history.jsonl"))
+    assert store.append(_records(3)) == 3
+    assert store.append(_records(2, start=3)) == 2
+    assert store.append([]) == 0
+
+    assert [record['id'] for record in store] == [0, 1, 2, 3, 4]
+    meta = store.read_meta()
+    assert meta['total_records'] == len(store) == 5
+    assert meta['appends'] == 2
+    assert meta['size'] == os.path.getsize(store.path)
+
+
+def test_interrupted_append_is_ignored_on_read_and_dropped_on_next_append(tmp_path):
+    store = JsonlStore(str(tmp_path / "history.jsonl"))
+    store.append(_records(2))
+    confirmed_size = store.read_meta()['size']
+
+    # Сбой посреди дозаписи: строки дописаны, метаданные не обновлены
+    _write_raw(store.path, '{"id":100,"text":"целая"}\n{"id":101,"te')
+
+    assert [record['id'] for record in store] == [0, 1]
+    assert len(store) == 2
+
+    store.append(_records(1, start=2))
+    assert [record['id'] for record in store] == [0, 1, 2]
+    with open(store.path, 'rb') as f:
+        data = f.read()
+    assert b'"id":10' not in data
+    assert len(data) == store.read_meta()['size'] > confirmed_size
+
+
+def test_missing_meta_is_rebuilt_from_data(tmp_path):
+    store = JsonlStore(str(tmp_path / "history.jsonl"))
+    store.append(_records(3))
+    os.remove(meta_path(store.path))
+
+    meta = store.read_meta()
+    assert meta['total_records'] == 3
+    assert meta['size'] == os.path.getsize(store.path)
+    assert [record['id'] for record in store] == [0, 1, 2]
+
+
+def test_missing_meta_drops_final_line_without_newline(tmp_path):
+    path = str(tmp_path / "history.jsonl")
+    _write_raw(path, '{"id":0}\n\n{"id":1}\n{"id":2')
+    store = JsonlStore(path)
+
+    meta = store.read_meta()
+    assert meta['total_records'] == 2
+    assert meta['size'] == len('{"id":0}\n\n{"id":1}\n')
+    assert [record['id'] for record in store] == [0, 1]
+
+    store.append([{'id': 3}])
+    assert [record['id'] for record in store] == [0, 1, 3]
+    assert len(store) == 3
+
+
+def test_missing_data_file(tmp_path):
+    store = JsonlStore(str(tmp_path / "absent.jsonl"))
+    assert list(store) == []
+    assert len(store) == 0
+
+
+def test_invalid_line_raises_unless_skipped(tmp_path):
+    path = str(tmp_path / "history.jsonl")
+    _write_raw(path, '{"id":0}\nне json\n{"id":1}\n')
+    store = JsonlStore(path)
+
+    with pytest.raises(json.JSONDecodeError):
+        list(store)
+    assert [record['id'] for record in store.iter_records(skip_invalid=True)] == [0, 1]
+
+
+def test_compact_without_key_drops_invalid_lines(tmp_path):
+    path = str(tmp_path / "history.jsonl")
+    _write_raw(path, '{"id":0}\n{"id":1,\n{"id":1}\n{"id":0}\n')
+    store = JsonlStore(path)
+
+    assert store.compact() == {'before': 4, 'after': 3}
+    assert [record['id'] for record in store] == [0, 1, 0]
+    assert store.read_meta()['size'] == os.path.getsize(path)
+
+
+def test_compact_with_key_keeps_last_record_and_order(tmp_path):
+    store = JsonlStore(str(tmp_path / "history.jsonl"))
+    store.append([
+        {'url': 'a', 'service_type': 'card', 'v': 1},
+        {'url': 'b', 'service_type': 'card', 'v': 1},
+        {'url': 'a', 'service_type': 'deposit', 'v': 1},
+        {'url': 'a', 'service_type': 'card', 'v': 2},
+        {'url': 'c', 'service_type': {'nested': [1]}, 'v': 1},
+        {'url': 'c', 'service_type': {'nested': [1]}, 'v': 2},
+    ])
+
+    assert store.compact(['url', 'service_type']) == {'before': 6, 'after': 4}
+    assert [(record['url'], record['v']) for record in store] == [('b', 1), ('a', 1), ('a', 2), ('c', 2)]
+
+
+def test_compact_with_key_positions_stay_aligned_around_invalid_lines(tmp_path):
+    # Поврежденные строки пропускаются в обоих проходах compact: если бы позиции
+    # считались по строкам файла, сохранилась бы не та запись
+    path = str(tmp_path / "history.jsonl")
+    _write_raw(path, '\n'.join([
+        '{"url":"a","v":1}',
+        'мусор',
+        '{"url":"b","v":1}',
+        '{"url":"a","v":2',
+        '{"url":"a","v":3}',
+        '',
+        '{"url":"b","v":2}',
+    ]) + '\n')
+    store = JsonlStore(path)
+
+    store.compact(['url'])
+    assert [(record['url'], record['v']) for record in store] == [('a', 3), ('b', 2)]
+    assert len(store) == 2
+
+
+def test_compact_cli(tmp_path, monkeypatch, capsys):
+    store = JsonlStore(str(tmp_path / "history.jsonl"))
+    store.append([{'url': 'a', 'v': 1}, {'url': 'a', 'v': 2}])
+
+    monkeypatch.setattr(sys, 'argv', ['record_store.py', 'compact', store.path])
+    record_store.main()
+    assert len(store) == 2
+
+    monkeypatch.setattr(sys, 'argv', ['record_store.py', 'compact', store.path, '--key', 'url'])
+    record_store.main()
+    assert [record['v'] for record in store] == [2]
+    assert "2 -> 1" in capsys.readouterr().out
+
+
+def test_iter_records_reads_json_and_jsonl(tmp_path):
+    json_path = str(tmp_path / "data.json")
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump({'metadata': {}, 'data': _records(2)}, f)
+    assert [record['id'] for record in iter_records(json_path)] == [0, 1]
+
+    list_path = str(tmp_path / "list.json")
+    with open(list_path, 'w', encoding='utf-8') as f:
+        json.dump(_records(1), f)
+    assert [record['id'] for record in iter_records(list_path)] == [0]
+
+    jsonl_path = str(tmp_path / "data.jsonl")
+    JsonlStore(jsonl_path).append(_records(2))
+    assert [record['id'] for record in iter_records(jsonl_path)] == [0, 1]
+
+
+class TestSaveToJson:
+    @pytest.fixture(autouse=True)
+    def save_to_json(self):
+        pytest.importorskip("curl_cffi")
+        from main import save_to_json
+        return save_to_json
+
+    def test_json_overwrite_and_append(self, tmp_path, save_to_json):
+        path = str(tmp_path / "bank_data.json")
+        assert save_to_json(_records(2), path)
+        assert save_to_json(_records(1, start=2), path, mode="append")
+
+        with open(path, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        assert saved['metadata']['total_records'] == 3
+        assert [record['id'] for record in saved['data']] == [0, 1, 2]
+
+        assert save_to_json(_records(1, start=5), path)
+        assert [record['id'] for record in iter_records(path)] == [5]
+
+    def test_json_append_to_missing_file(self, tmp_path, save_to_json):
+        path = str(tmp_path / "new.json")
+        assert save_to_json(_records(1), path, mode="append")
+        assert [record['id'] for record in iter_records(path)] == [0]
+
+    def test_jsonl_append_survives_interrupted_write(self, tmp_path, save_to_json):
+        path = str(tmp_path / "bank_history.jsonl")
+        assert save_to_json(_records(2), path, mode="append")
+        _write_raw(path, '{"id":99,"te')
+        assert save_to_json(_records(1, start=2), path, mode="append")
+        assert [record['id'] for record in iter_records(path)] == [0, 1, 2]
+
+        assert save_to_json(_records(1, start=7), path)
+        assert [record['id'] for record in iter_records(path)] == [7]
+        assert len(JsonlStore(path)) == 1
@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+pytest.importorskip("curl_cffi")
+
+import sravni_discovery
+from http_client import CachedResponse
+from sravni_discovery import SravniCatalogDiscovery, listing_url
+
+
+def _listing_page(url, card_ids):
+    state = {"products": {"list": {"offers": {"items": [{"id": card_id, "name": f"Карта {card_id}"}
+                                                        for card_id in card_ids]}}}}
+    return CachedResponse(url, 200, f'<script id="__NEXT_DATA__">{json.dumps(state)}</script>')
+
+
+@pytest.fixture
+def fake_site(monkeypatch):
+    """Витрина t-bank: страницы 1-3 с картами, дальше пустые; failures - сбои по URL"""
+    site = {'failures': {}, 'requests': []}
+    pages = {listing_url('t-bank', 'debit-cards', page): ids
+             for page, ids in ((1, ["a", "b"]), (2, ["c"]), (3, ["d"]))}
+
+    def fake_cached_get(url, **kwargs):
+        site['requests'].append(url)
+        failures = site['failures'].get(url)
+        if failures:
+            error = failures.pop(0)
+            if isinstance(error, int):
+                return CachedResponse(url, error, "")
+            raise error
+        return _listing_page(url, pages.get(url, []))
+
+    monkeypatch.setattr(sravni_discovery, 'cached_get', fake_cached_get)
+    monkeypatch.setattr(sravni_discovery, 'backoff_delay', lambda attempt: 0.0)
+    return site
+
+
+def test_transient_errors_are_retried(fake_site):
+    page_2 = listing_url('t-bank', 'debit-cards', 2)
+    fake_site['failures'][page_2] = [503, ConnectionError("сброс соединения")]
+
+    discovery = SravniCatalogDiscovery(workers=1, rate=0, max_retries=3)
+    catalog = discovery.collect([('t-bank', 'debit-cards')])
+
+    assert [card['id'] for card in catalog] == ["a", "b", "c", "d"]
+    assert fake_site['requests'].count(page_2) == 3
+    stats = discovery.stats[0]
+    assert (stats.pages, stats.error, stats.incomplete) == (4, None, False)
+
+
+def test_failed_later_page_marks_pair_incomplete(fake_site):
+    page_2 = listing_url('t-bank', 'debit-cards', 2)
+    fake_site['failures'][page_2] = [503] * 3
+
+    discovery = SravniCatalogDiscovery(workers=1, rate=0, max_retries=2)
+    catalog = discovery.collect([('t-bank', 'debit-cards')])
+
+    assert [card['id'] for card in catalog] == ["a", "b"]
+    stats = discovery.stats[0]
+    assert (stats.pages, stats.error, stats.incomplete) == (1, None, True)
+
+
+def test_client_errors_are_not_retried(fake_site):
+    page_1 = listing_url('t-bank', 'debit-cards')
+    fake_site['failures'][page_1] = [404]
+
+    discovery = SravniCatalogDiscovery(workers=1, rate=0, max_retries=3)
+    assert discovery.collect([('t-bank', 'debit-cards')]) == []
+    assert fake_site['requests'] == [page_1]
+    stats = discovery.stats[0]
+    assert stats.error and not stats.incomplete
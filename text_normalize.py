@@ -0,0 +1,44 @@
+import html
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+# Один проход "теги или пробелы" вида (?:<[^>]+>|\s)+ медленнее: альтернатива отключает
+# быстрый поиск литерала '<' в re. Пробелы схлопываются через str.split() - он делит строку
+# по тем же символам, что и \s, но на уровне C
+_TAG_RE = re.compile(r'<[^>]+>')
+
+
+def collapse_whitespace(text: str) -> str:
+    """Схлопывает пробельные символы в один пробел и обрезает края (как re.sub(r'\\s+', ' ', text).strip())"""
+    return ' '.join(text.split())
+
+
+def clean_html(text: Optional[str], unescape: bool = True) -> str:
+    """
+    Текст без HTML-тегов с одиночными пробелами
+
+    Теги заменяются пробелом, HTML-сущности (&nbsp;, &laquo;, ...) декодируются.
+    """
+    if not text:
+        return ""
+    if '<' in text:
+        text = _TAG_RE.sub(' ', text)
+    if unescape and '&' in text:
+        text = html.unescape(text)
+    return ' '.join(text.split())
+
+
+def clean_html_batch(texts: Iterable[Optional[str]], unescape: bool = True) -> List[str]:
+    """clean_html для нескольких текстов"""
+    return [clean_html(text, unescape) for text in texts]
+
+
+def clean_html_fields(record: Dict[str, Any], fields: Iterable[str], unescape: bool = True) -> Dict[str, str]:
+    """
+    Очищенные значения HTML-полей записи (карточки, страницы) за один вызов
+
+    Returns:
+        Поле -> очищенный текст для непустых строковых полей из fields
+    """
+    return {field: clean_html(record[field], unescape) for field in fields
+            if record.get(field) and isinstance(record[field], str)}
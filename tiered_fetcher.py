@@ -0,0 +1,186 @@
+import json
+import os
+import re
+import threading
+from contextlib import nullcontext
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+from http_cache import ResponseCache, NO_CACHE, cache_key, resolve_cache
+from http_client import cached_get
+from politeness import HostPoliteness
+from structured_log import get_logger
+
+logger = get_logger(__name__)
+
+# Время жизни закешированных страниц сайтов: после него страница ревалидируется
+# условным запросом, так что изменения на сайте видны в следующем обходе
+CRAWL_CACHE_TTL = 30 * 60
+
+TIER_HTTP = "http"
+TIER_BROWSER = "browser"
+
+_SCRIPT_STYLE_RE = re.compile(r'<(script|style|noscript|template)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+_TAG_RE = re.compile(r'<[^>]+>')
+_JS_REQUIRED_RE = re.compile(r'enable javascript|включите javascript|javascript is (?:disabled|required)',
+                             re.IGNORECASE)
+
+HTTP_HEADERS = {
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7'
+}
+
+
+@dataclass
+class FetchResult:
+    url: str
+    html: str
+    tier: str  # Каким уровнем получена страница: "http" или "browser"
+    text_length: int  # Длина видимого текста страницы
+
+
+def visible_text_length(html: str) -> int:
+    """Оценка длины видимого текста страницы без скриптов, стилей и тегов"""
+    text = _SCRIPT_STYLE_RE.sub(' ', html)
+    text = _TAG_RE.sub(' ', text)
+    return len(''.join(text.split()))
+
+
+class TieredFetcher:
+    """
+    Загрузка страниц с эскалацией: сначала легкий HTTP-клиент, браузер - только если нужно
+
+    Ответ HTTP-уровня оценивается по объему видимого текста; если его мало
+    или страница требует JavaScript, страница рендерится в браузере.
+    Решение запоминается по URL в decisions_file, чтобы в следующих запусках
+    не тратить время на заведомо бесполезный уровень. Ответы обоих уровней
+    сохраняются в дисковом кеше ответов.
+    """
+
+    def __init__(self, decisions_file: Optional[str] = None, min_text_length: int = 1500,
+                 http_timeout: float = 15.0, verify_ssl: bool = False,
+                 cache: Optional[ResponseCache] = None, ttl: float = CRAWL_CACHE_TTL,
+                 politeness: Optional[HostPoliteness] = None, revalidate: bool = False):
+        """
+        Args:
+            decisions_file: JSON-файл с запомненными решениями {url: "http" | "browser"}
+            min_text_length: Минимальная длина видимого текста, при которой HTTP-ответ достаточен
+            http_timeout: Таймаут HTTP-запроса, сек
+            verify_ssl: Проверять ли SSL-сертификаты на HTTP-уровне
+            cache: Кеш ответов (по умолчанию - общий кеш процесса, NO_CACHE - без кеширования)
+            ttl: Время жизни закешированных страниц, сек
+            politeness: Ограничитель частоты запросов к хостам (ответы из кеша его не ждут)
+            revalidate: Не доверять свежим записям кеша: HTTP-ответы ревалидируются, страницы рендерятся заново
+        """
+        self.decisions_file = decisions_file
+        self.min_text_length = min_text_length
+        self.http_timeout = http_timeout
+        self.verify_ssl = verify_ssl
+        self.cache = resolve_cache(cache)
+        self.ttl = ttl
+        self.politeness = politeness
+        self.revalidate = revalidate
+
+        self._lock = threading.Lock()
+        self._decisions: Dict[str, str] = self._load_decisions()
+
+    def decision_for(self, url: str) -> Optional[str]:
+        """Запомненный уровень для URL"""
+        with self._lock:
+            return self._decisions.get(url)
+
+    def is_sufficient(self, html: str) -> bool:
+        """Достаточно ли содержимого в HTML без рендеринга"""
+        if not html:
+            return False
+        if visible_text_length(html) < self.min_text_length:
+            return False
+        return not _JS_REQUIRED_RE.search(html[:20000])
+
+    def fetch(self, url: str, render: Callable[[str], str]) -> Optional[FetchResult]:
+        """
+        Загружает страницу, эскалируя до браузера при необходимости
+
+        Args:
+            url: Адрес страницы
+            render: Функция рендеринга страницы в браузере, возвращает HTML
+
+        Returns:
+            FetchResult или None, если страницу не удалось получить ни одним уровнем
+        """
+        http_html = ""
+        if self.decision_for(url) != TIER_BROWSER:
+            http_html = self._fetch_http(url)
+            if self.is_sufficient(http_html):
+                self._remember(url, TIER_HTTP)
+                return FetchResult(url, http_html, TIER_HTTP, visible_text_length(http_html))
+
+        browser_html = self._render_cached(url, render)
+
+        if browser_html:
+            self._remember(url, TIER_BROWSER)
+            return FetchResult(url, browser_html, TIER_BROWSER, visible_text_length(browser_html))
+
+        # Браузер недоступен - используем то, что дал HTTP-уровень
+        if not http_html and self.decision_for(url) == TIER_BROWSER:
+            http_html = self._fetch_http(url)
+        if http_html:
+            return FetchResult(url, http_html, TIER_HTTP, visible_text_length(http_html))
+        return None
+
+    def _render_cached(self, url: str, render: Callable[[str], str]) -> str:
+        """Рендеринг в браузере; свежий результат предыдущего рендеринга берется из кеша"""
+        key = cache_key("RENDER", url)
+        if self.cache is not None and not self.revalidate:
+            entry = self.cache.get(key)
+            if entry is not None and entry.is_fresh:
+                return entry.body.decode('utf-8')
+
+        try:
+            with self.politeness.slot(url) if self.politeness else nullcontext():
+                html = render(url)
+        except Exception as e:
+            logger.warning("   ⚠️ Браузерный рендеринг %s не удался: %s", url, e, extra={'url': url})
+            return ""
+
+        if html and self.cache is not None:
+            self.cache.put(key, "RENDER", url, html.encode('utf-8'), content_type="text/html", ttl=self.ttl)
+        return html
+
+    def _fetch_http(self, url: str) -> str:
+        try:
+            response = cached_get(url, ttl=self.ttl, cache=self.cache if self.cache is not None else NO_CACHE,
+                                  throttle=self.politeness.slot if self.politeness else None,
+                                  revalidate=self.revalidate, headers=HTTP_HEADERS,
+                                  timeout=self.http_timeout, verify=self.verify_ssl)
+            if response.status_code == 200:
+                return response.text
+            logger.debug("   HTTP-запрос %s: статус %s", url, response.status_code,
+                         extra={'url': url, 'status': response.status_code})
+        except Exception as e:
+            logger.warning("   ⚠️ HTTP-запрос %s не удался: %s", url, e, extra={'url': url})
+        return ""
+
+    def _load_decisions(self) -> Dict[str, str]:
+        if not self.decisions_file or not os.path.exists(self.decisions_file):
+            return {}
+        try:
+            with open(self.decisions_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def _remember(self, url: str, tier: str):
+        with self._lock:
+            if self._decisions.get(url) == tier:
+                return
+            self._decisions[url] = tier
+            if not self.decisions_file:
+                return
+            directory = os.path.dirname(self.decisions_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_file = f"{self.decisions_file}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(self._decisions, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_file, self.decisions_file)
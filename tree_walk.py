@@ -0,0 +1,114 @@
+from typing import Any, Callable, Iterator, Optional, Sequence, Tuple
+
+# Символы, заменяемые на обычный пробел. str.replace на каждый символ - проход memchr на уровне C,
+# для не-ASCII строк это заметно быстрее str.translate и re.sub
+_WHITESPACE_CHARS = (
+    '\xa0',  # NBSP
+    '\u202f',  # NNBSP
+    '\u2009',  # THSP
+    '\r',  # Carriage return
+    '\n',  # New line
+)
+
+
+def walk(data: Any) -> Iterator[Tuple[Any, Any]]:
+    """
+    Обход JSON-дерева в глубину (прямой порядок) на явном стеке
+
+    Порядок совпадает с рекурсивным обходом "узел, затем значения по порядку",
+    глубина дерева не ограничена лимитом рекурсии. Рассчитан на деревья из json.loads
+    (узлы - ровно dict и list).
+
+    Yields:
+        Пары (узел-контейнер, связный путь); путь материализуется через materialize_path
+    """
+    stack = [(data, None)]
+    pop = stack.pop
+    push_many = stack.extend
+    while stack:
+        obj, path_link = pop()
+        obj_type = type(obj)
+        if obj_type is dict:
+            yield obj, path_link
+            children = [(value, (path_link, key)) for key, value in obj.items()
+                        if type(value) is dict or type(value) is list]
+        elif obj_type is list:
+            yield obj, path_link
+            children = [(item, (path_link, index)) for index, item in enumerate(obj)
+                        if type(item) is dict or type(item) is list]
+        else:
+            continue
+        children.reverse()
+        push_many(children)
+
+
+def iter_nodes(data: Any) -> Iterator[Any]:
+    """Все словари и списки дерева в прямом порядке обхода (без отслеживания путей)"""
+    # Стек итераторов по значениям контейнеров: скаляры пропускаются без попадания в стек
+    stack = [iter((data,))]
+    push = stack.append
+    pop = stack.pop
+    while stack:
+        for obj in stack[-1]:
+            obj_type = type(obj)
+            if obj_type is dict:
+                yield obj
+                push(iter(obj.values()))
+                break
+            if obj_type is list:
+                yield obj
+                push(iter(obj))
+                break
+        else:
+            pop()
+
+
+def materialize_path(path_link: Any) -> Tuple[Any, ...]:
+    """Преобразует связный путь из walk в кортеж ключей и индексов от корня"""
+    keys = []
+    while path_link is not None:
+        path_link, key = path_link
+        keys.append(key)
+    keys.reverse()
+    return tuple(keys)
+
+
+def find_first(data: Any, predicate: Callable[[Any], bool]) -> Optional[Any]:
+    """Первый узел (в прямом порядке), удовлетворяющий условию; обход прекращается сразу после находки"""
+    for node in iter_nodes(data):
+        if predicate(node):
+            return node
+    return None
+
+
+def iter_text_fields(data: Any, fields: Sequence[str] = ('title', 'text')) -> Iterator[Any]:
+    """
+    Отдает значения полей fields всех словарей дерева по мере обхода
+
+    Порядок совпадает с рекурсивным сбором: сначала поля узла, затем его потомки.
+    """
+    stack = [iter((data,))]
+    push = stack.append
+    pop = stack.pop
+    while stack:
+        for obj in stack[-1]:
+            obj_type = type(obj)
+            if obj_type is dict:
+                for field in fields:
+                    if field in obj:
+                        yield obj[field]
+                push(iter(obj.values()))
+                break
+            if obj_type is list:
+                push(iter(obj))
+                break
+        else:
+            pop()
+
+
+def normalize_whitespace(text: str) -> str:
+    """Заменяет неразрывные и тонкие пробелы и переводы строк на пробел"""
+    for char in _WHITESPACE_CHARS:
+        if char in text:
+            text = text.replace(char, ' ')
+    return text.strip()
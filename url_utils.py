@@ -0,0 +1,43 @@
+from typing import Any, Dict, Iterable, List
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Параметры рекламной разметки, не влияющие на содержимое страницы
+TRACKING_PARAMS = {'gclid', 'yclid', 'fbclid', 'ysclid', '_openstat'}
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Каноническая форма URL для дедупликации
+
+    Схема и хост в нижнем регистре, без порта по умолчанию, фрагмента,
+    параметров utm_* и рекламных меток; параметры запроса отсортированы,
+    завершающий слеш пути удален (кроме корня).
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+
+    path = parts.path or "/"
+    if len(path) > 1:
+        path = path.rstrip('/') or "/"
+
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith('utm_') and key.lower() not in TRACKING_PARAMS
+    ))
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+def dedupe_links(links: Iterable[Dict[str, Any]], key: str = 'url') -> List[Dict[str, Any]]:
+    """Ссылки без повторов по нормализованному URL (остается первое вхождение)"""
+    seen = set()
+    unique = []
+    for link in links:
+        normalized = normalize_url(link[key])
+        if normalized not in seen:
+            seen.add(normalized)
+            unique.append(link)
+    return unique